@@ -5,8 +5,11 @@ API Flask para o Gerador de Descrições
 
 import sys
 import os
+import json
+import queue
+import threading
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
 from flask_cors import CORS
 import pandas as pd
 import io
@@ -22,6 +25,8 @@ try:
     from app.core.ai_client import AIClient
     from app.core.models import Product
     from app.utils.file_handler import FileHandler
+    from app.utils.cache_transfer import is_bundle, import_bundle, import_dataframe, export_bundle
+    from app.core.jobs import list_jobs
 except ImportError as e:
     print(f"Erro ao importar módulos: {e}")
     sys.exit(1)
@@ -35,6 +40,9 @@ try:
     generator = DescriptionGenerator()
     ai_client = AIClient()
     file_handler = FileHandler()
+    
+    # Carregar modelos antes da primeira requisição
+    generator.warm_up()
 except Exception as e:
     print(f"Erro ao inicializar componentes: {e}")
     generator = None
@@ -150,6 +158,61 @@ def generate_descriptions():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/generate/stream', methods=['POST'])
+def generate_stream():
+    """Gera descrição de um produto enviando os tokens conforme chegam (NDJSON)"""
+    try:
+        if not generator:
+            return jsonify({'error': 'Gerador não disponível'}), 500
+        
+        data = request.get_json()
+        
+        if not data or not data.get('nome'):
+            return jsonify({'error': 'Nome do produto não fornecido'}), 400
+        
+        product = Product(
+            nome=data.get('nome', ''),
+            material=data.get('material'),
+            cor=data.get('cor'),
+            descricao_fornecedor=data.get('descricao_fornecedor'),
+            categoria1=data.get('categoria1'),
+            categoria2=data.get('categoria2')
+        )
+        
+        # A geração roda em outra thread e entrega os tokens por uma fila
+        tokens = queue.Queue()
+        
+        def worker():
+            result = generator.generate_single(product, on_token=tokens.put)
+            tokens.put(result)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        
+        def stream():
+            while True:
+                item = tokens.get()
+                
+                if isinstance(item, str):
+                    yield json.dumps({'token': item}, ensure_ascii=False) + '\n'
+                    continue
+                
+                yield json.dumps({
+                    'done': True,
+                    'success': item.success,
+                    'description': item.description if item.success else None,
+                    'error': item.error_message if not item.success else None,
+                    'generation_time': item.generation_time,
+                    'time_to_first_token': item.time_to_first_token,
+                    'tokens_per_second': item.tokens_per_second,
+                    'model_used': item.model_used
+                }, ensure_ascii=False) + '\n'
+                break
+        
+        return Response(stream(), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """Upload e processamento de planilha"""
@@ -182,22 +245,52 @@ def upload_file():
                 'missing': validation['missing_required']
             }), 400
         
-        # Gerar descrições
-        descriptions = generator.generate_from_dataframe(df)
+        # Gerar descrições (retomando um envio interrompido da mesma planilha, salvo resume=false)
+        resume = request.form.get('resume', 'true').lower() != 'false'
+        descriptions = generator.generate_from_dataframe(df, resume=resume)
         
-        # Adicionar descrições ao DataFrame
-        df['Descrição Comercial'] = descriptions
+        return _batch_response(df, descriptions)
         
-        # Converter para JSON para resposta
-        result_data = df.to_dict('records')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _batch_response(df: pd.DataFrame, descriptions):
+    """Resposta de um lote de planilha, com o trabalho registrado no diário"""
+    # Adicionar descrições ao DataFrame
+    df['Descrição Comercial'] = descriptions
+    
+    # Converter para JSON para resposta
+    result_data = df.to_dict('records')
+    
+    return jsonify({
+        'success': True,
+        'data': result_data,
+        'total_products': len(df),
+        'successful_generations': sum(1 for desc in descriptions if not desc.startswith('ERRO')),
+        'job_id': generator.last_job.get('job_id'),
+        'resumed_rows': generator.last_job.get('resumed', 0)
+    })
+
+@app.route('/api/jobs')
+def get_jobs():
+    """Lotes registrados, com o progresso de cada um"""
+    try:
+        return jsonify({'jobs': list_jobs()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """Retoma um lote interrompido a partir da planilha guardada no trabalho"""
+    try:
+        if not generator:
+            return jsonify({'error': 'Gerador não disponível'}), 500
         
-        return jsonify({
-            'success': True,
-            'data': result_data,
-            'total_products': len(df),
-            'successful_generations': sum(1 for desc in descriptions if not desc.startswith('ERRO'))
-        })
+        df, descriptions = generator.resume_job(job_id)
+        return _batch_response(df, descriptions)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -226,6 +319,94 @@ def download_template():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/cache/import', methods=['POST'])
+def import_cache():
+    """Importa uma planilha finalizada ou um pacote de cache"""
+    try:
+        if not generator:
+            return jsonify({'error': 'Gerador não disponível'}), 500
+        
+        if 'file' not in request.files:
+            return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
+        
+        keep_existing = request.form.get('keep_existing', '').lower() == 'true'
+        
+        if is_bundle(file.filename):
+            stats = import_bundle(generator.cache_manager, file.stream, keep_existing=keep_existing)
+        else:
+            if file.filename.endswith('.csv'):
+                df = pd.read_csv(file.stream)
+            elif file.filename.endswith('.parquet'):
+                df = pd.read_parquet(io.BytesIO(file.read()))
+            else:
+                df = pd.read_excel(file.stream)
+            
+            # Planilhas não substituem entradas existentes, salvo pedido explícito
+            stats = import_dataframe(
+                generator, df,
+                description_column=request.form.get('column', 'Descrição Comercial'),
+                keep_existing=request.form.get('replace', '').lower() != 'true'
+            )
+        
+        return jsonify({
+            'success': True,
+            **stats,
+            'cache_size': generator.cache_manager.size()
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cache/export')
+def export_cache():
+    """Download do cache como pacote portátil"""
+    try:
+        if not generator:
+            return jsonify({'error': 'Gerador não disponível'}), 500
+        
+        output = io.BytesIO()
+        export_bundle(generator.cache_manager, output)
+        output.seek(0)
+        
+        return send_file(
+            output,
+            mimetype='application/gzip',
+            as_attachment=True,
+            download_name='descricoes.cache.gz'
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/model', methods=['POST'])
+def set_model():
+    """Troca o modelo usado na geração"""
+    try:
+        if not generator:
+            return jsonify({'error': 'Gerador não disponível'}), 500
+        
+        data = request.get_json()
+        
+        if not data or not data.get('model_id'):
+            return jsonify({'error': 'Modelo não informado'}), 400
+        
+        # O novo modelo é pré-carregado em background
+        generator.update_config(model_id=data['model_id'])
+        
+        return jsonify({
+            'success': True,
+            'model_id': generator.config.model_id
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/stats')
 def get_stats():
     """Estatísticas do sistema"""
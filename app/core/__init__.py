@@ -4,7 +4,9 @@ Core - Lógica de negócio principal
 
 from .generator import DescriptionGenerator
 from .ai_client import AIClient
+from .async_ai_client import AsyncAIClient
 from .models import Product, GenerationResult
 from .cache import CacheManager
+from .batch import ProductBatch
 
-__all__ = ["DescriptionGenerator", "AIClient", "Product", "GenerationResult", "CacheManager"]
\ No newline at end of file
+__all__ = ["DescriptionGenerator", "AIClient", "AsyncAIClient", "Product", "GenerationResult", "CacheManager", "ProductBatch"]
\ No newline at end of file
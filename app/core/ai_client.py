@@ -5,25 +5,132 @@ Cliente para comunicação com Ollama
 import requests
 import json
 import time
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Iterator, Callable
+from requests.adapters import HTTPAdapter
 from .models import AIModel, GenerationConfig
+from .backend_pool import BackendPool, OllamaBackend
+from .resilience import RetryPolicy, RetryableStatusError, is_retryable_error, is_retryable_status
 from .logger import get_logger
+from config.settings import OLLAMA_CONFIG
 
 logger = get_logger(__name__)
 
+def build_model_list(installed_models: List[str]) -> List[AIModel]:
+    """Monta a lista de modelos conhecidos marcando os instalados"""
+    # Modelos conhecidos com metadados
+    known_models = {
+        "gemma2:2b": AIModel(
+            id="gemma2:2b",
+            name="Gemma2 2B",
+            size="1.6GB",
+            speed="Média",
+            quality="Boa",
+            description="Modelo equilibrado, recomendado para uso geral"
+        ),
+        "phi3:mini": AIModel(
+            id="phi3:mini",
+            name="Phi3 Mini",
+            size="2.3GB",
+            speed="Lenta",
+            quality="Excelente",
+            description="Alta qualidade, melhor para textos complexos"
+        ),
+        "tinyllama": AIModel(
+            id="tinyllama",
+            name="TinyLlama",
+            size="637MB",
+            speed="Rápida",
+            quality="Básica",
+            description="Muito rápido, qualidade básica"
+        )
+    }
+    
+    models = []
+    for model_id, model_info in known_models.items():
+        model_info.installed = model_id in installed_models
+        models.append(model_info)
+    
+    return models
+
+def build_options(config: GenerationConfig, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """Opções de geração do Ollama a partir da configuração"""
+    options = {
+        "temperature": config.temperature,
+        "num_predict": max_tokens or config.max_tokens
+    }
+    
+    if config.stop_sequences:
+        options["stop"] = list(config.stop_sequences)
+    
+    return options
+
+def fill_stats(data: Dict[str, Any],
+               stats: Optional[Dict[str, Any]],
+               start_time: float,
+               first_token_time: Optional[float] = None):
+    """Copia para `stats` as métricas de tempo da resposta final do Ollama"""
+    if stats is None:
+        return
+    
+    # Durações do Ollama vêm em nanossegundos
+    eval_count = data.get('eval_count') or 0
+    eval_duration = (data.get('eval_duration') or 0) / 1e9
+    
+    stats['done'] = True
+    stats['total_time'] = time.time() - start_time
+    stats['eval_count'] = eval_count
+    stats['done_reason'] = data.get('done_reason')
+    stats['load_duration'] = (data.get('load_duration') or 0) / 1e9
+    # Tokens do prompt efetivamente avaliados (prefixo em cache não conta)
+    stats['prompt_eval_count'] = data.get('prompt_eval_count') or 0
+    stats['prompt_eval_duration'] = (data.get('prompt_eval_duration') or 0) / 1e9
+    
+    if first_token_time is not None:
+        stats['time_to_first_token'] = first_token_time - start_time
+    
+    if eval_count and eval_duration:
+        stats['tokens_per_second'] = eval_count / eval_duration
+    elif eval_count and first_token_time is not None:
+        elapsed = time.time() - first_token_time
+        stats['tokens_per_second'] = eval_count / elapsed if elapsed > 0 else None
+
 class AIClient:
-    """Cliente para interação com Ollama"""
+    """Cliente para interação com Ollama
+    
+    As requisições são distribuídas entre os servidores configurados em
+    `OLLAMA_CONFIG["base_urls"]`, escolhendo sempre o servidor saudável com
+    menos requisições em andamento que tenha o modelo instalado. Timeouts,
+    falhas de conexão e respostas 5xx são repetidos com backoff exponencial;
+    servidores com circuito aberto falham imediatamente.
+    """
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
-        self.base_url = base_url
+    def __init__(self, base_url: Optional[str] = None, base_urls: Optional[List[str]] = None):
+        if base_url:
+            base_urls = [base_url]
+        self.base_urls = base_urls or OLLAMA_CONFIG["base_urls"]
+        self.base_url = self.base_urls[0]
+        
         self.session = requests.Session()
         self.session.timeout = 60
+        
+        # Pool de conexões dimensionado para os workers do lote
+        pool_size = OLLAMA_CONFIG["pool_size"] * len(self.base_urls)
+        adapter = HTTPAdapter(pool_connections=len(self.base_urls), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        self.pool = BackendPool(self.base_urls, session=self.session)
+        self.retry_policy = RetryPolicy()
+        
+        self._counters = {'retries': 0, 'retries_exhausted': 0, 'fast_failures': 0}
+        self._counters_lock = threading.Lock()
     
     def is_available(self) -> bool:
-        """Verifica se o Ollama está disponível"""
+        """Verifica se ao menos um servidor Ollama está disponível"""
         try:
-            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
+            self.pool.refresh()
+            return self.pool.is_available()
         except Exception as e:
             logger.warning(f"Ollama não disponível: {e}")
             return False
@@ -31,47 +138,13 @@ class AIClient:
     def get_models(self) -> List[AIModel]:
         """Lista modelos disponíveis"""
         try:
-            response = self.session.get(f"{self.base_url}/api/tags")
-            if response.status_code == 200:
-                data = response.json()
-                models = []
-                
-                # Modelos conhecidos com metadados
-                known_models = {
-                    "gemma2:2b": AIModel(
-                        id="gemma2:2b",
-                        name="Gemma2 2B",
-                        size="1.6GB",
-                        speed="Média",
-                        quality="Boa",
-                        description="Modelo equilibrado, recomendado para uso geral"
-                    ),
-                    "phi3:mini": AIModel(
-                        id="phi3:mini",
-                        name="Phi3 Mini",
-                        size="2.3GB",
-                        speed="Lenta",
-                        quality="Excelente",
-                        description="Alta qualidade, melhor para textos complexos"
-                    ),
-                    "tinyllama": AIModel(
-                        id="tinyllama",
-                        name="TinyLlama",
-                        size="637MB",
-                        speed="Rápida",
-                        quality="Básica",
-                        description="Muito rápido, qualidade básica"
-                    )
-                }
-                
-                # Marcar modelos instalados
-                installed_models = [model['name'] for model in data.get('models', [])]
-                
-                for model_id, model_info in known_models.items():
-                    model_info.installed = model_id in installed_models
-                    models.append(model_info)
+            self.pool.refresh()
+            
+            if self.pool.is_available():
+                # Marcar modelos instalados em qualquer servidor
+                installed_models = list(self.pool.installed_models())
                 
-                return models
+                return build_model_list(installed_models)
             
         except Exception as e:
             logger.error(f"Erro ao listar modelos: {e}")
@@ -79,13 +152,25 @@ class AIClient:
         return []
     
     def pull_model(self, model_id: str) -> bool:
-        """Baixa um modelo"""
+        """Baixa um modelo em todos os servidores disponíveis"""
+        backends = self.pool.healthy_backends()
+        if not backends:
+            logger.error(f"Nenhum servidor disponível para baixar {model_id}")
+            return False
+        
+        results = [self._pull_on(backend.url, model_id) for backend in backends]
+        self.pool.refresh()
+        
+        return all(results)
+    
+    def _pull_on(self, base_url: str, model_id: str) -> bool:
+        """Baixa um modelo em um servidor específico"""
         try:
-            logger.info(f"Baixando modelo {model_id}...")
+            logger.info(f"Baixando modelo {model_id} em {base_url}...")
             
             payload = {"name": model_id}
             response = self.session.post(
-                f"{self.base_url}/api/pull",
+                f"{base_url}/api/pull",
                 json=payload,
                 stream=True,
                 timeout=300  # 5 minutos para download
@@ -109,8 +194,86 @@ class AIClient:
             logger.error(f"Erro ao baixar modelo {model_id}: {e}")
             return False
     
-    def generate(self, prompt: str, config: GenerationConfig) -> Optional[str]:
-        """Gera texto usando o modelo"""
+    def _count(self, name: str):
+        with self._counters_lock:
+            self._counters[name] += 1
+    
+    def _retry_wait(self, attempt: int, path: str, error: Optional[Exception]):
+        """Aguarda o backoff antes da retentativa `attempt` (1 = primeira)"""
+        self._count('retries')
+        delay = self.retry_policy.delay(attempt - 1)
+        logger.warning(f"Retentativa {attempt}/{self.retry_policy.attempts - 1} de {path} "
+                       f"em {delay:.2f}s: {error}")
+        time.sleep(delay)
+    
+    def _post(self, path: str, payload: Dict[str, Any], timeout: int) -> Optional[Dict[str, Any]]:
+        """Envia a requisição com retentativas ao servidor menos carregado"""
+        last_error = None
+        
+        for attempt in range(self.retry_policy.attempts):
+            if attempt > 0:
+                self._retry_wait(attempt, path, last_error)
+            
+            with self.pool.lease(payload["model"]) as backend:
+                if backend is None:
+                    # Todos offline ou com circuito aberto: falhar sem esperar timeout
+                    self._count('fast_failures')
+                    logger.error("Nenhum servidor Ollama disponível (offline ou circuito aberto)")
+                    return None
+                
+                try:
+                    return self._send(backend, path, payload, timeout)
+                except Exception as e:
+                    if not is_retryable_error(e):
+                        raise
+                    last_error = e
+        
+        self._count('retries_exhausted')
+        raise last_error
+    
+    def _send(self,
+              backend: OllamaBackend,
+              path: str,
+              payload: Dict[str, Any],
+              timeout: int) -> Optional[Dict[str, Any]]:
+        """Executa uma tentativa e registra o resultado no circuit breaker"""
+        try:
+            response = self.session.post(
+                f"{backend.url}{path}",
+                json=payload,
+                timeout=timeout
+            )
+        except Exception:
+            # Conexão recusada inclusive: o circuit breaker decide quando parar de tentar
+            backend.breaker.record_failure()
+            raise
+        
+        if response.status_code == 200:
+            backend.breaker.record_success()
+            return response.json()
+        
+        if is_retryable_status(response.status_code):
+            backend.breaker.record_failure()
+            raise RetryableStatusError(response.status_code)
+        
+        # 4xx: o servidor está de pé, mas repetir não adianta
+        backend.breaker.record_success()
+        logger.error(f"Erro na requisição {path} ({backend.url}): Status {response.status_code}")
+        return None
+    
+    def generate(self,
+                 prompt: str,
+                 config: GenerationConfig,
+                 stats: Optional[Dict[str, Any]] = None,
+                 response_format: Optional[str] = None,
+                 max_tokens: Optional[int] = None,
+                 system: Optional[str] = None) -> Optional[str]:
+        """Gera texto usando o modelo
+        
+        `response_format="json"` força uma resposta JSON válida no Ollama;
+        `max_tokens` substitui o limite de saída da configuração; `system`
+        envia as instruções fixas separadas do prompt do produto.
+        """
         try:
             start_time = time.time()
             
@@ -118,31 +281,28 @@ class AIClient:
                 "model": config.model_id,
                 "prompt": prompt,
                 "stream": False,
-                "options": {
-                    "temperature": config.temperature,
-                    "num_predict": config.max_tokens
-                }
+                "keep_alive": config.keep_alive,
+                "options": build_options(config, max_tokens)
             }
             
-            logger.debug(f"Gerando com modelo {config.model_id}")
+            if response_format:
+                payload["format"] = response_format
+            if system:
+                payload["system"] = system
             
-            response = self.session.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=config.timeout
-            )
+            logger.debug(f"Gerando com modelo {config.model_id}")
             
-            if response.status_code == 200:
-                result = response.json()
-                generated_text = result.get('response', '').strip()
-                
-                generation_time = time.time() - start_time
-                logger.info(f"Geração concluída em {generation_time:.2f}s")
-                
-                return generated_text
-            else:
-                logger.error(f"Erro na geração: Status {response.status_code}")
+            result = self._post("/api/generate", payload, config.timeout)
+            if result is None:
                 return None
+            
+            generated_text = result.get('response', '').strip()
+            fill_stats(result, stats, start_time)
+            
+            generation_time = time.time() - start_time
+            logger.info(f"Geração concluída em {generation_time:.2f}s")
+            
+            return generated_text
                 
         except requests.exceptions.Timeout:
             logger.error("Timeout na geração")
@@ -151,6 +311,141 @@ class AIClient:
             logger.error(f"Erro na geração: {e}")
             return None
     
+    def generate_stream(self,
+                        prompt: str,
+                        config: GenerationConfig,
+                        stats: Optional[Dict[str, Any]] = None,
+                        system: Optional[str] = None) -> Iterator[str]:
+        """Gera texto em modo streaming, produzindo os tokens conforme chegam"""
+        payload = {
+            "model": config.model_id,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": config.keep_alive,
+            "options": build_options(config)
+        }
+        
+        if system:
+            payload["system"] = system
+        
+        logger.debug(f"Gerando com modelo {config.model_id} (streaming)")
+        
+        return self._stream("/api/generate", payload, config.timeout, stats,
+                            lambda data: data.get('response', ''))
+    
+    def chat_stream(self,
+                    messages: List[Dict[str, str]],
+                    config: GenerationConfig,
+                    stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Chat com o modelo em modo streaming"""
+        payload = {
+            "model": config.model_id,
+            "messages": messages,
+            "stream": True,
+            "keep_alive": config.keep_alive,
+            "options": build_options(config)
+        }
+        
+        return self._stream("/api/chat", payload, config.timeout, stats,
+                            lambda data: data.get('message', {}).get('content', ''))
+    
+    def _stream(self,
+                path: str,
+                payload: Dict[str, Any],
+                timeout: int,
+                stats: Optional[Dict[str, Any]],
+                extract: Callable[[Dict[str, Any]], str]) -> Iterator[str]:
+        """Lê os chunks NDJSON do Ollama e produz o texto de cada um
+        
+        Falhas antes do primeiro token são repetidas; depois disso o stream
+        é encerrado, pois o texto parcial já foi entregue.
+        """
+        start_time = time.time()
+        last_error = None
+        
+        for attempt in range(self.retry_policy.attempts):
+            if attempt > 0:
+                self._retry_wait(attempt, path, last_error)
+            
+            yielded = False
+            with self.pool.lease(payload["model"]) as backend:
+                if backend is None:
+                    self._count('fast_failures')
+                    logger.error("Nenhum servidor Ollama disponível (offline ou circuito aberto)")
+                    return
+                
+                try:
+                    for token in self._stream_once(backend, path, payload, timeout,
+                                                   stats, extract, start_time):
+                        yielded = True
+                        yield token
+                    return
+                    
+                except Exception as e:
+                    if yielded or not is_retryable_error(e):
+                        logger.error(f"Erro no streaming: {e}")
+                        return
+                    last_error = e
+        
+        self._count('retries_exhausted')
+        logger.error(f"Erro no streaming após {self.retry_policy.attempts} tentativas: {last_error}")
+    
+    def _stream_once(self,
+                     backend: OllamaBackend,
+                     path: str,
+                     payload: Dict[str, Any],
+                     timeout: int,
+                     stats: Optional[Dict[str, Any]],
+                     extract: Callable[[Dict[str, Any]], str],
+                     start_time: float) -> Iterator[str]:
+        """Uma tentativa de streaming em um servidor específico"""
+        first_token_time = None
+        
+        try:
+            with self.session.post(
+                f"{backend.url}{path}",
+                json=payload,
+                stream=True,
+                timeout=timeout
+            ) as response:
+                if is_retryable_status(response.status_code):
+                    raise RetryableStatusError(response.status_code)
+                
+                if response.status_code != 200:
+                    backend.breaker.record_success()
+                    logger.error(f"Erro no streaming ({backend.url}): Status {response.status_code}")
+                    return
+                
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    
+                    token = extract(data)
+                    if token:
+                        if first_token_time is None:
+                            first_token_time = time.time()
+                        yield token
+                    
+                    if data.get('done'):
+                        fill_stats(data, stats, start_time, first_token_time)
+                        logger.info(f"Streaming concluído em {time.time() - start_time:.2f}s")
+                        break
+            
+            backend.breaker.record_success()
+            
+        except GeneratorExit:
+            # Consumidor abandonou o stream; o servidor respondeu normalmente
+            backend.breaker.record_success()
+            raise
+        except Exception:
+            backend.breaker.record_failure()
+            raise
+    
     def chat(self, messages: List[Dict[str, str]], config: GenerationConfig) -> Optional[str]:
         """Chat com o modelo"""
         try:
@@ -158,24 +453,62 @@ class AIClient:
                 "model": config.model_id,
                 "messages": messages,
                 "stream": False,
-                "options": {
-                    "temperature": config.temperature,
-                    "num_predict": config.max_tokens
-                }
+                "keep_alive": config.keep_alive,
+                "options": build_options(config)
             }
             
-            response = self.session.post(
-                f"{self.base_url}/api/chat",
-                json=payload,
-                timeout=config.timeout
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('message', {}).get('content', '').strip()
+            result = self._post("/api/chat", payload, config.timeout)
+            if result is None:
+                return None
             
-            return None
+            return result.get('message', {}).get('content', '').strip()
             
         except Exception as e:
             logger.error(f"Erro no chat: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    def warm_model(self, model_id: str, keep_alive: str) -> Optional[float]:
+        """Carrega o modelo na memória de cada servidor que o possui
+        
+        Usa uma requisição com prompt vazio, que apenas carrega o modelo.
+        Retorna o maior tempo de carga observado, ou None se nenhum servidor
+        respondeu.
+        """
+        self.pool.refresh_if_stale()
+        backends = [b for b in self.pool.healthy_backends() if b.has_model(model_id)]
+        
+        load_times = []
+        for backend in backends:
+            try:
+                start_time = time.time()
+                response = self.session.post(
+                    f"{backend.url}/api/generate",
+                    json={"model": model_id, "prompt": "", "stream": False, "keep_alive": keep_alive},
+                    timeout=OLLAMA_CONFIG["timeout"]
+                )
+                
+                if response.status_code == 200:
+                    load_duration = (response.json().get('load_duration') or 0) / 1e9
+                    load_times.append(load_duration or time.time() - start_time)
+                else:
+                    logger.warning(f"Falha ao pré-carregar {model_id} em {backend.url}: "
+                                   f"Status {response.status_code}")
+                    
+            except Exception as e:
+                logger.warning(f"Falha ao pré-carregar {model_id} em {backend.url}: {e}")
+        
+        return max(load_times) if load_times else None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas dos servidores e das retentativas"""
+        with self._counters_lock:
+            counters = dict(self._counters)
+        
+        backends = self.pool.get_stats()
+        
+        return {
+            'backends': backends,
+            'healthy_backends': self.pool.healthy_count(),
+            'breakers': {b['url']: b['breaker']['state'] for b in backends},
+            **counters
+        }
\ No newline at end of file
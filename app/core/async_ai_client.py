@@ -0,0 +1,267 @@
+"""
+Cliente assíncrono para comunicação com Ollama
+"""
+
+import asyncio
+import json
+import time
+from typing import List, Dict, Any, Optional
+
+import aiohttp
+
+from .models import AIModel, GenerationConfig
+from .ai_client import build_model_list, build_options, fill_stats
+from .backend_pool import BackendPool
+from .resilience import RetryPolicy, RetryableStatusError, is_retryable_status
+from .logger import get_logger
+from config.settings import OLLAMA_CONFIG
+
+logger = get_logger(__name__)
+
+class AsyncAIClient:
+    """Cliente assíncrono para Ollama com pool de conexões e concorrência limitada
+    
+    Com um `BackendPool`, cada requisição vai para o servidor saudável menos
+    carregado; `pool_size` e `max_concurrency` valem por servidor.
+    """
+    
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 pool_size: Optional[int] = None,
+                 max_concurrency: Optional[int] = None,
+                 keepalive_timeout: Optional[float] = None,
+                 pool: Optional[BackendPool] = None):
+        self.base_url = base_url or OLLAMA_CONFIG["base_url"]
+        self.pool = pool
+        self.pool_size = pool_size or OLLAMA_CONFIG["pool_size"]
+        self.max_concurrency = max_concurrency or OLLAMA_CONFIG["max_concurrency"]
+        self.keepalive_timeout = keepalive_timeout or OLLAMA_CONFIG["keepalive_timeout"]
+        
+        self.retry_policy = RetryPolicy()
+        
+        # Criados sob demanda dentro do event loop em uso
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    async def __aenter__(self) -> 'AsyncAIClient':
+        await self._get_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Retorna a sessão HTTP, criando o pool de conexões se necessário"""
+        if self._session is None or self._session.closed:
+            backends = len(self._urls())
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size * backends,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency * backends)
+        
+        return self._session
+    
+    def _urls(self) -> List[str]:
+        """URLs de todos os servidores conhecidos"""
+        if self.pool is not None:
+            return [backend.url for backend in self.pool.backends]
+        return [self.base_url]
+    
+    async def close(self):
+        """Fecha a sessão e as conexões do pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _get_tags(self, base_url: str) -> Optional[List[str]]:
+        """Lista os modelos instalados em um servidor"""
+        try:
+            session = await self._get_session()
+            timeout = aiohttp.ClientTimeout(total=5)
+            async with session.get(f"{base_url}/api/tags", timeout=timeout) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return [model['name'] for model in data.get('models', [])]
+        except Exception as e:
+            logger.warning(f"Ollama não disponível ({base_url}): {e}")
+        
+        return None
+    
+    async def is_available(self) -> bool:
+        """Verifica se ao menos um servidor Ollama está disponível"""
+        tags = await asyncio.gather(*(self._get_tags(url) for url in self._urls()))
+        return any(t is not None for t in tags)
+    
+    async def get_models(self) -> List[AIModel]:
+        """Lista modelos disponíveis"""
+        tags = await asyncio.gather(*(self._get_tags(url) for url in self._urls()))
+        
+        if all(t is None for t in tags):
+            return []
+        
+        installed_models = [name for names in tags if names for name in names]
+        return build_model_list(installed_models)
+    
+    async def pull_model(self, model_id: str) -> bool:
+        """Baixa um modelo em todos os servidores"""
+        results = await asyncio.gather(*(self._pull_on(url, model_id) for url in self._urls()))
+        return all(results)
+    
+    async def _pull_on(self, base_url: str, model_id: str) -> bool:
+        """Baixa um modelo em um servidor específico"""
+        try:
+            logger.info(f"Baixando modelo {model_id} em {base_url}...")
+            
+            session = await self._get_session()
+            timeout = aiohttp.ClientTimeout(total=300)  # 5 minutos para download
+            async with session.post(
+                f"{base_url}/api/pull",
+                json={"name": model_id},
+                timeout=timeout
+            ) as response:
+                if response.status == 200:
+                    # Processar stream de download
+                    async for line in response.content:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            data = json.loads(line)
+                            if data.get('status') == 'success':
+                                logger.info(f"Modelo {model_id} baixado com sucesso")
+                                return True
+                        except json.JSONDecodeError:
+                            continue
+            
+            return False
+        
+        except Exception as e:
+            logger.error(f"Erro ao baixar modelo {model_id}: {e}")
+            return False
+    
+    async def _post(self, path: str, payload: Dict, timeout: int) -> Optional[Dict]:
+        """Envia requisição com retentativas, respeitando o limite em andamento"""
+        session = await self._get_session()
+        last_error = None
+        
+        for attempt in range(self.retry_policy.attempts):
+            if attempt > 0:
+                delay = self.retry_policy.delay(attempt - 1)
+                logger.warning(f"Retentativa {attempt}/{self.retry_policy.attempts - 1} de {path} "
+                               f"em {delay:.2f}s: {last_error}")
+                await asyncio.sleep(delay)
+            
+            try:
+                async with self._semaphore:
+                    if self.pool is None:
+                        return await self._post_to(session, self.base_url, path, payload, timeout)
+                    return await self._post_pooled(session, path, payload, timeout)
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError, RetryableStatusError) as e:
+                last_error = e
+        
+        raise last_error
+    
+    async def _post_pooled(self, session: aiohttp.ClientSession, path: str, payload: Dict, timeout: int) -> Optional[Dict]:
+        """Envia a requisição ao servidor menos carregado do pool"""
+        # Health check é bloqueante; executar fora do event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.pool.refresh_if_stale)
+        
+        backend = self.pool.acquire(payload["model"])
+        if backend is None:
+            logger.error("Nenhum servidor Ollama disponível (offline ou circuito aberto)")
+            return None
+        
+        try:
+            result = await self._post_to(session, backend.url, path, payload, timeout)
+            backend.breaker.record_success()
+            return result
+        except BaseException:
+            backend.breaker.record_failure()
+            raise
+        finally:
+            self.pool.release(backend)
+    
+    async def _post_to(self,
+                       session: aiohttp.ClientSession,
+                       base_url: str,
+                       path: str,
+                       payload: Dict,
+                       timeout: int) -> Optional[Dict]:
+        """Envia a requisição a um servidor específico"""
+        async with session.post(
+            f"{base_url}{path}",
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            if response.status == 200:
+                return await response.json()
+            
+            if is_retryable_status(response.status):
+                raise RetryableStatusError(response.status)
+            
+            logger.error(f"Erro na requisição {path} ({base_url}): Status {response.status}")
+            return None
+    
+    async def generate(self,
+                       prompt: str,
+                       config: GenerationConfig,
+                       stats: Optional[Dict[str, Any]] = None,
+                       system: Optional[str] = None) -> Optional[str]:
+        """Gera texto usando o modelo"""
+        try:
+            start_time = time.time()
+            
+            payload = {
+                "model": config.model_id,
+                "prompt": prompt,
+                "stream": False,
+                "keep_alive": config.keep_alive,
+                "options": build_options(config)
+            }
+            
+            if system:
+                payload["system"] = system
+            
+            logger.debug(f"Gerando com modelo {config.model_id} (async)")
+            
+            result = await self._post("/api/generate", payload, config.timeout)
+            if result is None:
+                return None
+            
+            fill_stats(result, stats, start_time)
+            generation_time = time.time() - start_time
+            logger.info(f"Geração concluída em {generation_time:.2f}s")
+            
+            return result.get('response', '').strip()
+        
+        except asyncio.TimeoutError:
+            logger.error("Timeout na geração")
+            return None
+        except Exception as e:
+            logger.error(f"Erro na geração: {e}")
+            return None
+    
+    async def chat(self, messages: List[Dict[str, str]], config: GenerationConfig) -> Optional[str]:
+        """Chat com o modelo"""
+        try:
+            payload = {
+                "model": config.model_id,
+                "messages": messages,
+                "stream": False,
+                "keep_alive": config.keep_alive,
+                "options": build_options(config)
+            }
+            
+            result = await self._post("/api/chat", payload, config.timeout)
+            if result is None:
+                return None
+            
+            return result.get('message', {}).get('content', '').strip()
+        
+        except Exception as e:
+            logger.error(f"Erro no chat: {e}")
+            return None
@@ -0,0 +1,164 @@
+"""
+Pool de servidores Ollama com roteamento por menor carga
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Iterator
+
+import requests
+
+from .resilience import CircuitBreaker
+from .logger import get_logger
+from config.settings import OLLAMA_CONFIG
+
+logger = get_logger(__name__)
+
+class OllamaBackend:
+    """Estado de um servidor Ollama do pool"""
+    
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+        self.healthy = True  # Otimista até a primeira verificação
+        self.models: Set[str] = set()
+        self.outstanding = 0
+        self.total_requests = 0
+        self.last_check = 0.0
+        self.breaker = CircuitBreaker()
+    
+    def has_model(self, model_id: str) -> bool:
+        """Verifica se o modelo está instalado neste servidor"""
+        # O Ollama lista modelos sem tag explícita como "<nome>:latest"
+        return model_id in self.models or f"{model_id}:latest" in self.models
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'models': sorted(self.models),
+            'outstanding': self.outstanding,
+            'total_requests': self.total_requests,
+            'last_check': self.last_check,
+            'breaker': self.breaker.to_dict()
+        }
+
+class BackendPool:
+    """Conjunto de servidores Ollama com health check e roteamento"""
+    
+    def __init__(self,
+                 urls: List[str],
+                 session: Optional[requests.Session] = None,
+                 health_interval: Optional[float] = None):
+        if not urls:
+            raise ValueError("Nenhum servidor Ollama configurado")
+        
+        self.backends = [OllamaBackend(url) for url in urls]
+        self.session = session or requests.Session()
+        self.health_interval = health_interval or OLLAMA_CONFIG["health_interval"]
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+    
+    def check_backend(self, backend: OllamaBackend) -> bool:
+        """Verifica um servidor via /api/tags e atualiza seus modelos"""
+        try:
+            response = self.session.get(f"{backend.url}/api/tags", timeout=5)
+            healthy = response.status_code == 200
+            models = {model['name'] for model in response.json().get('models', [])} if healthy else set()
+        except Exception as e:
+            logger.warning(f"Servidor Ollama indisponível ({backend.url}): {e}")
+            healthy = False
+            models = set()
+        
+        with self._lock:
+            backend.healthy = healthy
+            if healthy:
+                backend.models = models
+            backend.last_check = time.time()
+        
+        return healthy
+    
+    def refresh(self):
+        """Verifica todos os servidores em paralelo"""
+        with ThreadPoolExecutor(max_workers=len(self.backends)) as executor:
+            list(executor.map(self.check_backend, self.backends))
+        
+        self._last_refresh = time.time()
+        logger.debug(f"Servidores saudáveis: {self.healthy_count()}/{len(self.backends)}")
+    
+    def refresh_if_stale(self):
+        """Reexecuta o health check quando o intervalo configurado expirou"""
+        with self._lock:
+            if time.time() - self._last_refresh <= self.health_interval:
+                return
+            # Reservar a verificação para que só uma thread a execute
+            self._last_refresh = time.time()
+        
+        self.refresh()
+    
+    def healthy_backends(self) -> List[OllamaBackend]:
+        """Retorna os servidores considerados saudáveis"""
+        return [backend for backend in self.backends if backend.healthy]
+    
+    def healthy_count(self) -> int:
+        return len(self.healthy_backends())
+    
+    def is_available(self) -> bool:
+        return self.healthy_count() > 0
+    
+    def installed_models(self) -> Set[str]:
+        """União dos modelos instalados nos servidores saudáveis"""
+        models = set()
+        for backend in self.healthy_backends():
+            models.update(backend.models)
+        return models
+    
+    def acquire(self, model_id: str) -> Optional[OllamaBackend]:
+        """Reserva o servidor saudável com menos requisições em andamento
+        
+        Servidores com circuito aberto ficam fora do roteamento; se todos
+        estiverem assim, retorna None imediatamente.
+        """
+        self.refresh_if_stale()
+        
+        with self._lock:
+            healthy = [backend for backend in self.healthy_backends() if backend.breaker.can_attempt()]
+            candidates = [backend for backend in healthy if backend.has_model(model_id)]
+            
+            if not candidates and healthy:
+                # Lista de modelos pode estar desatualizada; deixar o Ollama decidir
+                logger.warning(f"Modelo {model_id} não encontrado em nenhum servidor saudável")
+                candidates = healthy
+            
+            if not candidates:
+                return None
+            
+            backend = min(candidates, key=lambda b: (b.outstanding, b.total_requests))
+            if not backend.breaker.allow_request():
+                return None
+            
+            backend.outstanding += 1
+            backend.total_requests += 1
+            
+            return backend
+    
+    def release(self, backend: OllamaBackend):
+        """Libera a reserva feita por acquire"""
+        with self._lock:
+            backend.outstanding -= 1
+    
+    @contextmanager
+    def lease(self, model_id: str) -> Iterator[Optional[OllamaBackend]]:
+        """Context manager para acquire/release"""
+        backend = self.acquire(model_id)
+        try:
+            yield backend
+        finally:
+            if backend is not None:
+                self.release(backend)
+    
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Retorna o estado de cada servidor"""
+        with self._lock:
+            return [backend.to_dict() for backend in self.backends]
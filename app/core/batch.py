@@ -0,0 +1,88 @@
+"""
+Lote de produtos em formato colunar, montado direto das colunas da planilha
+"""
+
+from typing import Dict, List, Optional, Iterator, Sequence, Any
+import numpy as np
+import pandas as pd
+
+from .models import Product, INTERNED_FIELDS, intern_value
+
+# Campo de `Product` -> coluna da planilha
+SPREADSHEET_COLUMNS = {
+    'nome': 'Nome',
+    'material': 'Material',
+    'cor': 'Cor',
+    'descricao_fornecedor': 'Descrição Fornecedor',
+    'categoria1': 'Categoria 1',
+    'categoria2': 'Categoria 2',
+    'preco': 'Preço',
+    'marca': 'Marca'
+}
+
+def _text_column(series: pd.Series) -> List[Optional[str]]:
+    """Valores como texto, com None nas células vazias"""
+    missing = series.isna().to_numpy()
+    values = np.array(list(map(str, series.tolist())), dtype=object)
+    values[missing] = None
+    return values.tolist()
+
+def _raw_column(series: pd.Series) -> List[Any]:
+    """Valores originais (como escalares Python), com None nas células vazias"""
+    missing = series.isna().to_numpy()
+    values = np.array(series.astype(object).tolist(), dtype=object)
+    values[missing] = None
+    return values.tolist()
+
+class ProductBatch:
+    """Produtos de uma planilha guardados por coluna
+    
+    A conversão de tipos e o tratamento de células vazias são feitos uma
+    vez por coluna, em vez de linha a linha com `iterrows`. Cada `Product`
+    só é criado quando o lote é percorrido, então o gerador pode consumir
+    o lote sob demanda. O resultado é idêntico ao de
+    `DescriptionGenerator.product_from_row` para cada linha.
+    """
+    
+    FIELDS = tuple(SPREADSHEET_COLUMNS)
+    
+    def __init__(self, columns: Dict[str, List[Any]], length: int):
+        self.columns = columns
+        self.length = length
+    
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'ProductBatch':
+        length = len(df)
+        columns: Dict[str, List[Any]] = {}
+        
+        for name, column in SPREADSHEET_COLUMNS.items():
+            if column not in df.columns:
+                # Nome ausente vira texto vazio; os demais campos, None
+                columns[name] = [''] * length if name == 'nome' else [None] * length
+            elif name == 'nome':
+                # Como em `str(valor)`: célula vazia vira 'nan' (astype(str) manteria o nulo)
+                columns[name] = list(map(str, df[column].tolist()))
+            elif name == 'preco':
+                columns[name] = _raw_column(df[column])
+            elif name in INTERNED_FIELDS:
+                # Uma cópia por valor distinto, compartilhada pelas linhas e pelos produtos
+                columns[name] = list(map(intern_value, _text_column(df[column])))
+            else:
+                columns[name] = _text_column(df[column])
+        
+        return cls(columns, length)
+    
+    def __len__(self) -> int:
+        return self.length
+    
+    def __iter__(self) -> Iterator[Product]:
+        for values in zip(*(self.columns[name] for name in self.FIELDS)):
+            yield Product(*values)
+    
+    def __getitem__(self, position: int) -> Product:
+        return Product(*(self.columns[name][position] for name in self.FIELDS))
+    
+    def take(self, positions: Sequence[int]) -> 'ProductBatch':
+        """Sub-lote com as linhas em `positions`, na ordem dada"""
+        columns = {name: [values[position] for position in positions] for name, values in self.columns.items()}
+        return ProductBatch(columns, len(positions))
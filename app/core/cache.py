@@ -2,190 +2,474 @@
 Sistema de cache para descrições geradas
 """
 
-import pickle
+import re
+import math
+import numbers
 import hashlib
 import time
-from pathlib import Path
-from typing import Optional, Dict, Any
+import unicodedata
+from dataclasses import fields
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
+import numpy as np
+import pandas as pd
 
 from .models import Product, GenerationResult
+from .cache_backends import CacheBackend, SQLiteCacheBackend, PickleCacheBackend, load_pickle_entries
+from .memory_cache import MemoryLRUCache, parse_size
+from .concurrency import AtomicCounter
+from .write_behind import WriteBehindFlusher, register_shutdown, unregister_shutdown
+from .expiry import ExpirySweeper
 from .logger import get_logger
-from config.settings import CACHE_DIR, GENERATION_CONFIG
+from config.settings import CACHE_DIR, CACHE_CONFIG, GENERATION_CONFIG, PERFORMANCE_CONFIG
 
 logger = get_logger(__name__)
 
+PRODUCT_FIELDS = tuple(f.name for f in fields(Product))
+
+# Campos de texto chegam ao Product via str(); os demais (preço) mantêm o número
+TEXT_FIELDS = frozenset(f.name for f in fields(Product) if f.type in (str, Optional[str]))
+
+# Valores que a planilha traz para "campo vazio"
+NULL_VALUES = {'', 'nan', 'none', 'null', 'n/a', 'na', '-', '--'}
+
+def canonical_value(value: Any) -> str:
+    """Forma canônica de um campo, para diferenças triviais não mudarem a chave
+    
+    Normaliza Unicode (NFKC), espaços e maiúsculas; valores nulos
+    equivalentes viram string vazia e números usam duas casas decimais.
+    """
+    if value is None:
+        return ''
+    
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        return '' if math.isnan(value) else f"{float(value):.2f}"
+    
+    text = unicodedata.normalize('NFKC', str(value))
+    text = re.sub(r'\s+', ' ', text).strip().casefold()
+    
+    return '' if text in NULL_VALUES else text
+
+def canonical_series(series: pd.Series, text: bool = True) -> pd.Series:
+    """`canonical_value` aplicado a uma coluna inteira de uma vez
+    
+    Com `text`, reproduz a conversão com `str()` dos campos de texto em
+    `DescriptionGenerator.product_from_row`; sem, colunas numéricas usam
+    duas casas decimais.
+    """
+    missing = series.isna()
+    
+    if not text:
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = np.char.mod('%.2f', series.fillna(0).to_numpy(dtype=float))
+            return pd.Series(values, index=series.index, dtype=object).where(~missing, '')
+        return series.map(canonical_value)
+    
+    values = series.astype(object).where(~missing, '').astype(str)
+    values = (values.str.normalize('NFKC')
+              .str.replace(r'\s+', ' ', regex=True)
+              .str.strip()
+              .str.casefold())
+    
+    return values.where(~values.isin(NULL_VALUES), '')
+
 class CacheManager:
-    """Gerenciador de cache para descrições"""
+    """Gerenciador de cache para descrições
+    
+    O armazenamento fica a cargo de um `CacheBackend` (SQLite por padrão,
+    ver CACHE_BACKEND); entradas são lidas sob demanda, sem carregar o
+    cache inteiro na inicialização. À frente dele fica uma camada LRU em
+    memória com orçamento de bytes.
+    
+    Gravações não tocam o disco na thread que chama `set`: as entradas
+    ficam pendentes em um `WriteBehindFlusher` e são gravadas em lote em
+    segundo plano. O que estiver pendente é gravado em `close`, chamado
+    automaticamente no encerramento do processo (atexit/SIGTERM).
+    
+    Entradas expiradas são removidas em segundo plano por um
+    `ExpirySweeper`; descrições aceitas com problemas de qualidade usam
+    um TTL menor (CACHE_LOW_QUALITY_TTL).
+    
+    As chaves usam os valores canônicos apenas dos campos que o template
+    usa, dentro de um namespace de modelo, temperatura e versão dos
+    prompts (ver `configure_keys`).
+    """
     
-    def __init__(self, cache_file: str = "descriptions_cache.pkl"):
-        self.cache_file = CACHE_DIR / cache_file
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.hits = 0
-        self.misses = 0
+    def __init__(self,
+                 cache_file: str = "descriptions_cache.pkl",
+                 backend: Optional[CacheBackend] = None):
+        self.cache_file = CACHE_DIR / cache_file  # Cache pickle antigo
+        self._hits = AtomicCounter()
+        self._misses = AtomicCounter()
         self.ttl = GENERATION_CONFIG.get('cache_ttl', 86400)  # 24 horas
+        self.low_quality_ttl = CACHE_CONFIG["low_quality_ttl"]
         
-        self._load_cache()
+        # Só o backend configurado herda o cache pickle antigo; um backend
+        # injetado (testes, ferramentas) não toca em CACHE_DIR
+        migrate = backend is None
+        if backend is None:
+            if CACHE_CONFIG["backend"] == "pickle":
+                backend = PickleCacheBackend(self.cache_file)
+            else:
+                backend = SQLiteCacheBackend()
+        self.backend = backend
+        self.memory = MemoryLRUCache(self._memory_budget(), CACHE_CONFIG["shards"])
+        self.disk_hits = AtomicCounter()
+        self.disk_misses = AtomicCounter()
+        
+        # (namespace, campos): trocados juntos para leituras concorrentes consistentes.
+        # Até configure_keys: todos os campos, sem namespace
+        self._key_scheme = ('', PRODUCT_FIELDS)
+        
+        if migrate:
+            self._migrate_pickle()
+        
+        self.sweeper = ExpirySweeper(
+            self.backend,
+            interval=CACHE_CONFIG["sweep_interval"],
+            batch_size=CACHE_CONFIG["sweep_batch_size"]
+        )
+        self.flusher = WriteBehindFlusher(
+            self.backend,
+            batch_size=CACHE_CONFIG["flush_batch_size"],
+            interval=CACHE_CONFIG["flush_interval"]
+        )
+        self._closed = False
+        register_shutdown(self.close)
+    
+    @property
+    def hits(self) -> int:
+        return self._hits.value
     
-    def _generate_key(self, product: Product) -> str:
+    @property
+    def misses(self) -> int:
+        return self._misses.value
+    
+    @property
+    def namespace(self) -> str:
+        return self._key_scheme[0]
+    
+    @property
+    def key_fields(self) -> Tuple[str, ...]:
+        return self._key_scheme[1]
+    
+    def configure_keys(self,
+                       model_id: str,
+                       temperature: float,
+                       template_hash: str,
+                       template_fields: Iterable[str]):
+        """Define o namespace e os campos que compõem as chaves
+        
+        Trocar de modelo ou de template muda o namespace: as entradas
+        antigas deixam de ser servidas sem precisar limpar o cache.
+        """
+        key_fields = tuple(f for f in PRODUCT_FIELDS if f in set(template_fields)) or PRODUCT_FIELDS
+        namespace = f"{model_id}|{temperature}|{template_hash}"
+        
+        if (namespace, key_fields) != self._key_scheme:
+            self._key_scheme = (namespace, key_fields)
+            logger.debug(f"Chaves de cache: namespace {namespace}, campos {', '.join(key_fields)}")
+    
+    def _generate_key(self, product: Product, key_scheme: Optional[Tuple[str, Tuple[str, ...]]] = None) -> str:
         """Gera chave única para o produto"""
-        # Criar string com dados relevantes do produto
-        data_string = f"{product.nome}|{product.material}|{product.cor}|{product.descricao_fornecedor}|{product.categoria1}|{product.categoria2}"
+        # Apenas campos usados pelo template, em forma canônica
+        namespace, key_fields = key_scheme or self._key_scheme
+        values = '|'.join(canonical_value(getattr(product, name)) for name in key_fields)
+        data_string = f"{namespace}|{values}"
         
         # Gerar hash MD5
         return hashlib.md5(data_string.encode('utf-8')).hexdigest()
     
-    def _load_cache(self):
-        """Carrega cache do arquivo"""
-        try:
-            if self.cache_file.exists():
-                with open(self.cache_file, 'rb') as f:
-                    self.cache = pickle.load(f)
-                
-                # Limpar entradas expiradas
-                self._cleanup_expired()
-                
-                logger.info(f"Cache carregado: {len(self.cache)} entradas")
+    def key_for(self, product: Product) -> str:
+        """Chave de cache do produto (também identifica gerações idênticas)"""
+        return self._generate_key(product)
+    
+    def keys_for(self, products: List[Product]) -> List[str]:
+        """Chaves de vários produtos, com o mesmo esquema para todo o lote"""
+        key_scheme = self._key_scheme
+        return [self._generate_key(product, key_scheme) for product in products]
+    
+    def keys_for_columns(self, columns: Dict[str, pd.Series], length: int) -> List[str]:
+        """Chaves de um lote a partir de colunas por campo de `Product`
+        
+        A canonicalização é feita por coluna, sem montar cada produto;
+        campos sem coluna contam como vazios. O resultado é idêntico ao de
+        `key_for` para os produtos correspondentes.
+        """
+        namespace, key_fields = self._key_scheme
+        
+        data = pd.Series([namespace] * length, dtype=object)
+        for name in key_fields:
+            if name in columns:
+                values = canonical_series(columns[name].reset_index(drop=True), text=name in TEXT_FIELDS)
             else:
-                logger.info("Arquivo de cache não encontrado, iniciando cache vazio")
-                
-        except Exception as e:
-            logger.error(f"Erro ao carregar cache: {e}")
-            self.cache = {}
+                values = pd.Series([''] * length, dtype=object)
+            data = data + '|' + values.astype(object)
+        
+        return [hashlib.md5(value.encode('utf-8')).hexdigest() for value in data]
     
-    def _save_cache(self):
-        """Salva cache no arquivo"""
+    @staticmethod
+    def _memory_budget() -> int:
+        """Orçamento em bytes da camada em memória"""
+        if CACHE_CONFIG["memory_limit"]:
+            return parse_size(CACHE_CONFIG["memory_limit"])
+        
         try:
-            # Criar diretório se não existir
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(self.cache, f)
-                
-            logger.debug(f"Cache salvo: {len(self.cache)} entradas")
+            return int(parse_size(PERFORMANCE_CONFIG["memory_limit"]) * CACHE_CONFIG["memory_fraction"])
+        except ValueError as e:
+            logger.warning(f"{e}; usando 64MB para o cache em memória")
+            return parse_size("64MB")
+    
+    def _migrate_pickle(self):
+        """Importa uma única vez o cache pickle antigo para o backend atual"""
+        if isinstance(self.backend, PickleCacheBackend) or not self.cache_file.exists():
+            return
+        
+        try:
+            entries = load_pickle_entries(self.cache_file)
+            now = time.time()
+            valid = [(key, entry) for key, entry in entries.items() if entry['expires_at'] > now]
+            self.backend.set_many(valid)
             
+            # Renomear para não migrar de novo (outro processo pode ter feito antes)
+            self.cache_file.rename(self.cache_file.with_name(self.cache_file.name + '.migrated'))
+            logger.info(f"Cache pickle migrado para {self.backend.name}: {len(valid)} entradas")
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            logger.error(f"Erro ao salvar cache: {e}")
+            logger.error(f"Erro ao migrar cache pickle: {e}")
+    
+    @staticmethod
+    def _result(product: Product, entry: Dict[str, Any]) -> GenerationResult:
+        """Reconstrói o GenerationResult de uma entrada"""
+        return GenerationResult(
+            product=product,
+            description=entry['description'],
+            success=True,
+            generation_time=entry.get('generation_time'),
+            model_used=entry.get('model_used'),
+            cached=True
+        )
     
-    def _cleanup_expired(self):
-        """Remove entradas expiradas do cache"""
-        current_time = time.time()
-        expired_keys = []
+    def get_many(self,
+                 products: List[Product],
+                 keys: Optional[List[str]] = None,
+                 count_misses: bool = True) -> List[Optional[GenerationResult]]:
+        """Consulta um lote inteiro: memória, pendentes e uma leitura em bloco no disco
         
-        for key, entry in self.cache.items():
-            if current_time - entry['timestamp'] > self.ttl:
-                expired_keys.append(key)
+        Retorna uma lista alinhada a `products`, com None nas falhas.
+        `keys` evita recalcular as chaves quando já vieram prontas. Sem
+        `count_misses`, as falhas não entram nas estatísticas (serão
+        contadas na geração, com `get(..., disk=False)`).
+        """
+        if keys is None:
+            keys = self.keys_for(products)
         
-        for key in expired_keys:
-            del self.cache[key]
+        now = time.time()
+        entries: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        
+        for key in dict.fromkeys(keys):
+            entry = self.memory.get(key, now) or self.flusher.get(key)
+            if entry is not None and entry['expires_at'] > now:
+                entries[key] = entry
+            else:
+                missing.append(key)
         
-        if expired_keys:
-            logger.info(f"Removidas {len(expired_keys)} entradas expiradas do cache")
+        if missing:
+            try:
+                found = self.backend.get_many(missing, now)
+            except Exception as e:
+                logger.error(f"Erro ao ler cache: {e}")
+                found = {}
+            
+            for key, entry in found.items():
+                self.memory.set(key, entry)
+            entries.update(found)
+            
+            self.disk_hits.increment(len(found))
+            if count_misses:
+                self.disk_misses.increment(len(missing) - len(found))
+        
+        results = [
+            self._result(product, entries[key]) if key in entries else None
+            for product, key in zip(products, keys)
+        ]
+        
+        hits = sum(1 for result in results if result is not None)
+        self._hits.increment(hits)
+        if count_misses:
+            self._misses.increment(len(results) - hits)
+        
+        return results
     
-    def get(self, product: Product) -> Optional[GenerationResult]:
-        """Recupera descrição do cache"""
+    def get(self, product: Product, disk: bool = True) -> Optional[GenerationResult]:
+        """Recupera descrição do cache
+        
+        Com `disk=False`, consulta só a memória e as escritas pendentes:
+        para chaves que acabaram de faltar no disco (ex.: em `get_many`).
+        """
         key = self._generate_key(product)
+        now = time.time()
         
-        if key in self.cache:
-            entry = self.cache[key]
+        entry = self.memory.get(key, now)
+        if entry is None:
+            # Descartada da memória antes de chegar ao disco
+            entry = self.flusher.get(key)
+            if entry is not None and entry['expires_at'] <= now:
+                entry = None
+        
+        if entry is None and not disk:
+            # Falta no disco já conhecida; contada aqui, uma vez
+            self.disk_misses.increment()
+        elif entry is None:
+            try:
+                entry = self.backend.get(key, now)
+            except Exception as e:
+                logger.error(f"Erro ao ler cache: {e}")
+                entry = None
             
-            # Verificar se não expirou
-            if time.time() - entry['timestamp'] <= self.ttl:
-                self.hits += 1
-                logger.debug(f"Cache hit para produto: {product.nome}")
-                
-                # Reconstruir GenerationResult
-                return GenerationResult(
-                    product=product,
-                    description=entry['description'],
-                    success=True,
-                    generation_time=entry.get('generation_time'),
-                    model_used=entry.get('model_used')
-                )
+            if entry is not None:
+                self.disk_hits.increment()
+                self.memory.set(key, entry)
             else:
-                # Entrada expirada, remover
-                del self.cache[key]
-                logger.debug(f"Entrada expirada removida: {product.nome}")
+                self.disk_misses.increment()
+        
+        if entry is not None:
+            self._hits.increment()
+            logger.debug(f"Cache hit para produto: {product.nome}")
+            return self._result(product, entry)
         
-        self.misses += 1
+        self._misses.increment()
         return None
     
-    def set(self, product: Product, result: GenerationResult):
-        """Armazena descrição no cache"""
+    def set(self, product: Product, result: GenerationResult, ttl: Optional[float] = None):
+        """Armazena descrição no cache
+        
+        Sem `ttl`, usa o TTL padrão, ou o reduzido quando o resultado foi
+        aceito com problemas de qualidade.
+        """
         if not result.success:
             return  # Não cachear resultados com erro
         
+        if ttl is None:
+            ttl = self.low_quality_ttl if result.quality_issues else self.ttl
+        
         key = self._generate_key(product)
+        entry = self.make_entry(result.description, result.model_used, result.generation_time, ttl)
         
-        entry = {
-            'description': result.description,
-            'timestamp': time.time(),
-            'generation_time': result.generation_time,
-            'model_used': result.model_used
+        self.memory.set(key, entry)
+        
+        try:
+            self.flusher.put(key, entry)
+            logger.debug(f"Produto adicionado ao cache: {product.nome}")
+        except Exception as e:
+            logger.error(f"Erro ao salvar no cache: {e}")
+    
+    def make_entry(self,
+                   description: str,
+                   model_used: Optional[str] = None,
+                   generation_time: Optional[float] = None,
+                   ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Monta uma entrada nova, válida por `ttl` segundos (padrão: TTL configurado)"""
+        now = time.time()
+        return {
+            'description': description,
+            'timestamp': now,
+            'expires_at': now + (self.ttl if ttl is None else ttl),
+            'generation_time': generation_time,
+            'model_used': model_used
         }
+    
+    def flush(self) -> int:
+        """Grava imediatamente as entradas pendentes"""
+        return self.flusher.flush()
+    
+    def merge_entries(self, entries: List[Tuple[str, Dict[str, Any]]], keep_existing: bool = False) -> int:
+        """Importa entradas prontas (planilhas, pacotes de outra instalação)
+        
+        Por padrão vence a entrada mais recente; com `keep_existing` as
+        entradas válidas atuais são mantidas. Retorna quantas foram gravadas.
+        """
+        now = time.time()
+        entries = [(key, entry) for key, entry in entries if entry['expires_at'] > now]
+        if not entries:
+            return 0
         
-        self.cache[key] = entry
+        # Pendências primeiro, para a comparação ver o estado real
+        self.flusher.flush()
+        merged = self.backend.merge_many(entries, keep_existing=keep_existing)
         
-        # Salvar cache periodicamente (a cada 10 entradas)
-        if len(self.cache) % 10 == 0:
-            self._save_cache()
+        # A memória é repovoada sob demanda com as versões gravadas
+        for key, _ in entries:
+            self.memory.delete(key)
         
-        logger.debug(f"Produto adicionado ao cache: {product.nome}")
+        return merged
+    
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Percorre as entradas válidas (inclusive as ainda não gravadas)"""
+        self.flusher.flush()
+        return self.backend.iter_entries(time.time())
     
     def clear(self):
         """Limpa todo o cache"""
-        self.cache.clear()
-        self.hits = 0
-        self.misses = 0
-        
-        # Remover arquivo de cache
-        if self.cache_file.exists():
-            self.cache_file.unlink()
+        self.flusher.discard()
+        self.memory.clear()
+        self.memory.reset_stats()
+        self.backend.clear()
+        self._hits.reset()
+        self._misses.reset()
+        self.disk_hits.reset()
+        self.disk_misses.reset()
         
         logger.info("Cache limpo completamente")
     
     def size(self) -> int:
         """Retorna número de entradas no cache"""
-        return len(self.cache)
+        return self.backend.size()
     
     def hit_rate(self) -> float:
         """Retorna taxa de acerto do cache"""
-        total = self.hits + self.misses
-        return (self.hits / total * 100) if total > 0 else 0.0
+        hits = self.hits
+        total = hits + self.misses
+        return (hits / total * 100) if total > 0 else 0.0
     
     def get_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
+        disk_size = self.backend.disk_size()
         return {
             'size': self.size(),
             'hits': self.hits,
             'misses': self.misses,
             'hit_rate': self.hit_rate(),
             'ttl_hours': self.ttl / 3600,
-            'file_exists': self.cache_file.exists(),
-            'file_size_mb': self.cache_file.stat().st_size / 1024 / 1024 if self.cache_file.exists() else 0
+            'backend': self.backend.name,
+            'file_exists': disk_size > 0,
+            'file_size_mb': disk_size / 1024 / 1024,
+            'disk_hits': self.disk_hits.value,
+            'disk_misses': self.disk_misses.value,
+            **self.memory.get_stats(),
+            **self.flusher.get_stats(),
+            **self.sweeper.get_stats()
         }
     
     def cleanup_old_entries(self, max_age_hours: int = 24):
         """Remove entradas mais antigas que o especificado"""
-        current_time = time.time()
-        max_age_seconds = max_age_hours * 3600
+        removed = self.backend.delete_older_than(time.time() - max_age_hours * 3600)
         
-        old_keys = []
-        for key, entry in self.cache.items():
-            if current_time - entry['timestamp'] > max_age_seconds:
-                old_keys.append(key)
+        if removed:
+            # Entradas antigas podem estar na memória; ela é repovoada sob demanda
+            self.memory.clear()
+            logger.info(f"Removidas {removed} entradas antigas do cache")
         
-        for key in old_keys:
-            del self.cache[key]
-        
-        if old_keys:
-            self._save_cache()
-            logger.info(f"Removidas {len(old_keys)} entradas antigas do cache")
-        
-        return len(old_keys)
+        return removed
     
-    def __del__(self):
-        """Salva cache ao destruir objeto"""
-        try:
-            self._save_cache()
-        except:
-            pass
\ No newline at end of file
+    def close(self):
+        """Grava as entradas pendentes e fecha o backend"""
+        if self._closed:
+            return
+        self._closed = True
+        
+        unregister_shutdown(self.close)
+        self.sweeper.stop()
+        self.flusher.stop()
+        self.backend.close()
\ No newline at end of file
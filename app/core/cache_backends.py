@@ -0,0 +1,497 @@
+"""
+Backends de armazenamento do cache de descrições
+"""
+
+import os
+import heapq
+import tempfile
+import pickle
+import sqlite3
+import weakref
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+
+from .logger import get_logger
+from config.settings import CACHE_DIR, CACHE_CONFIG
+
+logger = get_logger(__name__)
+
+class CacheBackend(ABC):
+    """Interface dos backends do `CacheManager`
+    
+    Cada entrada é um dicionário com `description`, `timestamp`,
+    `expires_at`, `generation_time` e `model_used`.
+    """
+    
+    name = "base"
+    
+    @abstractmethod
+    def get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Retorna a entrada se existir e não tiver expirado"""
+    
+    @abstractmethod
+    def set(self, key: str, entry: Dict[str, Any]):
+        """Insere ou substitui a entrada"""
+    
+    def get_many(self, keys: List[str], now: float) -> Dict[str, Dict[str, Any]]:
+        """Entradas válidas das chaves informadas (as ausentes ficam de fora)"""
+        entries = {}
+        for key in keys:
+            entry = self.get(key, now)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+    
+    def set_many(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        """Insere ou substitui várias entradas"""
+        for key, entry in entries:
+            self.set(key, entry)
+    
+    def merge_many(self, entries: List[Tuple[str, Dict[str, Any]]], keep_existing: bool = False) -> int:
+        """Mescla entradas de outra origem; retorna quantas foram gravadas
+        
+        Por padrão vence a entrada mais recente (`timestamp`). Com
+        `keep_existing`, só substitui entradas ausentes ou já expiradas.
+        """
+        merged = []
+        for key, entry in entries:
+            current = self.get(key, entry['timestamp'])
+            if current is None or (not keep_existing and entry['timestamp'] > current['timestamp']):
+                merged.append((key, entry))
+        
+        self.set_many(merged)
+        return len(merged)
+    
+    @abstractmethod
+    def iter_entries(self, now: float) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Percorre as entradas válidas"""
+    
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove a entrada, se existir"""
+    
+    @abstractmethod
+    def delete_expired(self, now: float, limit: Optional[int] = None) -> int:
+        """Remove até `limit` entradas expiradas; retorna quantas foram removidas
+        
+        O custo deve ser proporcional às entradas removidas, não ao
+        tamanho do cache (índice ordenado por `expires_at`).
+        """
+    
+    @abstractmethod
+    def delete_older_than(self, timestamp: float) -> int:
+        """Remove entradas criadas antes de `timestamp`"""
+    
+    @abstractmethod
+    def clear(self):
+        """Remove todas as entradas"""
+    
+    @abstractmethod
+    def size(self) -> int:
+        """Número de entradas armazenadas"""
+    
+    def disk_size(self) -> int:
+        """Tamanho em bytes dos arquivos do backend"""
+        return 0
+    
+    def close(self):
+        """Libera recursos (conexões, arquivos)"""
+
+class SQLiteCacheBackend(CacheBackend):
+    """Cache em SQLite no modo WAL
+    
+    Cada `set` é um upsert de uma única linha e cada `get` uma consulta
+    pela chave primária, sem carregar o cache inteiro na memória. O modo
+    WAL permite leituras concorrentes com uma escrita, inclusive entre
+    processos (GUI e API usando o mesmo arquivo).
+    """
+    
+    name = "sqlite"
+    
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or CACHE_DIR / CACHE_CONFIG["db_file"])
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Conexões SQLite não devem ser compartilhadas entre threads
+        self._local = threading.local()
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        
+        self._create_schema()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual, criada sob demanda
+        
+        A conexão é fechada quando a thread termina (threads de requisição
+        do Flask, workers de lote), sem esperar o `close` do backend.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                str(self.db_path),
+                timeout=CACHE_CONFIG["busy_timeout"],
+                isolation_level=None,  # autocommit: cada upsert é uma transação curta
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            
+            conn_id = next(self._ids)
+            with self._lock:
+                self._connections[conn_id] = conn
+            weakref.finalize(threading.current_thread(), _release_connection,
+                             self._connections, self._lock, conn_id)
+        return conn
+    
+    def _create_schema(self):
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                description TEXT NOT NULL,
+                generation_time REAL,
+                model_used TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache(expires_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_created_at ON cache(created_at)")
+    
+    def get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT description, generation_time, model_used, created_at, expires_at "
+            "FROM cache WHERE key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+        
+        if row is None:
+            return None
+        
+        return {
+            'description': row[0],
+            'generation_time': row[1],
+            'model_used': row[2],
+            'timestamp': row[3],
+            'expires_at': row[4]
+        }
+    
+    # Abaixo do limite de parâmetros por consulta das versões antigas do SQLite (999)
+    GET_MANY_CHUNK = 500
+    
+    def get_many(self, keys: List[str], now: float) -> Dict[str, Dict[str, Any]]:
+        conn = self._connection()
+        entries = {}
+        
+        for start in range(0, len(keys), self.GET_MANY_CHUNK):
+            chunk = keys[start:start + self.GET_MANY_CHUNK]
+            rows = conn.execute(
+                "SELECT key, description, generation_time, model_used, created_at, expires_at "
+                f"FROM cache WHERE key IN ({','.join('?' * len(chunk))}) AND expires_at > ?",
+                (*chunk, now)
+            )
+            for row in rows:
+                entries[row[0]] = {
+                    'description': row[1],
+                    'generation_time': row[2],
+                    'model_used': row[3],
+                    'timestamp': row[4],
+                    'expires_at': row[5]
+                }
+        
+        return entries
+    
+    @staticmethod
+    def _row(key: str, entry: Dict[str, Any]) -> Tuple:
+        return (key, entry['description'], entry.get('generation_time'), entry.get('model_used'),
+                entry['timestamp'], entry['expires_at'])
+    
+    def set(self, key: str, entry: Dict[str, Any]):
+        self.set_many([(key, entry)])
+    
+    def set_many(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        if not entries:
+            return
+        
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO cache (key, description, generation_time, model_used, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "description = excluded.description, generation_time = excluded.generation_time, "
+                "model_used = excluded.model_used, created_at = excluded.created_at, "
+                "expires_at = excluded.expires_at",
+                [self._row(key, entry) for key, entry in entries]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def merge_many(self, entries: List[Tuple[str, Dict[str, Any]]], keep_existing: bool = False) -> int:
+        if not entries:
+            return 0
+        
+        # Upsert condicional: a comparação é feita pelo próprio SQLite
+        if keep_existing:
+            condition = "cache.expires_at <= excluded.created_at"
+        else:
+            condition = "excluded.created_at > cache.created_at"
+        
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.executemany(
+                "INSERT INTO cache (key, description, generation_time, model_used, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "description = excluded.description, generation_time = excluded.generation_time, "
+                "model_used = excluded.model_used, created_at = excluded.created_at, "
+                f"expires_at = excluded.expires_at WHERE {condition}",
+                [self._row(key, entry) for key, entry in entries]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        return cursor.rowcount
+    
+    def iter_entries(self, now: float) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        cursor = self._connection().execute(
+            "SELECT key, description, generation_time, model_used, created_at, expires_at "
+            "FROM cache WHERE expires_at > ?",
+            (now,)
+        )
+        for row in cursor:
+            yield row[0], {
+                'description': row[1],
+                'generation_time': row[2],
+                'model_used': row[3],
+                'timestamp': row[4],
+                'expires_at': row[5]
+            }
+    
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+    
+    def delete_expired(self, now: float, limit: Optional[int] = None) -> int:
+        # Usa o índice de expires_at; não varre a tabela
+        if limit is None:
+            return self._connection().execute("DELETE FROM cache WHERE expires_at <= ?", (now,)).rowcount
+        
+        # Lotes limitados mantêm curtas as transações de escrita
+        return self._connection().execute(
+            "DELETE FROM cache WHERE key IN "
+            "(SELECT key FROM cache WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)",
+            (now, limit)
+        ).rowcount
+    
+    def delete_older_than(self, timestamp: float) -> int:
+        # Usa o índice de created_at
+        return self._connection().execute("DELETE FROM cache WHERE created_at < ?", (timestamp,)).rowcount
+    
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+    
+    def size(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    
+    def disk_size(self) -> int:
+        total = 0
+        for suffix in ('', '-wal', '-shm'):
+            path = Path(f"{self.db_path}{suffix}")
+            if path.exists():
+                total += path.stat().st_size
+        return total
+    
+    def close(self):
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        
+        self._local = threading.local()
+
+def _release_connection(connections: Dict[int, sqlite3.Connection], lock: threading.Lock, conn_id: int):
+    """Fecha a conexão de uma thread encerrada (se o backend ainda não a fechou)"""
+    with lock:
+        conn = connections.pop(conn_id, None)
+    
+    if conn is not None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+class PickleCacheBackend(CacheBackend):
+    """Cache em memória salvo por inteiro em um arquivo pickle (formato antigo)
+    
+    O arquivo é regravado a cada lote recebido em `set_many`: o snapshot
+    vai para um arquivo temporário e substitui o anterior com uma troca
+    atômica, de modo que uma interrupção nunca deixa o cache corrompido.
+    
+    Heaps de `expires_at` e `timestamp` fazem o papel dos índices do
+    SQLite: a limpeza só visita as entradas removidas. Itens de heap de
+    entradas já substituídas ou removidas são descartados ao aparecer.
+    """
+    
+    name = "pickle"
+    
+    def __init__(self, cache_file: Optional[Path] = None):
+        self.cache_file = Path(cache_file or CACHE_DIR / "descriptions_cache.pkl")
+        self.cache: Dict[str, Dict[str, Any]] = load_pickle_entries(self.cache_file)
+        self._lock = threading.Lock()
+        # Flusher, varredura de expiração e importações gravam o arquivo em threads diferentes
+        self._save_lock = threading.Lock()
+        self._rebuild_heaps()
+    
+    def _rebuild_heaps(self):
+        self._expiry_heap: List[Tuple[float, str]] = [
+            (entry['expires_at'], key) for key, entry in self.cache.items()
+        ]
+        self._created_heap: List[Tuple[float, str]] = [
+            (entry['timestamp'], key) for key, entry in self.cache.items()
+        ]
+        heapq.heapify(self._expiry_heap)
+        heapq.heapify(self._created_heap)
+    
+    def _save(self):
+        """Grava o snapshot atual; gravações simultâneas são serializadas
+        
+        O snapshot é tirado já com a trava de gravação, então a última
+        gravação a terminar é sempre a do estado mais recente.
+        """
+        with self._save_lock:
+            temp_path = None
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                with self._lock:
+                    snapshot = dict(self.cache)
+                
+                # Nome único: outro processo pode estar gravando o mesmo cache
+                with tempfile.NamedTemporaryFile(dir=self.cache_file.parent, prefix=f"{self.cache_file.name}.",
+                                                 suffix=".tmp", delete=False) as f:
+                    temp_path = f.name
+                    pickle.dump(snapshot, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.cache_file)
+                temp_path = None
+                
+                logger.debug(f"Cache salvo: {len(snapshot)} entradas")
+            except Exception as e:
+                logger.error(f"Erro ao salvar cache: {e}")
+            finally:
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.unlink(temp_path)
+    
+    def get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        entry = self.cache.get(key)
+        if entry is None or entry.get('expires_at', float('inf')) <= now:
+            return None
+        return entry
+    
+    def set(self, key: str, entry: Dict[str, Any]):
+        self.set_many([(key, entry)])
+    
+    def set_many(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        if not entries:
+            return
+        
+        with self._lock:
+            self.cache.update(entries)
+            for key, entry in entries:
+                heapq.heappush(self._expiry_heap, (entry['expires_at'], key))
+                heapq.heappush(self._created_heap, (entry['timestamp'], key))
+            
+            # Substituições deixam itens obsoletos nos heaps
+            if len(self._expiry_heap) > 2 * len(self.cache) + 1000:
+                self._rebuild_heaps()
+        
+        self._save()
+    
+    def iter_entries(self, now: float) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            snapshot = list(self.cache.items())
+        
+        for key, entry in snapshot:
+            if entry.get('expires_at', float('inf')) > now:
+                yield key, entry
+    
+    def delete(self, key: str):
+        with self._lock:
+            self.cache.pop(key, None)
+    
+    def _pop_heap(self, heap: List[Tuple[float, str]], field: str, limit_value: float,
+                  inclusive: bool, limit: Optional[int]) -> int:
+        """Remove entradas enquanto o topo do heap estiver abaixo do limite"""
+        removed = 0
+        with self._lock:
+            while heap and (limit is None or removed < limit):
+                value, key = heap[0]
+                if value > limit_value or (value == limit_value and not inclusive):
+                    break
+                
+                heapq.heappop(heap)
+                entry = self.cache.get(key)
+                if entry is not None and entry[field] == value:
+                    del self.cache[key]
+                    removed += 1
+        
+        if removed:
+            self._save()
+        return removed
+    
+    def delete_expired(self, now: float, limit: Optional[int] = None) -> int:
+        return self._pop_heap(self._expiry_heap, 'expires_at', now, True, limit)
+    
+    def delete_older_than(self, timestamp: float) -> int:
+        return self._pop_heap(self._created_heap, 'timestamp', timestamp, False, None)
+    
+    def clear(self):
+        with self._lock:
+            self.cache.clear()
+            self._rebuild_heaps()
+        
+        if self.cache_file.exists():
+            self.cache_file.unlink()
+    
+    def size(self) -> int:
+        return len(self.cache)
+    
+    def disk_size(self) -> int:
+        return self.cache_file.stat().st_size if self.cache_file.exists() else 0
+    
+    def close(self):
+        self._save()
+
+def load_pickle_entries(cache_file: Path) -> Dict[str, Dict[str, Any]]:
+    """Lê um arquivo de cache pickle, completando `expires_at` das entradas antigas"""
+    if not cache_file.exists():
+        return {}
+    
+    try:
+        with open(cache_file, 'rb') as f:
+            entries = pickle.load(f)
+    except Exception as e:
+        logger.error(f"Erro ao carregar cache pickle {cache_file}: {e}")
+        return {}
+    
+    ttl = CACHE_CONFIG["ttl"]
+    for entry in entries.values():
+        entry.setdefault('expires_at', entry['timestamp'] + ttl)
+    
+    return entries
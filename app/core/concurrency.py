@@ -0,0 +1,156 @@
+"""
+Controle adaptativo de concorrência para geração em lote
+"""
+
+import threading
+from typing import Dict, Any, Optional
+
+from .logger import get_logger
+from config.settings import PERFORMANCE_CONFIG
+
+logger = get_logger(__name__)
+
+class AtomicCounter:
+    """Contador seguro para incrementos concorrentes de várias threads"""
+    
+    def __init__(self, value: int = 0):
+        self._value = value
+        self._lock = threading.Lock()
+    
+    def increment(self, amount: int = 1) -> int:
+        with self._lock:
+            self._value += amount
+            return self._value
+    
+    def reset(self):
+        with self._lock:
+            self._value = 0
+    
+    @property
+    def value(self) -> int:
+        return self._value
+
+class AdaptiveConcurrencyLimiter:
+    """Limite de requisições simultâneas ajustado por AIMD
+    
+    O limite sobe uma unidade a cada `limit` respostas dentro da latência
+    esperada (aumento aditivo) e cai pela metade em timeouts, erros ou
+    picos de latência (redução multiplicativa).
+    """
+    
+    def __init__(self,
+                 initial: Optional[int] = None,
+                 min_limit: Optional[int] = None,
+                 max_limit: Optional[int] = None,
+                 latency_tolerance: Optional[float] = None,
+                 timeout: Optional[float] = None,
+                 backoff: float = 0.5):
+        self.min_limit = min_limit or PERFORMANCE_CONFIG["adaptive_min_workers"]
+        self.max_limit = max_limit or PERFORMANCE_CONFIG["adaptive_max_workers"]
+        self.limit = max(self.min_limit, min(initial or self.min_limit, self.max_limit))
+        self.latency_tolerance = latency_tolerance or PERFORMANCE_CONFIG["latency_tolerance"]
+        self.timeout = timeout
+        self.backoff = backoff
+        
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self.peak_in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self.increases = 0
+        self.decreases = 0
+        
+        self._successes = 0
+        self._completed = 0
+        self._drain_until = 0
+        self._cond = threading.Condition()
+    
+    def set_max_limit(self, max_limit: int):
+        """Troca o teto (ex.: servidores entrando ou saindo do pool)
+        
+        O limite atual é rebaixado se passar do novo teto; requisições já
+        em andamento terminam, mas novas só entram abaixo dele.
+        """
+        with self._cond:
+            self.max_limit = max_limit
+            self.limit = max(self.min_limit, min(self.limit, self.max_limit))
+    
+    def acquire(self):
+        """Aguarda até haver vaga dentro do limite atual"""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+    
+    def release(self, latency: float, success: bool, sample: bool = True):
+        """Libera a vaga e ajusta o limite com base no resultado
+        
+        `sample=False` libera sem ajustar (ex.: resultado vindo do cache).
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self._completed += 1
+            
+            if sample:
+                self._update(latency, success)
+            
+            self._cond.notify_all()
+    
+    def _is_congested(self, latency: float, success: bool) -> bool:
+        """Indica se a resposta sinaliza sobrecarga do servidor"""
+        if not success:
+            return True
+        
+        # Perto do timeout, a próxima requisição provavelmente falharia
+        if self.timeout and latency >= self.timeout * 0.8:
+            return True
+        
+        return (self.baseline_latency is not None and
+                latency > self.baseline_latency * self.latency_tolerance)
+    
+    def _update(self, latency: float, success: bool):
+        if self._is_congested(latency, success):
+            # Requisições enviadas antes da última redução não contam de novo
+            if self._completed <= self._drain_until:
+                return
+            
+            new_limit = max(self.min_limit, int(self.limit * self.backoff))
+            if new_limit < self.limit:
+                logger.info(f"Concorrência reduzida: {self.limit} -> {new_limit} "
+                            f"(latência {latency:.2f}s, sucesso={success})")
+                self.limit = new_limit
+                self.decreases += 1
+            
+            self._successes = 0
+            self._drain_until = self._completed + self.in_flight
+            return
+        
+        # Latência base acompanha o mínimo recente, relaxando aos poucos
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+        else:
+            self.baseline_latency = min(latency, self.baseline_latency * 1.05)
+        
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self.peak_limit = max(self.peak_limit, self.limit)
+            self.increases += 1
+            self._successes = 0
+            logger.debug(f"Concorrência aumentada para {self.limit}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estado atual do controlador"""
+        with self._cond:
+            return {
+                'current_concurrency': self.limit,
+                'peak_concurrency': self.peak_limit,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'min_concurrency': self.min_limit,
+                'max_concurrency': self.max_limit,
+                'baseline_latency': self.baseline_latency,
+                'increases': self.increases,
+                'decreases': self.decreases
+            }
@@ -0,0 +1,71 @@
+"""
+Remoção incremental das entradas expiradas do cache
+"""
+
+import threading
+import time
+from typing import Dict, Any
+
+from .cache_backends import CacheBackend
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class ExpirySweeper:
+    """Remove entradas expiradas em segundo plano, em lotes pequenos
+    
+    A primeira varredura roda logo após a inicialização, sem atrasar a
+    abertura do cache; as seguintes, a cada `interval` segundos. Cada
+    lote remove no máximo `batch_size` entradas pelo índice de
+    `expires_at`, então o custo acompanha só o que expirou.
+    """
+    
+    def __init__(self, backend: CacheBackend, interval: float, batch_size: int):
+        self.backend = backend
+        self.interval = interval
+        self.batch_size = batch_size
+        
+        self.sweeps = 0
+        self.removed = 0
+        
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cache-expiry", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        delay = 0.0
+        while not self._stop.wait(delay):
+            self.sweep()
+            delay = self.interval
+    
+    def sweep(self) -> int:
+        """Remove as entradas expiradas até agora; retorna quantas"""
+        total = 0
+        now = time.time()
+        
+        try:
+            while not self._stop.is_set():
+                removed = self.backend.delete_expired(now, limit=self.batch_size)
+                total += removed
+                if removed < self.batch_size:
+                    break
+        except Exception as e:
+            logger.error(f"Erro ao remover entradas expiradas do cache: {e}")
+        
+        self.sweeps += 1
+        self.removed += total
+        if total:
+            logger.info(f"Removidas {total} entradas expiradas do cache")
+        return total
+    
+    def stop(self):
+        """Interrompe a varredura em andamento e encerra a thread"""
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'expiry_sweeps': self.sweeps,
+            'expired_removed': self.removed
+        }
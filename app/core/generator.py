@@ -3,16 +3,29 @@ Gerador principal de descrições
 """
 
 import time
+import asyncio
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Callable, Optional
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import List, Dict, Callable, Optional, Iterable, Iterator, Tuple
 import pandas as pd
 
 from .models import Product, GenerationResult, GenerationConfig
 from .ai_client import AIClient
+from .async_ai_client import AsyncAIClient
 from .cache import CacheManager
+from .concurrency import AdaptiveConcurrencyLimiter
+from .model_manager import ModelResidencyManager
+from .quality import check_description
+from .token_budget import TokenBudget
+from .single_flight import SingleFlight
+from .variants import cluster_variants, fill_slots
+from .jobs import BatchJournal, cleanup_jobs
+from .batch import ProductBatch, SPREADSHEET_COLUMNS
 from .logger import get_logger
 from app.utils.prompt_manager import PromptManager
+from config.settings import GENERATION_CONFIG, PERFORMANCE_CONFIG, OLLAMA_CONFIG, AVAILABLE_MODELS
 
 logger = get_logger(__name__)
 
@@ -23,53 +36,89 @@ class DescriptionGenerator:
         self.ai_client = AIClient()
         self.cache_manager = CacheManager()
         self.prompt_manager = PromptManager()
-        self.config = GenerationConfig()
+        self.config = GenerationConfig(
+            adaptive_concurrency=GENERATION_CONFIG["adaptive_concurrency"],
+            keep_alive=OLLAMA_CONFIG["keep_alive"],
+            pack_size=GENERATION_CONFIG["pack_size"],
+            cascade=GENERATION_CONFIG["cascade"],
+            adaptive_tokens=GENERATION_CONFIG["adaptive_tokens"],
+            stop_sequences=list(GENERATION_CONFIG["stop_sequences"]),
+            variant_clustering=GENERATION_CONFIG["variant_clustering"],
+            variant_threshold=GENERATION_CONFIG["variant_threshold"]
+        )
+        self.model_manager = ModelResidencyManager(self.ai_client, self.config.keep_alive)
+        self.token_budget = TokenBudget()
+        
+        # Produtos idênticos em geração simultânea compartilham uma única chamada
+        self.single_flight = SingleFlight()
+        
+        # Mantido entre lotes para preservar o limite aprendido
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter()
+        
+        # Contadores dos prompts agrupados (vários produtos por chamada)
+        self.packed_calls = 0
+        self.packed_items = 0
+        self.packed_fallbacks = 0
+        
+        # Custo de avaliação do prompt, para acompanhar o reaproveitamento do prefixo
+        self.prompt_eval_calls = 0
+        self.prompt_eval_tokens = 0
+        self.prompt_eval_time = 0.0
+        
+        # Modo cascata: resultados por modelo e reenvios ao modelo seguinte
+        self.tier_results: Dict[str, int] = {}
+        self.cascade_escalations = 0
+        self._stats_lock = threading.Lock()
+        
+        # Famílias de variantes: descrições adaptadas em vez de geradas
+        self.variant_families = 0
+        self.variant_fills = 0
+        self.variant_fallbacks = 0
+        self.last_variant_report: Dict[str, int] = {}
         
-    def generate_single(self, product: Product, use_cache: bool = True) -> GenerationResult:
-        """Gera descrição para um único produto"""
+        # Último lote de planilha: trabalho no diário e linhas retomadas
+        self.last_job: Dict[str, object] = {}
+    
+    def generate_single(self,
+                        product: Product,
+                        use_cache: bool = True,
+                        on_token: Optional[Callable[[str], None]] = None,
+                        cache_checked: bool = False) -> GenerationResult:
+        """Gera descrição para um único produto
+        
+        Se `on_token` for informado, a geração usa streaming e cada trecho
+        de texto é repassado ao callback assim que chega do Ollama. Com
+        `config.cascade`, sem streaming, a geração passa pela cascata de
+        modelos (ver `_generate_cascade`). `cache_checked` indica que o
+        disco já foi consultado (ver `iter_generate`).
+        """
         start_time = time.time()
+        self._sync_cache_keys()
         
         try:
             # Verificar cache primeiro
             if use_cache:
-                cached_result = self.cache_manager.get(product)
+                cached_result = self.cache_manager.get(product, disk=not cache_checked)
                 if cached_result:
                     logger.debug(f"Cache hit para produto: {product.nome}")
+                    if on_token:
+                        on_token(cached_result.description)
                     return cached_result
             
-            # Gerar prompt
-            prompt = self.prompt_manager.format_prompt(product)
+            # Produto idêntico já em geração: aguardar o resultado em vez de chamar o Ollama
+            result, shared = self.single_flight.do(
+                self.cache_manager.key_for(product),
+                lambda: self._generate_uncached(product, use_cache, start_time, on_token)
+            )
             
-            # Gerar descrição
-            raw_description = self.ai_client.generate(prompt, self.config)
+            if shared:
+                logger.debug(f"Geração compartilhada para produto: {product.nome}")
+                if on_token and result.success:
+                    on_token(result.description)
+                return self._coalesced(product, result)
             
-            if raw_description:
-                # Processar para formato Excel com quebras de linha
-                description = self.prompt_manager.process_response_for_excel(raw_description)
-                
-                generation_time = time.time() - start_time
-                result = GenerationResult(
-                    product=product,
-                    description=description,
-                    success=True,
-                    generation_time=generation_time,
-                    model_used=self.config.model_id
-                )
-                
-                # Salvar no cache
-                if use_cache:
-                    self.cache_manager.set(product, result)
-                
-                logger.info(f"Descrição gerada para '{product.nome}' em {generation_time:.2f}s")
-                return result
-            else:
-                return GenerationResult(
-                    product=product,
-                    description="",
-                    success=False,
-                    error_message="Falha na geração da descrição"
-                )
-                
+            return result
+        
         except Exception as e:
             logger.error(f"Erro ao gerar descrição para '{product.nome}': {e}")
             return GenerationResult(
@@ -79,104 +128,858 @@ class DescriptionGenerator:
                 error_message=str(e)
             )
     
-    def generate_batch(self, 
-                      products: List[Product], 
-                      progress_callback: Optional[Callable[[int, int], None]] = None,
-                      max_workers: Optional[int] = None) -> List[GenerationResult]:
-        """Gera descrições em lote com processamento paralelo"""
+    def _sync_cache_keys(self):
+        """Mantém as chaves de cache alinhadas ao modelo e aos prompts atuais"""
+        self.cache_manager.configure_keys(
+            model_id=self.config.model_id,
+            temperature=self.config.temperature,
+            template_hash=self.prompt_manager.template_hash(),
+            template_fields=self.prompt_manager.template_fields()
+        )
+    
+    def _generate_uncached(self,
+                           product: Product,
+                           use_cache: bool,
+                           start_time: float,
+                           on_token: Optional[Callable[[str], None]] = None,
+                           first_tier: int = 0) -> GenerationResult:
+        """Chama o modelo para o produto, sem consultar cache nem single-flight
+        
+        No modo cascata, `first_tier` pula os modelos já tentados.
+        """
+        # Gerar prompt: instruções fixas no system, dados do produto no prompt
+        system, prompt = self.prompt_manager.format_prompt_parts(product)
+        
+        if self.config.cascade and not on_token:
+            return self._generate_cascade(product, system, prompt, start_time, use_cache, first_tier)
+        
+        # Gerar descrição
+        config = self._config_for(product)
+        stats = {}
+        if on_token:
+            raw_description = self._generate_streaming(prompt, on_token, stats, system, config)
+        else:
+            raw_description = self._generate_within_budget(product, prompt, config, stats, system)
+        
+        return self._build_result(product, raw_description, start_time, use_cache, stats)
+    
+    @staticmethod
+    def _coalesced(product: Product, result: Optional[GenerationResult]) -> GenerationResult:
+        """Resultado de outra geração idêntica, associado ao produto do chamador"""
+        if result is None:
+            return GenerationResult(
+                product=product,
+                description="",
+                success=False,
+                error_message="Falha na geração da descrição"
+            )
+        return replace(result, product=product, coalesced=True)
+    
+    def _build_result(self,
+                      product: Product,
+                      raw_description: Optional[str],
+                      start_time: float,
+                      use_cache: bool,
+                      stats: Optional[dict] = None,
+                      generation_time: Optional[float] = None,
+                      model_id: Optional[str] = None,
+                      quality_issues: Optional[List[str]] = None) -> GenerationResult:
+        """Monta o resultado a partir da resposta bruta do modelo"""
+        stats = stats or {}
+        model_id = model_id or self.config.model_id
+        self.model_manager.record_load(model_id, stats.get('load_duration'))
+        self._record_prompt_eval(stats)
+        
+        if stats.get('eval_count'):
+            self.token_budget.record(product, stats['eval_count'], stats.get('done_reason') == 'length')
+        
+        if raw_description:
+            # Processar para formato Excel com quebras de linha
+            description = self.prompt_manager.process_response_for_excel(raw_description)
+            
+            if generation_time is None:
+                generation_time = time.time() - start_time
+            result = GenerationResult(
+                product=product,
+                description=description,
+                success=True,
+                generation_time=generation_time,
+                model_used=model_id,
+                time_to_first_token=stats.get('time_to_first_token'),
+                tokens_per_second=stats.get('tokens_per_second'),
+                load_time=stats.get('load_duration'),
+                prompt_eval_count=stats.get('prompt_eval_count'),
+                prompt_eval_time=stats.get('prompt_eval_duration'),
+                quality_issues=quality_issues
+            )
+            
+            # Salvar no cache (com problemas de qualidade, o TTL é menor); saída cortada não é guardada
+            if stats.get('done_reason') == 'length':
+                logger.warning(f"Descrição de '{product.nome}' cortada no limite de tokens; não será guardada no cache")
+            elif use_cache:
+                self.cache_manager.set(product, result)
+            
+            logger.info(f"Descrição gerada para '{product.nome}' em {generation_time:.2f}s")
+            return result
+        else:
+            return GenerationResult(
+                product=product,
+                description="",
+                success=False,
+                error_message="Falha na geração da descrição"
+            )
+    
+    def _generate_within_budget(self,
+                                product: Product,
+                                prompt: str,
+                                config: GenerationConfig,
+                                stats: dict,
+                                system: Optional[str] = None) -> Optional[str]:
+        """Gera com o orçamento do produto; saída cortada abaixo do teto é refeita uma vez no teto"""
+        raw_description = self.ai_client.generate(prompt, config, stats, system=system)
+        
+        if stats.get('done_reason') != 'length' or config.max_tokens >= self.config.max_tokens:
+            return raw_description
+        
+        # Registrar o corte para o orçamento da categoria crescer
+        self._record_prompt_eval(stats)
+        self.token_budget.record(product, stats.get('eval_count'), truncated=True)
+        logger.info(f"Saída de '{product.nome}' cortada em {config.max_tokens} tokens; "
+                    f"gerando de novo com {self.config.max_tokens}")
+        
+        stats.clear()
+        return self.ai_client.generate(prompt, replace(config, max_tokens=self.config.max_tokens),
+                                       stats, system=system)
+    
+    def _config_for(self, product: Product) -> GenerationConfig:
+        """Configuração da chamada com num_predict dimensionado para o produto"""
+        if not self.config.adaptive_tokens:
+            return self.config
+        
+        return replace(self.config, max_tokens=self.token_budget.budget(product, self.config.max_tokens))
+    
+    def cascade_models(self) -> List[str]:
+        """Modelos da cascata instalados, do mais rápido ao mais forte
+        
+        Usa `CASCADE_MODELS` quando definido; senão, o `tier` de
+        `AVAILABLE_MODELS`.
+        """
+        models = GENERATION_CONFIG["cascade_models"] or sorted(
+            (model_id for model_id, info in AVAILABLE_MODELS.items() if 'tier' in info),
+            key=lambda model_id: AVAILABLE_MODELS[model_id]['tier']
+        )
+        
+        self.ai_client.pool.refresh_if_stale()
+        installed = self.ai_client.pool.installed_models()
+        available = [m for m in models if m in installed or f"{m}:latest" in installed]
+        
+        return available or [self.config.model_id]
+    
+    def _generate_cascade(self,
+                          product: Product,
+                          system: str,
+                          prompt: str,
+                          start_time: float,
+                          use_cache: bool,
+                          first_tier: int = 0) -> GenerationResult:
+        """Gera com o modelo mais rápido e só escala quando a verificação falha
+        
+        Começa em `first_tier` (limitado ao último modelo) quando os
+        anteriores já foram tentados. O último modelo da cascata tem a
+        palavra final: sua resposta é aceita mesmo reprovada, com os
+        problemas registrados no resultado.
+        """
+        models = self.cascade_models()
+        config = self._config_for(product)
+        first_tier = min(first_tier, len(models) - 1)
+        
+        for tier, model_id in enumerate(models[first_tier:], start=first_tier):
+            stats = {}
+            raw_description = self._generate_within_budget(product, prompt, replace(config, model_id=model_id),
+                                                           stats, system)
+            report = check_description(raw_description, product)
+            last_tier = tier == len(models) - 1
+            
+            if report.passed or (last_tier and raw_description):
+                result = self._build_result(product, raw_description, start_time, use_cache,
+                                            stats, model_id=model_id, quality_issues=report.issues or None)
+                result.tier = tier
+                
+                with self._stats_lock:
+                    self.tier_results[model_id] = self.tier_results.get(model_id, 0) + 1
+                return result
+            
+            if not last_tier:
+                logger.info(f"Escalando '{product.nome}' de {model_id} para {models[tier + 1]}: "
+                            f"{', '.join(report.issues)}")
+                with self._stats_lock:
+                    self.cascade_escalations += 1
+        
+        return self._build_result(product, None, start_time, use_cache)
+    
+    def _record_prompt_eval(self, stats: dict):
+        """Acumula tokens e tempo de avaliação do prompt reportados pelo Ollama"""
+        if not stats.get('done'):
+            return
+        
+        with self._stats_lock:
+            self.prompt_eval_calls += 1
+            self.prompt_eval_tokens += stats.get('prompt_eval_count') or 0
+            self.prompt_eval_time += stats.get('prompt_eval_duration') or 0.0
+    
+    def _generate_streaming(self,
+                            prompt: str,
+                            on_token: Callable[[str], None],
+                            stats: dict,
+                            system: Optional[str] = None,
+                            config: Optional[GenerationConfig] = None) -> Optional[str]:
+        """Gera em modo streaming repassando os tokens ao callback"""
+        tokens = []
+        
+        for token in self.ai_client.generate_stream(prompt, config or self.config, stats, system):
+            tokens.append(token)
+            on_token(token)
+        
+        # Stream interrompido antes do fim não gera descrição parcial
+        if not stats.get('done'):
+            return None
+        
+        return ''.join(tokens).strip()
+    
+    def generate_packed(self,
+                        products: List[Product],
+                        use_cache: bool = True,
+                        cache_checked: bool = False) -> List[GenerationResult]:
+        """Gera descrições de vários produtos em uma única chamada ao modelo
+        
+        O modelo responde um JSON indexado pela posição de cada produto.
+        Itens ausentes ou inválidos na resposta são gerados individualmente.
+        No modo cascata, o grupo usa o modelo mais rápido e os itens
+        reprovados na verificação de qualidade seguem pela cascata.
+        """
+        self._sync_cache_keys()
+        results: List[Optional[GenerationResult]] = [None] * len(products)
+        pending = []
+        
+        for index, product in enumerate(products):
+            cached_result = self.cache_manager.get(product, disk=not cache_checked) if use_cache else None
+            if cached_result:
+                logger.debug(f"Cache hit para produto: {product.nome}")
+                results[index] = cached_result
+            else:
+                pending.append(index)
+        
+        # Itens já em geração (em outra chamada ou repetidos no grupo) aguardam o líder
+        keys = {}
+        leaders = []
+        waiting = []
+        for index in pending:
+            key = self.cache_manager.key_for(products[index])
+            future, leader = self.single_flight.begin(key)
+            if leader:
+                keys[index] = key
+                leaders.append(index)
+            else:
+                waiting.append((index, future))
+        
+        try:
+            if len(leaders) == 1:
+                results[leaders[0]] = self._generate_uncached(products[leaders[0]], use_cache, time.time())
+            elif leaders:
+                self._generate_pack(products, leaders, results, use_cache)
+        finally:
+            # Publicar antes de esperar: evita que dois grupos aguardem um ao outro
+            for index in leaders:
+                self.single_flight.finish(keys[index], results[index])
+        
+        for index, future in waiting:
+            results[index] = self._coalesced(products[index], future.result())
+        
+        return results
+    
+    def _generate_pack(self,
+                       products: List[Product],
+                       pending: List[int],
+                       results: List[Optional[GenerationResult]],
+                       use_cache: bool):
+        """Gera em uma única chamada os itens `pending`, preenchendo `results`"""
+        start_time = time.time()
+        parsed = {}
+        stats = {}
+        # Paradas de texto corrido cortariam o JSON
+        config = replace(self.config, stop_sequences=[])
+        if self.config.cascade:
+            config = replace(config, model_id=self.cascade_models()[0])
+        
+        if self.config.adaptive_tokens:
+            # Orçamento de cada item mais a estrutura do JSON
+            max_tokens = sum(self._config_for(products[i]).max_tokens + 16 for i in pending)
+        else:
+            max_tokens = self.config.max_tokens * len(pending)
+        
+        try:
+            prompt = self.prompt_manager.format_packed_prompt([products[i] for i in pending])
+            raw_response = self.ai_client.generate(
+                prompt, config, stats,
+                response_format="json",
+                max_tokens=max_tokens,
+                system=self.prompt_manager.system_prefix()
+            )
+            if raw_response:
+                parsed = self.prompt_manager.parse_packed_response(raw_response, len(pending))
+        except Exception as e:
+            logger.error(f"Erro na geração agrupada de {len(pending)} produtos: {e}")
+        
+        # Reprovados na verificação seguem a cascata a partir do próximo modelo
+        rejected = set()
+        if self.config.cascade:
+            rejected = {position for position, text in parsed.items()
+                        if not check_description(text, products[pending[position - 1]]).passed}
+            parsed = {position: text for position, text in parsed.items() if position not in rejected}
+        
+        self.model_manager.record_load(config.model_id, stats.get('load_duration'))
+        self._record_prompt_eval(stats)
+        # Métricas da chamada são registradas uma vez, não por item
+        item_stats = {key: value for key, value in stats.items()
+                      if key not in ('done', 'done_reason', 'load_duration', 'prompt_eval_count',
+                                     'prompt_eval_duration', 'eval_count')}
+        
+        # Tempo da chamada dividido entre os produtos atendidos por ela
+        generation_time = (time.time() - start_time) / max(1, len(parsed))
+        
+        fallbacks = []
+        for position, index in enumerate(pending, start=1):
+            if position in parsed:
+                results[index] = self._build_result(products[index], parsed[position], start_time,
+                                                    use_cache, item_stats, generation_time,
+                                                    model_id=config.model_id)
+                if self.config.cascade:
+                    results[index].tier = 0
+            else:
+                fallbacks.append((index, 1 if position in rejected else 0))
+        
+        with self._stats_lock:
+            self.packed_calls += 1
+            self.packed_items += len(parsed)
+            self.packed_fallbacks += len(fallbacks)
+            self.cascade_escalations += len(rejected)
+            if self.config.cascade and parsed:
+                self.tier_results[config.model_id] = self.tier_results.get(config.model_id, 0) + len(parsed)
+        
+        if fallbacks:
+            logger.warning(f"Resposta agrupada sem {len(fallbacks)} de {len(pending)} itens; "
+                           f"gerando individualmente")
+        
+        for index, first_tier in fallbacks:
+            results[index] = self._generate_uncached(products[index], use_cache, time.time(),
+                                                     first_tier=first_tier)
+    
+    def _generate_limited(self, group: List[Product], cache_checked: bool = False) -> List[GenerationResult]:
+        """Gera um grupo de produtos respeitando o limite adaptativo de concorrência"""
+        limiter = self.concurrency_limiter
+        limiter.acquire()
+        
+        start_time = time.time()
+        results = None
+        try:
+            results = self._generate_group(group, cache_checked)
+            return results
+        finally:
+            success = results is not None and all(r.success for r in results)
+            # Acertos de cache e gerações compartilhadas não dizem nada sobre a carga do Ollama
+            sample = results is None or not all(r.cached or r.coalesced for r in results)
+            limiter.release(time.time() - start_time, success, sample)
+    
+    def _generate_group(self, group: List[Product], cache_checked: bool = False) -> List[GenerationResult]:
+        """Gera um grupo de produtos: agrupado em um prompt ou individualmente"""
+        if len(group) > 1:
+            return self.generate_packed(group, cache_checked=cache_checked)
+        return [self.generate_single(group[0], cache_checked=cache_checked)]
+    
+    def _batch_task(self, max_workers: Optional[int], adaptive: Optional[bool]):
+        """Função executada por grupo no pool e número de workers do lote"""
+        if adaptive is None:
+            adaptive = self.config.adaptive_concurrency
+        
+        # Limites valem por servidor; o lote escala com o pool
+        self.ai_client.pool.refresh_if_stale()
+        backends = max(1, self.ai_client.pool.healthy_count())
+        
+        if adaptive:
+            limiter = self.concurrency_limiter
+            limiter.set_max_limit(PERFORMANCE_CONFIG["adaptive_max_workers"] * backends)
+            limiter.timeout = self.config.timeout
+            if max_workers is None:
+                max_workers = limiter.max_limit
+            return self._generate_limited, max_workers, adaptive
         
         if max_workers is None:
-            max_workers = self.config.max_workers
+            max_workers = self.config.max_workers * backends
+        return self._generate_group, max_workers, adaptive
+    
+    def iter_generate(self,
+                      products: Iterable[Product],
+                      progress_callback: Optional[Callable[[int, int], None]] = None,
+                      max_workers: Optional[int] = None,
+                      adaptive: Optional[bool] = None,
+                      keys: Optional[Iterable[str]] = None,
+                      total: Optional[int] = None) -> Iterator[GenerationResult]:
+        """Gera descrições em paralelo, entregando os resultados na ordem de entrada
         
-        results = []
-        completed = 0
-        total = len(products)
+        Os produtos são lidos sob demanda em blocos de
+        `PERFORMANCE_CONFIG["batch_size"]`; cada bloco é consultado no
+        cache de uma vez (`keys` pode trazer as chaves já calculadas) e,
+        se ativado, agrupado em famílias de variantes. No máximo
+        `2 * max_workers` grupos ficam em execução e os resultados
+        prontos aguardam apenas até o anterior terminar, então a memória
+        não cresce com o tamanho da planilha.
         
-        logger.info(f"Iniciando geração em lote: {total} produtos, {max_workers} workers")
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submeter todas as tarefas
-            future_to_product = {
-                executor.submit(self.generate_single, product): product 
-                for product in products
-            }
-            
-            # Processar resultados conforme completam
-            for future in as_completed(future_to_product):
-                try:
-                    result = future.result()
-                    results.append(result)
-                    completed += 1
-                    
-                    # Callback de progresso
-                    if progress_callback:
-                        progress_callback(completed, total)
-                        
-                except Exception as e:
-                    product = future_to_product[future]
-                    logger.error(f"Erro no processamento de '{product.nome}': {e}")
-                    
-                    # Adicionar resultado de erro
-                    error_result = GenerationResult(
+        No modo adaptativo, `max_workers` é apenas o teto; a concorrência
+        efetiva é ajustada pelo `AdaptiveConcurrencyLimiter`. Com
+        `config.pack_size > 1`, cada chamada ao modelo descreve um grupo
+        de produtos (ver `generate_packed`).
+        """
+        task, max_workers, adaptive = self._batch_task(max_workers, adaptive)
+        
+        if total is None:
+            total = len(products) if hasattr(products, '__len__') else 0
+        
+        pack_size = max(1, self.config.pack_size)
+        chunk_size = max(1, PERFORMANCE_CONFIG["batch_size"])
+        window = 2 * max_workers
+        # Resultados prontos aguardando um anterior: limitado para não acumular acertos de cache
+        buffer_limit = window * pack_size + 2 * chunk_size
+        
+        logger.info(f"Iniciando geração em lote: {total or '?'} produtos, {max_workers} workers"
+                    f"{' (adaptativo)' if adaptive else ''}"
+                    f"{f', {pack_size} produtos por chamada' if pack_size > 1 else ''}")
+        
+        ready: Dict[int, GenerationResult] = {}
+        in_flight: Dict[Future, List[Tuple[int, Product]]] = {}
+        families: Dict[int, List[Tuple[int, Product]]] = {}
+        variant_report = {'families': 0, 'variants': 0, 'filled': 0, 'fallbacks': 0}
+        counts = {'completed': 0, 'successful': 0, 'next': 0}
+        
+        product_iter = iter(products)
+        key_iter = iter(keys) if keys is not None else None
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Faltas do bloco já lidas do disco: o worker consulta só a memória
+        cache_checked = self.config.use_cache
+        
+        def submit(items: List[Tuple[int, Product]]):
+            for i in range(0, len(items), pack_size):
+                group = items[i:i + pack_size]
+                in_flight[executor.submit(task, [product for _, product in group], cache_checked)] = group
+        
+        def finish(position: int, result: GenerationResult):
+            ready[position] = result
+            counts['completed'] += 1
+            counts['successful'] += result.success
+        
+        def collect(future: Future):
+            group = in_flight.pop(future)
+            try:
+                group_results = future.result()
+            except Exception as e:
+                logger.error(f"Erro no processamento de '{group[0][1].nome}': {e}")
+                
+                # Adicionar resultado de erro
+                group_results = [
+                    GenerationResult(
                         product=product,
                         description="",
                         success=False,
                         error_message=str(e)
                     )
-                    results.append(error_result)
-                    completed += 1
+                    for _, product in group
+                ]
+            
+            for (position, product), result in zip(group, group_results):
+                finish(position, result)
+                
+                # Representante pronto: adaptar a descrição para as variantes da família
+                variants = families.pop(position, None)
+                if variants:
+                    fallback = []
+                    for (variant_position, variant), filled in zip(
+                            variants, self._fill_family(product, result, [v for _, v in variants])):
+                        if filled is None:
+                            fallback.append((variant_position, variant))
+                        else:
+                            finish(variant_position, filled)
+                    
+                    variant_report['filled'] += len(variants) - len(fallback)
+                    variant_report['fallbacks'] += len(fallback)
                     
-                    if progress_callback:
-                        progress_callback(completed, total)
+                    # Variantes que não puderam ser adaptadas são geradas normalmente
+                    submit(fallback)
         
-        # Ordenar resultados pela ordem original
-        product_order = {id(p): i for i, p in enumerate(products)}
-        results.sort(key=lambda r: product_order.get(id(r.product), float('inf')))
+        def wait_some():
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                collect(future)
+            
+            # Callback de progresso
+            if progress_callback:
+                progress_callback(counts['completed'], total)
         
-        successful = sum(1 for r in results if r.success)
-        logger.info(f"Geração em lote concluída: {successful}/{total} sucessos")
+        def drain() -> Iterator[GenerationResult]:
+            while counts['next'] in ready:
+                yield ready.pop(counts['next'])
+                counts['next'] += 1
+        
+        try:
+            position = 0
+            while True:
+                chunk = list(islice(product_iter, chunk_size))
+                if not chunk:
+                    break
+                chunk_keys = list(islice(key_iter, len(chunk))) if key_iter is not None else None
+                items = list(enumerate(chunk, start=position))
+                position += len(chunk)
+                
+                # Acertos de cache resolvidos em bloco, sem passar pelos workers
+                if self.config.use_cache:
+                    self._sync_cache_keys()
+                    cached = self.cache_manager.get_many(chunk, chunk_keys, count_misses=False)
+                    for (item_position, _), result in zip(items, cached):
+                        if result is not None:
+                            finish(item_position, result)
+                    items = [item for item, result in zip(items, cached) if result is None]
+                    
+                    if len(items) < len(chunk) and progress_callback:
+                        progress_callback(counts['completed'], total)
+                
+                # Variantes de um mesmo produto: só o representante de cada família é gerado
+                if self.config.variant_clustering and len(items) > 1:
+                    clusters = cluster_variants([product for _, product in items], self.config.variant_threshold)
+                    representatives = []
+                    for cluster in clusters:
+                        representatives.append(items[cluster.representative])
+                        if cluster.variants:
+                            families[items[cluster.representative][0]] = [items[i] for i in cluster.variants]
+                            variant_report['families'] += 1
+                            variant_report['variants'] += len(cluster.variants)
+                    items = representatives
+                
+                for i in range(0, len(items), pack_size):
+                    submit(items[i:i + pack_size])
+                    
+                    while len(in_flight) >= window:
+                        wait_some()
+                        yield from drain()
+                
+                yield from drain()
+                
+                # Saída parada em um item lento: esperar antes de ler mais
+                while in_flight and len(ready) >= buffer_limit:
+                    wait_some()
+                    yield from drain()
+            
+            while in_flight:
+                wait_some()
+                yield from drain()
+            
+            yield from drain()
+        finally:
+            # Iteração interrompida: descartar o que ainda não começou
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=True)
+            self.token_budget.save()
+            
+            if variant_report['families']:
+                self.last_variant_report = {**variant_report, 'calls_saved': variant_report['filled']}
+                logger.info(f"Variantes: {variant_report['variants']} produtos em "
+                            f"{variant_report['families']} famílias; {variant_report['filled']} gerações "
+                            f"evitadas, {variant_report['fallbacks']} geradas individualmente")
+            
+            logger.info(f"Geração em lote concluída: {counts['successful']}/{counts['completed']} sucessos")
+    
+    def generate_batch(self, 
+                      products: List[Product], 
+                      progress_callback: Optional[Callable[[int, int], None]] = None,
+                      max_workers: Optional[int] = None,
+                      adaptive: Optional[bool] = None,
+                      keys: Optional[List[str]] = None) -> List[GenerationResult]:
+        """Gera descrições em lote com processamento paralelo
+        
+        Resultados na mesma ordem de `products` (ver `iter_generate`).
+        """
+        return list(self.iter_generate(products, progress_callback, max_workers, adaptive, keys))
+    
+    def _fill_family(self,
+                     representative: Product,
+                     rep_result: GenerationResult,
+                     variants: List[Product]) -> List[Optional[GenerationResult]]:
+        """Adapta a descrição do representante para cada variante da família
+        
+        None nas variantes que precisam ser geradas normalmente
+        (representante com erro ou lacunas que não puderam ser preenchidas).
+        """
+        results = []
+        for variant in variants:
+            text = fill_slots(rep_result.description, representative, variant) if rep_result.success else None
+            if text is None:
+                results.append(None)
+                continue
+            
+            result = GenerationResult(
+                product=variant,
+                description=text,
+                success=True,
+                generation_time=0.0,
+                model_used=rep_result.model_used,
+                quality_issues=rep_result.quality_issues,
+                variant_of=representative.nome
+            )
+            if self.config.use_cache:
+                self.cache_manager.set(variant, result)
+            results.append(result)
+        
+        filled = sum(1 for result in results if result is not None)
+        with self._stats_lock:
+            self.variant_families += 1
+            self.variant_fills += filled
+            self.variant_fallbacks += len(results) - filled
         
         return results
     
+    async def generate_single_async(self,
+                                    client: AsyncAIClient,
+                                    product: Product,
+                                    use_cache: bool = True) -> GenerationResult:
+        """Gera descrição para um único produto usando o cliente assíncrono
+        
+        Leitura do cache e registro do resultado (cache e histórico de
+        tokens) fazem E/S de disco; rodam fora do event loop.
+        """
+        start_time = time.time()
+        self._sync_cache_keys()
+        loop = asyncio.get_running_loop()
+        
+        try:
+            # Verificar cache primeiro
+            if use_cache:
+                cached_result = await loop.run_in_executor(None, self.cache_manager.get, product)
+                if cached_result:
+                    logger.debug(f"Cache hit para produto: {product.nome}")
+                    return cached_result
+            
+            key = self.cache_manager.key_for(product)
+            future, leader = self.single_flight.begin(key)
+            if not leader:
+                return self._coalesced(product, await asyncio.wrap_future(future))
+            
+            try:
+                system, prompt = self.prompt_manager.format_prompt_parts(product)
+                stats = {}
+                raw_description = await client.generate(prompt, self._config_for(product), stats, system=system)
+                
+                result = await loop.run_in_executor(None, self._build_result, product,
+                                                    raw_description, start_time, use_cache, stats)
+            except BaseException as e:
+                self.single_flight.finish(key, error=e)
+                raise
+            
+            self.single_flight.finish(key, result)
+            return result
+        
+        except Exception as e:
+            logger.error(f"Erro ao gerar descrição para '{product.nome}': {e}")
+            return GenerationResult(
+                product=product,
+                description="",
+                success=False,
+                error_message=str(e)
+            )
+    
+    async def generate_batch_async(self,
+                                   products: List[Product],
+                                   progress_callback: Optional[Callable[[int, int], None]] = None,
+                                   max_concurrency: Optional[int] = None) -> List[GenerationResult]:
+        """Gera descrições em lote com asyncio, sem uma thread por requisição"""
+        completed = 0
+        total = len(products)
+        
+        async with AsyncAIClient(max_concurrency=max_concurrency,
+                                 pool=self.ai_client.pool) as client:
+            logger.info(f"Iniciando geração assíncrona: {total} produtos, "
+                        f"{client.max_concurrency} requisições simultâneas")
+            
+            async def run(product: Product) -> GenerationResult:
+                nonlocal completed
+                result = await self.generate_single_async(client, product)
+                completed += 1
+                
+                if progress_callback:
+                    progress_callback(completed, total)
+                
+                return result
+            
+            # gather preserva a ordem original dos produtos
+            results = await asyncio.gather(*(run(product) for product in products))
+        
+        self.token_budget.save()
+        
+        successful = sum(1 for r in results if r.success)
+        logger.info(f"Geração assíncrona concluída: {successful}/{total} sucessos")
+        
+        return list(results)
+    
+    def cache_keys_for_frame(self, df: pd.DataFrame) -> List[str]:
+        """Chaves de cache de todas as linhas, calculadas por coluna"""
+        self._sync_cache_keys()
+        columns = {
+            name: df[column]
+            for name, column in SPREADSHEET_COLUMNS.items()
+            if column in df.columns
+        }
+        return self.cache_manager.keys_for_columns(columns, len(df))
+    
+    @staticmethod
+    def product_from_row(row: pd.Series) -> Product:
+        """Converte uma linha da planilha em produto"""
+        return Product(
+            nome=str(row.get('Nome', '')),
+            material=str(row.get('Material', '')) if pd.notna(row.get('Material')) else None,
+            cor=str(row.get('Cor', '')) if pd.notna(row.get('Cor')) else None,
+            descricao_fornecedor=str(row.get('Descrição Fornecedor', '')) if pd.notna(row.get('Descrição Fornecedor')) else None,
+            categoria1=str(row.get('Categoria 1', '')) if pd.notna(row.get('Categoria 1')) else None,
+            categoria2=str(row.get('Categoria 2', '')) if pd.notna(row.get('Categoria 2')) else None,
+            preco=row.get('Preço') if pd.notna(row.get('Preço')) else None,
+            marca=str(row.get('Marca', '')) if pd.notna(row.get('Marca')) else None
+        )
+    
     def generate_from_dataframe(self, 
                                df: pd.DataFrame,
-                               progress_callback: Optional[Callable[[int, int], None]] = None) -> List[str]:
-        """Gera descrições a partir de um DataFrame"""
-        
-        # Converter DataFrame para lista de produtos
-        products = []
-        for _, row in df.iterrows():
-            product = Product(
-                nome=str(row.get('Nome', '')),
-                material=str(row.get('Material', '')) if pd.notna(row.get('Material')) else None,
-                cor=str(row.get('Cor', '')) if pd.notna(row.get('Cor')) else None,
-                descricao_fornecedor=str(row.get('Descrição Fornecedor', '')) if pd.notna(row.get('Descrição Fornecedor')) else None,
-                categoria1=str(row.get('Categoria 1', '')) if pd.notna(row.get('Categoria 1')) else None,
-                categoria2=str(row.get('Categoria 2', '')) if pd.notna(row.get('Categoria 2')) else None,
-                preco=row.get('Preço') if pd.notna(row.get('Preço')) else None,
-                marca=str(row.get('Marca', '')) if pd.notna(row.get('Marca')) else None
-            )
-            products.append(product)
+                               progress_callback: Optional[Callable[[int, int], None]] = None,
+                               resume: bool = True) -> List[str]:
+        """Gera descrições a partir de um DataFrame
         
-        # Gerar descrições
-        results = self.generate_batch(products, progress_callback)
+        Cada linha concluída é registrada no diário do trabalho (ver
+        `BatchJournal`). Se um lote da mesma planilha, com o mesmo modelo
+        e prompts, foi interrompido ou terminou com falhas, as linhas já
+        concluídas são reaproveitadas e só o restante é gerado. Um
+        trabalho concluído sem falhas recomeça do zero, assim como com
+        `resume=False`.
+        """
+        self._sync_cache_keys()
+        cleanup_jobs()
         
-        # Retornar apenas as descrições como lista
-        descriptions = []
-        for result in results:
-            if result.success:
-                descriptions.append(result.description)
-            else:
-                descriptions.append(f"ERRO: {result.error_message}")
+        journal, row_hashes = BatchJournal.for_frame(df, self.cache_manager.namespace)
+        meta = journal.meta()
+        if not resume or (meta.get('finished') and not meta.get('failed')):
+            journal.reset()
+        
+        total = len(df)
+        done = journal.completed_rows(row_hashes)
+        remaining = [position for position in range(total) if position not in done]
+        skipped = total - len(remaining)
+        
+        self.last_job = {'job_id': journal.job_id, 'total': total, 'resumed': skipped}
+        if skipped:
+            logger.info(f"Retomando trabalho {journal.job_id}: {skipped}/{total} linhas já concluídas")
+        
+        descriptions: List[Optional[str]] = [done.get(position) for position in range(total)]
+        
+        # Colunas convertidas de uma vez; cada produto é criado sob demanda, só para as linhas pendentes
+        products = ProductBatch.from_dataframe(df)
+        if skipped:
+            products = products.take(remaining)
+        keys = None
+        if self.config.use_cache:
+            keys = self.cache_keys_for_frame(df)
+            if skipped:
+                keys = [keys[position] for position in remaining]
+        
+        progress = None
+        if progress_callback:
+            progress = lambda completed, _: progress_callback(skipped + completed, total)
+        
+        try:
+            results = self.iter_generate(products, progress, keys=keys, total=len(remaining))
+            for position, result in zip(remaining, results):
+                journal.append(position, row_hashes[position], result)
+                if result.success:
+                    descriptions[position] = result.description
+                else:
+                    descriptions[position] = f"ERRO: {result.error_message}"
+            
+            # Falhas ficam fora das linhas concluídas e o trabalho não é
+            # descartado na próxima execução, que refaz só essas linhas
+            journal.finish()
+        finally:
+            journal.close()
         
         return descriptions
     
+    def job_status(self, df: pd.DataFrame) -> Optional[Dict[str, object]]:
+        """Trabalho registrado para a planilha com a configuração atual, se houver"""
+        self._sync_cache_keys()
+        journal, _ = BatchJournal.for_frame(df, self.cache_manager.namespace, create=False)
+        return journal.info() if journal.exists() else None
+    
+    def resume_job(self,
+                   job_id: str,
+                   progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[pd.DataFrame, List[str]]:
+        """Retoma um trabalho pelo identificador, a partir da planilha guardada"""
+        journal = BatchJournal(job_id)
+        if not job_id.isalnum() or not journal.exists():
+            raise ValueError(f"Trabalho não encontrado: {job_id}")
+        if not journal.input_file.exists():
+            raise ValueError(f"Trabalho {job_id} já concluído, sem linhas a retomar")
+        
+        df = journal.load_input()
+        descriptions = self.generate_from_dataframe(df, progress_callback)
+        
+        if self.last_job.get('job_id') != job_id:
+            logger.warning(f"Modelo ou prompts mudaram desde o trabalho {job_id}; "
+                           f"gerado como novo trabalho {self.last_job.get('job_id')}")
+        return df, descriptions
+    
+    def warm_cache(self,
+                   products: List[Product],
+                   descriptions: List[str],
+                   model_used: Optional[str] = None,
+                   keep_existing: bool = True) -> int:
+        """Alimenta o cache com descrições já prontas (ex.: planilhas finalizadas)
+        
+        As chaves usam o modelo e os prompts atuais, como em `generate_single`.
+        Retorna quantas entradas foram gravadas.
+        """
+        self._sync_cache_keys()
+        model_used = model_used or self.config.model_id
+        
+        entries = [
+            (self.cache_manager.key_for(product), self.cache_manager.make_entry(description, model_used))
+            for product, description in zip(products, descriptions)
+        ]
+        
+        return self.cache_manager.merge_entries(entries, keep_existing=keep_existing)
+    
     def update_config(self, **kwargs):
         """Atualiza configuração do gerador"""
         for key, value in kwargs.items():
             if hasattr(self.config, key):
+                previous = getattr(self.config, key)
                 setattr(self.config, key, value)
                 logger.info(f"Configuração atualizada: {key} = {value}")
+                
+                if key == 'keep_alive':
+                    self.model_manager.keep_alive = value
+                
+                # Novo modelo: carregar em background antes da primeira geração
+                if key == 'model_id' and value != previous:
+                    self.model_manager.warm_async(value)
+    
+    def warm_up(self):
+        """Pré-carrega em background os modelos configurados"""
+        self.model_manager.warm_configured()
+        
+        if self.config.cascade:
+            for model_id in self.cascade_models():
+                self.model_manager.warm_async(model_id)
     
     def get_stats(self) -> dict:
         """Retorna estatísticas do gerador"""
@@ -184,9 +987,32 @@ class DescriptionGenerator:
             'cache_size': self.cache_manager.size(),
             'cache_hits': self.cache_manager.hits,
             'cache_misses': self.cache_manager.misses,
+            'cache': self.cache_manager.get_stats(),
             'model_available': self.ai_client.is_available(),
             'current_model': self.config.model_id,
-            'max_workers': self.config.max_workers
+            'max_workers': self.config.max_workers,
+            'adaptive_concurrency': self.config.adaptive_concurrency,
+            'pack_size': self.config.pack_size,
+            'packed_calls': self.packed_calls,
+            'packed_items': self.packed_items,
+            'packed_fallbacks': self.packed_fallbacks,
+            'prompt_eval_calls': self.prompt_eval_calls,
+            'prompt_eval_tokens': self.prompt_eval_tokens,
+            'prompt_eval_time': self.prompt_eval_time,
+            'coalesced_requests': self.single_flight.coalesced,
+            'cascade': self.config.cascade,
+            'cascade_escalations': self.cascade_escalations,
+            'tier_results': dict(self.tier_results),
+            'variant_clustering': self.config.variant_clustering,
+            'variant_families': self.variant_families,
+            'variant_fallbacks': self.variant_fallbacks,
+            'llm_calls_saved': self.variant_fills,
+            'avg_prompt_eval_tokens': (self.prompt_eval_tokens / self.prompt_eval_calls
+                                       if self.prompt_eval_calls else 0.0),
+            **self.token_budget.get_stats(),
+            **self.concurrency_limiter.get_stats(),
+            **self.model_manager.get_stats(),
+            **self.ai_client.get_stats()
         }
     
     def clear_cache(self):
@@ -0,0 +1,238 @@
+"""
+Diário (journal) dos lotes de geração, para retomar trabalhos interrompidos
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
+import pandas as pd
+
+from .models import GenerationResult
+from .logger import get_logger
+from config.settings import DATA_DIR, JOBS_CONFIG
+
+logger = get_logger(__name__)
+
+JOBS_DIR = DATA_DIR / "jobs"
+
+def frame_hashes(df: pd.DataFrame) -> Tuple[str, List[str]]:
+    """Hash da planilha inteira e de cada linha"""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+    
+    digest = hashlib.md5('\0'.join(map(str, df.columns)).encode('utf-8'))
+    digest.update(row_hashes.tobytes())
+    
+    return digest.hexdigest(), [format(value, '016x') for value in row_hashes]
+
+class BatchJournal:
+    """Diário somente de acréscimo das linhas concluídas de um lote
+    
+    Cada trabalho tem um diretório com a planilha de entrada
+    (`input.pkl`, para retomar só pelo identificador, apagada quando o
+    trabalho termina sem falhas) e o diário `journal.jsonl`: uma linha
+    JSON por produto concluído, com a posição da linha, o hash do
+    conteúdo e a descrição. Uma última linha truncada por uma queda é
+    ignorada na leitura.
+    """
+    
+    def __init__(self, job_id: str, jobs_dir: Optional[Path] = None):
+        self.job_id = job_id
+        self.job_dir = Path(jobs_dir or JOBS_DIR) / job_id
+        self.journal_file = self.job_dir / "journal.jsonl"
+        self.input_file = self.job_dir / "input.pkl"
+        self.meta_file = self.job_dir / "job.json"
+        
+        self._file = None
+        self._unsynced = 0
+    
+    @classmethod
+    def for_frame(cls,
+                  df: pd.DataFrame,
+                  namespace: str = '',
+                  jobs_dir: Optional[Path] = None,
+                  create: bool = True) -> Tuple['BatchJournal', List[str]]:
+        """Diário da planilha; a mesma entrada com a mesma configuração reabre o mesmo trabalho
+        
+        Retorna também os hashes das linhas, usados em `completed_rows`.
+        Com `create=False`, apenas localiza um trabalho existente.
+        """
+        input_hash, row_hashes = frame_hashes(df)
+        job_id = hashlib.md5(f"{input_hash}|{namespace}".encode('utf-8')).hexdigest()[:16]
+        
+        journal = cls(job_id, jobs_dir)
+        if create and not journal.exists():
+            journal.create(df, input_hash)
+        elif create and not journal.input_file.exists():
+            # Trabalho já concluído: a planilha volta a ser guardada para a nova execução
+            journal.save_input(df)
+        
+        return journal, row_hashes
+    
+    def create(self, df: pd.DataFrame, input_hash: str):
+        """Registra um trabalho novo, guardando a planilha de entrada"""
+        self.save_input(df)
+        self._write_meta({
+            'job_id': self.job_id,
+            'input_hash': input_hash,
+            'total': len(df),
+            'created_at': time.time(),
+            'finished': False
+        })
+    
+    def save_input(self, df: pd.DataFrame):
+        """Guarda a planilha de entrada, para retomar só pelo identificador"""
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        df.to_pickle(self.input_file)
+    
+    def _write_meta(self, meta: Dict[str, Any]):
+        temp_file = self.meta_file.with_name(f"job.json.{os.getpid()}.tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temp_file, self.meta_file)
+    
+    def meta(self) -> Dict[str, Any]:
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def exists(self) -> bool:
+        return self.meta_file.exists()
+    
+    def load_input(self) -> pd.DataFrame:
+        """Planilha original do trabalho"""
+        return pd.read_pickle(self.input_file)
+    
+    def records(self) -> Dict[int, Dict[str, Any]]:
+        """Último registro de cada linha no diário"""
+        records = {}
+        if not self.journal_file.exists():
+            return records
+        
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Linha truncada por uma interrupção
+                records[record['i']] = record
+        
+        return records
+    
+    def completed_rows(self, row_hashes: List[str]) -> Dict[int, str]:
+        """Descrições das linhas já concluídas com sucesso e inalteradas"""
+        return {
+            index: record['d']
+            for index, record in self.records().items()
+            if record.get('ok') and index < len(row_hashes) and record.get('h') == row_hashes[index]
+        }
+    
+    def append(self, index: int, row_hash: str, result: GenerationResult):
+        """Registra uma linha concluída"""
+        if self._file is None:
+            self.job_dir.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.journal_file, 'a', encoding='utf-8')
+        
+        record = {'i': index, 'h': row_hash, 'ok': result.success, 't': time.time()}
+        if result.success:
+            record['d'] = result.description
+            record['m'] = result.model_used
+        else:
+            record['e'] = result.error_message
+        
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        
+        # flush() protege contra queda do processo; fsync periódico, contra queda da máquina
+        self._unsynced += 1
+        if self._unsynced >= JOBS_CONFIG["fsync_every"]:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+    
+    def finish(self):
+        """Marca o trabalho como concluído
+        
+        Sem falhas, a planilha guardada é apagada: não há mais o que
+        retomar. Com falhas, ela fica para uma nova execução refazer só
+        essas linhas.
+        """
+        self.close()
+        failed = sum(1 for record in self.records().values() if not record.get('ok'))
+        
+        meta = self.meta()
+        meta.update({'finished': True, 'finished_at': time.time(), 'failed': failed})
+        self._write_meta(meta)
+        
+        if not failed and self.input_file.exists():
+            self.input_file.unlink()
+    
+    def reset(self):
+        """Descarta o progresso registrado (recomeçar do zero)"""
+        self.close()
+        if self.journal_file.exists():
+            self.journal_file.unlink()
+        
+        meta = self.meta()
+        if meta:
+            meta.update({'finished': False, 'failed': 0})
+            self._write_meta(meta)
+    
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._unsynced = 0
+    
+    def info(self) -> Dict[str, Any]:
+        """Resumo do trabalho: total, concluídas e falhas"""
+        meta = self.meta()
+        records = self.records()
+        completed = sum(1 for record in records.values() if record.get('ok'))
+        
+        return {
+            'job_id': self.job_id,
+            'total': meta.get('total', 0),
+            'completed': completed,
+            'failed': len(records) - completed,
+            'finished': meta.get('finished', False),
+            'created_at': meta.get('created_at'),
+            'updated_at': self.journal_file.stat().st_mtime if self.journal_file.exists() else meta.get('created_at')
+        }
+
+def list_jobs(jobs_dir: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """Trabalhos registrados, do mais recente ao mais antigo"""
+    jobs_dir = Path(jobs_dir or JOBS_DIR)
+    if not jobs_dir.exists():
+        return []
+    
+    jobs = [BatchJournal(path.name, jobs_dir).info() for path in jobs_dir.iterdir() if (path / "job.json").exists()]
+    return sorted(jobs, key=lambda job: job['updated_at'] or 0, reverse=True)
+
+def cleanup_jobs(max_age_days: Optional[float] = None, jobs_dir: Optional[Path] = None) -> int:
+    """Remove trabalhos sem atividade há mais de `max_age_days`"""
+    jobs_dir = Path(jobs_dir or JOBS_DIR)
+    if max_age_days is None:
+        max_age_days = JOBS_CONFIG["retention_days"]
+    if not jobs_dir.exists():
+        return 0
+    
+    # Só datas de modificação: não lê os diários
+    limit = time.time() - max_age_days * 86400
+    removed = 0
+    for job_dir in jobs_dir.iterdir():
+        files = [path for path in job_dir.iterdir() if path.is_file()] if job_dir.is_dir() else []
+        if files and max(path.stat().st_mtime for path in files) < limit:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            removed += 1
+    
+    if removed:
+        logger.info(f"Removidos {removed} trabalhos antigos")
+    return removed
@@ -0,0 +1,159 @@
+"""
+Camada de cache em memória (LRU) limitada por tamanho em bytes
+"""
+
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+from .concurrency import AtomicCounter
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'TB': 1024 ** 4}
+
+def parse_size(value: str) -> int:
+    """Converte tamanhos como "2GB" ou "512 MB" em bytes"""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMGT]?B)?\s*', str(value).upper())
+    if not match:
+        raise ValueError(f"Tamanho inválido: {value}")
+    
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit or 'B'])
+
+def entry_size(key: str, entry: Dict[str, Any]) -> int:
+    """Estimativa do espaço ocupado por uma entrada na memória"""
+    size = sys.getsizeof(key) + sys.getsizeof(entry)
+    for name, value in entry.items():
+        size += sys.getsizeof(name) + sys.getsizeof(value)
+    return size
+
+class _LRUShard:
+    """Fatia do cache LRU com lock próprio
+    
+    Leituras não tomam o lock: `OrderedDict.get` é atômico no CPython e as
+    entradas são substituídas, nunca alteradas. A atualização da ordem de
+    uso é feita apenas se o lock estiver livre (LRU aproximado).
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = AtomicCounter()
+        self.misses = AtomicCounter()
+        self.evictions = AtomicCounter()
+        
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        item = self._entries.get(key)
+        
+        if item is not None and item[0].get('expires_at', float('inf')) <= now:
+            if self._lock.acquire(blocking=False):
+                try:
+                    if self._entries.get(key) is item:
+                        self._remove(key)
+                finally:
+                    self._lock.release()
+            item = None
+        
+        if item is None:
+            self.misses.increment()
+            return None
+        
+        # Sem esperar por escritores: se o lock estiver ocupado, a ordem fica como está
+        if self._lock.acquire(blocking=False):
+            try:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+            finally:
+                self._lock.release()
+        
+        self.hits.increment()
+        return item[0]
+    
+    def set(self, key: str, entry: Dict[str, Any], size: int):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (entry, size)
+            self.current_bytes += size
+            
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions.increment()
+    
+    def _remove(self, key: str):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.current_bytes -= item[1]
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+class MemoryLRUCache:
+    """Cache LRU em memória com orçamento de bytes
+    
+    Ao passar do orçamento, as entradas usadas há mais tempo são
+    descartadas (continuam no armazenamento persistente). As chaves são
+    distribuídas em fatias com locks independentes, para que muitas
+    threads usem o cache sem disputar um lock global.
+    """
+    
+    def __init__(self, max_bytes: int, shards: int = 16):
+        self.max_bytes = max_bytes
+        self._shards = [_LRUShard(max_bytes // shards) for _ in range(shards)]
+    
+    def _shard(self, key: str) -> _LRUShard:
+        return self._shards[hash(key) % len(self._shards)]
+    
+    def get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Retorna a entrada válida e a marca como usada recentemente"""
+        return self._shard(key).get(key, now)
+    
+    def set(self, key: str, entry: Dict[str, Any]):
+        """Insere a entrada, descartando as menos usadas se preciso"""
+        shard = self._shard(key)
+        size = entry_size(key, entry)
+        if size > shard.max_bytes:
+            return
+        
+        shard.set(key, entry, size)
+    
+    def delete(self, key: str):
+        self._shard(key).delete(key)
+    
+    def clear(self):
+        """Descarta as entradas, mantendo os contadores"""
+        for shard in self._shards:
+            shard.clear()
+    
+    def reset_stats(self):
+        for shard in self._shards:
+            shard.hits.reset()
+            shard.misses.reset()
+            shard.evictions.reset()
+    
+    def __len__(self) -> int:
+        return sum(len(shard._entries) for shard in self._shards)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'memory_entries': len(self),
+            'memory_bytes': sum(shard.current_bytes for shard in self._shards),
+            'memory_limit_bytes': self.max_bytes,
+            'memory_shards': len(self._shards),
+            'memory_hits': sum(shard.hits.value for shard in self._shards),
+            'memory_misses': sum(shard.misses.value for shard in self._shards),
+            'memory_evictions': sum(shard.evictions.value for shard in self._shards)
+        }
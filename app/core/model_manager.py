@@ -0,0 +1,87 @@
+"""
+Gerenciamento de residência dos modelos no Ollama (pré-carga e keep-alive)
+"""
+
+import threading
+from typing import Dict, Any, List, Optional, Set
+
+from .ai_client import AIClient
+from .logger import get_logger
+from config.settings import OLLAMA_CONFIG
+
+logger = get_logger(__name__)
+
+class ModelResidencyManager:
+    """Mantém os modelos em uso carregados e contabiliza partidas a frio"""
+    
+    def __init__(self, ai_client: AIClient, keep_alive: Optional[str] = None):
+        self.ai_client = ai_client
+        self.keep_alive = keep_alive or OLLAMA_CONFIG["keep_alive"]
+        self.cold_start_threshold = OLLAMA_CONFIG["cold_start_threshold"]
+        
+        self.warm_models: Set[str] = set()
+        self.warmups = 0
+        self.warmup_time = 0.0
+        self.cold_starts = 0
+        self.cold_start_time = 0.0
+        
+        self._warming: Set[str] = set()
+        self._lock = threading.Lock()
+    
+    def warm(self, model_id: str) -> bool:
+        """Pré-carrega o modelo de forma síncrona"""
+        logger.info(f"Pré-carregando modelo {model_id}...")
+        
+        load_time = self.ai_client.warm_model(model_id, self.keep_alive)
+        
+        with self._lock:
+            self._warming.discard(model_id)
+            
+            if load_time is None:
+                return False
+            
+            self.warm_models.add(model_id)
+            self.warmups += 1
+            self.warmup_time += load_time
+        
+        logger.info(f"Modelo {model_id} carregado em {load_time:.2f}s")
+        return True
+    
+    def warm_async(self, model_id: str):
+        """Pré-carrega o modelo em background, ignorando pedidos repetidos"""
+        with self._lock:
+            if model_id in self._warming:
+                return
+            self._warming.add(model_id)
+        
+        threading.Thread(target=self.warm, args=(model_id,), daemon=True).start()
+    
+    def warm_configured(self, models: Optional[List[str]] = None):
+        """Pré-carrega em background os modelos configurados para a inicialização"""
+        for model_id in models or OLLAMA_CONFIG["warmup_models"]:
+            self.warm_async(model_id)
+    
+    def record_load(self, model_id: str, load_time: Optional[float]):
+        """Registra o tempo de carga reportado pelo Ollama em uma geração"""
+        if not load_time:
+            return
+        
+        with self._lock:
+            if load_time >= self.cold_start_threshold:
+                self.cold_starts += 1
+                self.cold_start_time += load_time
+                logger.info(f"Partida a frio do modelo {model_id}: {load_time:.2f}s de carga")
+            
+            self.warm_models.add(model_id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de pré-carga e partidas a frio"""
+        with self._lock:
+            return {
+                'keep_alive': self.keep_alive,
+                'warm_models': sorted(self.warm_models),
+                'warmups': self.warmups,
+                'warmup_time': self.warmup_time,
+                'cold_starts': self.cold_starts,
+                'cold_start_time': self.cold_start_time
+            }
@@ -2,13 +2,50 @@
 Modelos de dados da aplicação
 """
 
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
-from datetime import datetime
+import sys
+import time
+from dataclasses import dataclass, field, fields
+from typing import Optional, Dict, Any, List
 
+# Campos que se repetem muito num catálogo: uma única cópia de cada valor em memória
+INTERNED_FIELDS = ('material', 'cor', 'categoria1', 'categoria2', 'marca')
+
+def intern_value(value):
+    """`sys.intern` para textos; outros valores passam inalterados"""
+    return sys.intern(value) if type(value) is str else value
+
+def _slotted(cls):
+    """Recria a dataclass com `__slots__` (o `slots=True` do Python 3.10+)
+    
+    Sem `__dict__` por instância, cada objeto ocupa só os ponteiros dos
+    campos. `__getstate__`/`__setstate__` mantêm pickle e `copy`
+    funcionando (também com `frozen=True`).
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names and key not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    
+    def __getstate__(self):
+        return [getattr(self, name) for name in names]
+    
+    def __setstate__(self, state):
+        for name, value in zip(names, state):
+            object.__setattr__(self, name, value)
+    
+    namespace['__getstate__'] = __getstate__
+    namespace['__setstate__'] = __setstate__
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+@_slotted
 @dataclass
 class Product:
-    """Modelo para representar um produto"""
+    """Modelo para representar um produto
+    
+    Os campos de baixa cardinalidade (`INTERNED_FIELDS`) são internados
+    na entrada dos dados (`from_dict`, `ProductBatch`), uma vez por valor
+    distinto, e não a cada instância criada.
+    """
     nome: str
     material: Optional[str] = None
     cor: Optional[str] = None
@@ -36,29 +73,40 @@ class Product:
         """Cria instância a partir de dicionário"""
         return cls(
             nome=data.get('nome', ''),
-            material=data.get('material'),
-            cor=data.get('cor'),
+            material=intern_value(data.get('material')),
+            cor=intern_value(data.get('cor')),
             descricao_fornecedor=data.get('descricao_fornecedor'),
-            categoria1=data.get('categoria1'),
-            categoria2=data.get('categoria2'),
+            categoria1=intern_value(data.get('categoria1')),
+            categoria2=intern_value(data.get('categoria2')),
             preco=data.get('preco'),
-            marca=data.get('marca')
+            marca=intern_value(data.get('marca'))
         )
 
+@_slotted
 @dataclass
 class GenerationResult:
-    """Resultado da geração de descrição"""
+    """Resultado da geração de descrição
+    
+    `timestamp` é o horário da geração em segundos (epoch, `time.time()`),
+    mais leve que um `datetime` por resultado.
+    """
     product: Product
     description: str
     success: bool
     error_message: Optional[str] = None
     generation_time: Optional[float] = None
     model_used: Optional[str] = None
-    timestamp: datetime = None
-    
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.now()
+    time_to_first_token: Optional[float] = None
+    tokens_per_second: Optional[float] = None
+    load_time: Optional[float] = None
+    prompt_eval_count: Optional[int] = None
+    prompt_eval_time: Optional[float] = None
+    tier: Optional[int] = None
+    quality_issues: Optional[List[str]] = None
+    cached: bool = False
+    coalesced: bool = False
+    variant_of: Optional[str] = None  # Nome do representante cuja descrição foi adaptada
+    timestamp: float = field(default_factory=time.time)
 
 @dataclass
 class AIModel:
@@ -91,6 +139,14 @@ class GenerationConfig:
     use_cache: bool = True
     max_workers: int = 2
     timeout: int = 60
+    adaptive_concurrency: bool = False
+    keep_alive: str = "30m"
+    pack_size: int = 1
+    cascade: bool = False
+    adaptive_tokens: bool = True
+    stop_sequences: List[str] = field(default_factory=list)
+    variant_clustering: bool = False
+    variant_threshold: float = 0.8
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -99,5 +155,13 @@ class GenerationConfig:
             'max_tokens': self.max_tokens,
             'use_cache': self.use_cache,
             'max_workers': self.max_workers,
-            'timeout': self.timeout
+            'timeout': self.timeout,
+            'adaptive_concurrency': self.adaptive_concurrency,
+            'keep_alive': self.keep_alive,
+            'pack_size': self.pack_size,
+            'cascade': self.cascade,
+            'adaptive_tokens': self.adaptive_tokens,
+            'stop_sequences': list(self.stop_sequences),
+            'variant_clustering': self.variant_clustering,
+            'variant_threshold': self.variant_threshold
         }
\ No newline at end of file
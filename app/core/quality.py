@@ -0,0 +1,99 @@
+"""
+Verificações automáticas e baratas da qualidade das descrições geradas
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .models import Product
+from config.settings import GENERATION_CONFIG
+
+# Palavras funcionais frequentes, usadas para estimar o idioma do texto
+PORTUGUESE_WORDS = {
+    'de', 'da', 'do', 'das', 'dos', 'e', 'para', 'com', 'que', 'em', 'um', 'uma',
+    'o', 'a', 'os', 'as', 'seu', 'sua', 'não', 'é', 'ao', 'na', 'no', 'por', 'mais'
+}
+ENGLISH_WORDS = {
+    'the', 'and', 'with', 'for', 'of', 'your', 'this', 'is', 'to', 'in', 'it',
+    'that', 'its', 'are', 'an', 'you'
+}
+
+MARKDOWN_PATTERN = re.compile(r'(\*\*|__|`|^\s*#+\s|^\s*[-*•]\s|^\s*\d+[.)]\s)', re.MULTILINE)
+
+@dataclass
+class QualityReport:
+    """Resultado das verificações de uma descrição"""
+    passed: bool
+    issues: List[str] = field(default_factory=list)
+
+def _normalize(text: str) -> str:
+    """Minúsculas e sem acentos, para comparações tolerantes"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+def _words(text: str) -> List[str]:
+    return re.findall(r'\w+', text.lower())
+
+def is_portuguese(text: str) -> bool:
+    """Estima se o texto está em português pelas palavras funcionais"""
+    words = _words(text)
+    if not words:
+        return False
+    
+    portuguese = sum(1 for w in words if w in PORTUGUESE_WORDS)
+    english = sum(1 for w in words if w in ENGLISH_WORDS)
+    return portuguese > english and portuguese / len(words) >= 0.05
+
+def repetition_ratio(text: str) -> float:
+    """Fração de trigramas de palavras repetidos no texto"""
+    words = _words(text)
+    trigrams = [tuple(words[i:i + 3]) for i in range(len(words) - 2)]
+    if not trigrams:
+        return 0.0
+    return 1 - len(set(trigrams)) / len(trigrams)
+
+def mentions_product(text: str, product: Product) -> bool:
+    """Verifica se alguma palavra significativa do nome aparece no texto"""
+    name_words = [w for w in _words(_normalize(product.nome or '')) if len(w) >= 3 and not w.isdigit()]
+    if not name_words:
+        return True
+    
+    normalized = _normalize(text)
+    return any(word in normalized for word in name_words)
+
+def check_description(text: Optional[str],
+                      product: Product,
+                      min_chars: Optional[int] = None,
+                      max_chars: Optional[int] = None,
+                      max_repetition: Optional[float] = None) -> QualityReport:
+    """Executa as verificações sobre a resposta bruta do modelo"""
+    min_chars = min_chars if min_chars is not None else GENERATION_CONFIG["quality_min_chars"]
+    max_chars = max_chars if max_chars is not None else GENERATION_CONFIG["quality_max_chars"]
+    max_repetition = max_repetition if max_repetition is not None else GENERATION_CONFIG["quality_max_repetition"]
+    
+    text = (text or '').strip()
+    if not text:
+        return QualityReport(passed=False, issues=['vazia'])
+    
+    issues = []
+    
+    if len(text) < min_chars:
+        issues.append('curta')
+    elif len(text) > max_chars:
+        issues.append('longa')
+    
+    if not is_portuguese(text):
+        issues.append('idioma')
+    
+    if repetition_ratio(text) > max_repetition:
+        issues.append('repetição')
+    
+    if MARKDOWN_PATTERN.search(text):
+        issues.append('markdown')
+    
+    if not mentions_product(text, product):
+        issues.append('nome ausente')
+    
+    return QualityReport(passed=not issues, issues=issues)
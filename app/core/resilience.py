@@ -0,0 +1,127 @@
+"""
+Retentativas com backoff e circuit breaker para chamadas ao Ollama
+"""
+
+import time
+import random
+import threading
+from typing import Dict, Any, Optional
+
+import requests
+
+from .logger import get_logger
+from config.settings import PERFORMANCE_CONFIG
+
+logger = get_logger(__name__)
+
+class RetryableStatusError(Exception):
+    """Resposta HTTP que vale a pena repetir (5xx ou 429)"""
+    
+    def __init__(self, status_code: int):
+        super().__init__(f"Status {status_code}")
+        self.status_code = status_code
+
+def is_retryable_status(status_code: int) -> bool:
+    """Erros do servidor e excesso de requisições podem ser repetidos; 4xx não"""
+    return status_code >= 500 or status_code == 429
+
+def is_retryable_error(error: Exception) -> bool:
+    """Classifica exceções de transporte como transitórias ou definitivas"""
+    if isinstance(error, RetryableStatusError):
+        return True
+    return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+
+class RetryPolicy:
+    """Política de retentativas com backoff exponencial e jitter"""
+    
+    def __init__(self,
+                 attempts: Optional[int] = None,
+                 base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None):
+        self.attempts = max(1, attempts or PERFORMANCE_CONFIG["retry_attempts"])
+        self.base_delay = base_delay if base_delay is not None else PERFORMANCE_CONFIG["retry_delay"]
+        self.max_delay = max_delay or PERFORMANCE_CONFIG["retry_max_delay"]
+    
+    def delay(self, attempt: int) -> float:
+        """Espera antes da retentativa `attempt` (0 = primeira), com full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class CircuitBreaker:
+    """Circuit breaker por servidor
+    
+    Após `failure_threshold` falhas seguidas o circuito abre e as chamadas
+    falham imediatamente. Passado `reset_timeout`, uma única requisição de
+    teste é liberada (meio-aberto); se ela funcionar, o circuito fecha.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self,
+                 failure_threshold: Optional[int] = None,
+                 reset_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold or PERFORMANCE_CONFIG["breaker_failure_threshold"]
+        self.reset_timeout = reset_timeout or PERFORMANCE_CONFIG["breaker_reset_timeout"]
+        
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def can_attempt(self) -> bool:
+        """Indica se uma requisição seria aceita, sem alterar o estado"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return time.time() - self.opened_at >= self.reset_timeout
+            return not self._probe_in_flight
+    
+    def allow_request(self) -> bool:
+        """Reserva a passagem de uma requisição pelo circuito"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            
+            # Meio-aberto: apenas uma requisição de teste por vez
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuito fechado: servidor voltou a responder")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuito aberto após {self.consecutive_failures} falhas seguidas")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened
+            }
@@ -0,0 +1,69 @@
+"""
+Agrupamento de requisições idênticas em andamento (single-flight)
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class SingleFlight:
+    """Garante uma única geração em andamento por chave
+
+    O primeiro chamador de uma chave é o líder e executa a geração; os
+    seguintes recebem o mesmo `Future` e aguardam o resultado do líder em
+    vez de chamar o Ollama de novo.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def begin(self, key: str) -> Tuple[Future, bool]:
+        """Registra o interesse na chave; retorna (future, é_líder)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def finish(self, key: str, result: Any = None, error: BaseException = None):
+        """Publica o resultado do líder e libera a chave"""
+        with self._lock:
+            future = self._calls.pop(key, None)
+
+        if future is None:
+            return
+
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Executa `fn` como líder ou aguarda o líder; retorna (resultado, compartilhado)"""
+        future, leader = self.begin(key)
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+
+        self.finish(key, result)
+        return result, False
+
+    def in_flight(self) -> int:
+        """Quantidade de chaves com geração em andamento"""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,158 @@
+"""
+Orçamento de tokens de saída (num_predict) por produto
+"""
+
+import os
+import json
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, Any, Deque
+
+from .models import Product
+from .logger import get_logger
+from config.settings import DATA_DIR, GENERATION_CONFIG
+
+logger = get_logger(__name__)
+
+# Chave das estatísticas gerais, usadas quando a categoria tem poucas amostras
+ALL_CATEGORIES = "*"
+
+class TokenBudget:
+    """Calcula o num_predict de cada produto a partir do histórico da categoria
+    
+    Guarda os tamanhos de saída (eval_count) mais recentes por categoria e
+    usa o percentil configurado, com margem, como orçamento. Sem histórico
+    suficiente, o orçamento é estimado pelo tamanho dos dados de entrada.
+    """
+    
+    def __init__(self, stats_file: str = "token_budget.json"):
+        self.stats_file = DATA_DIR / stats_file
+        self.base_tokens = GENERATION_CONFIG["budget_base_tokens"]
+        self.min_tokens = GENERATION_CONFIG["budget_min_tokens"]
+        self.min_samples = GENERATION_CONFIG["budget_min_samples"]
+        self.percentile = GENERATION_CONFIG["budget_percentile"]
+        self.margin = GENERATION_CONFIG["budget_margin"]
+        self.history_size = GENERATION_CONFIG["budget_history_size"]
+        
+        self.lengths: Dict[str, Deque[int]] = {}
+        self.truncations = 0
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        
+        self._load()
+    
+    @staticmethod
+    def category_of(product: Product) -> str:
+        """Categoria usada para agrupar as estatísticas"""
+        return (product.categoria1 or '').strip().lower() or "geral"
+    
+    def _load(self):
+        """Carrega o histórico salvo"""
+        try:
+            if self.stats_file.exists():
+                with open(self.stats_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                
+                for category, lengths in data.get('lengths', {}).items():
+                    self.lengths[category] = deque(lengths, maxlen=self.history_size)
+                self.truncations = data.get('truncations', 0)
+                
+                logger.info(f"Histórico de tamanho de saída carregado: {len(self.lengths)} categorias")
+        except Exception as e:
+            logger.error(f"Erro ao carregar histórico de tokens: {e}")
+            self.lengths = {}
+    
+    def save(self):
+        """Salva o histórico no arquivo
+        
+        Gravações simultâneas (workers e fim do lote) são serializadas e
+        o arquivo é substituído de uma vez: uma queda no meio nunca deixa
+        um JSON truncado.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._unsaved:
+                    return
+                data = {
+                    'lengths': {category: list(lengths) for category, lengths in self.lengths.items()},
+                    'truncations': self.truncations
+                }
+                self._unsaved = 0
+            
+            temp_path = None
+            try:
+                self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.stats_file.parent,
+                                                 prefix=f"{self.stats_file.name}.", suffix=".tmp",
+                                                 delete=False) as f:
+                    temp_path = f.name
+                    json.dump(data, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.stats_file)
+                temp_path = None
+            except Exception as e:
+                logger.error(f"Erro ao salvar histórico de tokens: {e}")
+            finally:
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.unlink(temp_path)
+    
+    def _percentile(self, lengths: Deque[int]) -> int:
+        ordered = sorted(lengths)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+        return ordered[index]
+    
+    def estimate(self, product: Product) -> int:
+        """Estimativa pelos dados de entrada, usada sem histórico"""
+        # Fornecedor detalhado rende descrição mais longa (~4 caracteres por token)
+        return self.base_tokens + len(product.descricao_fornecedor or '') // 4
+    
+    def budget(self, product: Product, max_tokens: int) -> int:
+        """num_predict para o produto, limitado a [min_tokens, max_tokens]"""
+        with self._lock:
+            lengths = self.lengths.get(self.category_of(product))
+            if not lengths or len(lengths) < self.min_samples:
+                lengths = self.lengths.get(ALL_CATEGORIES)
+            
+            if lengths and len(lengths) >= self.min_samples:
+                tokens = int(self._percentile(lengths) * self.margin)
+            else:
+                tokens = self.estimate(product)
+        
+        return max(self.min_tokens, min(tokens, max_tokens))
+    
+    def record(self, product: Product, eval_count: int, truncated: bool = False):
+        """Registra o tamanho de uma saída gerada"""
+        if not eval_count:
+            return
+        
+        # Saída cortada no limite subestima o tamanho real; inflar para o orçamento crescer
+        if truncated:
+            eval_count = int(eval_count * 1.5)
+        
+        with self._lock:
+            for category in (self.category_of(product), ALL_CATEGORIES):
+                if category not in self.lengths:
+                    self.lengths[category] = deque(maxlen=self.history_size)
+                self.lengths[category].append(eval_count)
+            
+            if truncated:
+                self.truncations += 1
+            self._unsaved += 1
+            should_save = self._unsaved >= 50
+        
+        if should_save:
+            self.save()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do histórico"""
+        with self._lock:
+            overall = self.lengths.get(ALL_CATEGORIES)
+            return {
+                'budget_categories': len([c for c in self.lengths if c != ALL_CATEGORIES]),
+                'budget_samples': len(overall) if overall else 0,
+                'budget_p_output_tokens': self._percentile(overall) if overall else None,
+                'budget_truncations': self.truncations
+            }
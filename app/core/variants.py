@@ -0,0 +1,159 @@
+"""
+Agrupamento de variantes (cor, tamanho) de um mesmo produto
+
+Planilhas de fornecedores repetem o mesmo item em várias linhas que só
+mudam a cor ou um sufixo de tamanho no nome. Essas linhas formam uma
+família: a descrição é gerada uma vez para um representante e adaptada
+para as demais trocando o nome e a cor (as "lacunas" da família).
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, FrozenSet, Optional
+
+from .models import Product
+from .cache import canonical_value
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Tokens de tamanho que aparecem como sufixo no nome
+SIZE_PATTERN = re.compile(
+    r'^(pp|p|m|g|gg|xg|xgg|eg|egg|u|unico|único|tam|tamanho|'
+    r'\d+([.,]\d+)?(cm|mm|m|ml|l|g|kg|w|v|pol)?|\d+x\d+(x\d+)?(cm|mm|m)?)$'
+)
+
+# Cores comuns citadas no nome mesmo quando a coluna Cor está vazia
+COLOR_WORDS = frozenset({
+    'azul', 'verde', 'vermelho', 'vermelha', 'preto', 'preta', 'branco', 'branca',
+    'amarelo', 'amarela', 'rosa', 'roxo', 'roxa', 'cinza', 'marrom', 'bege', 'laranja',
+    'dourado', 'dourada', 'prateado', 'prateada', 'natural', 'transparente', 'lilas',
+    'lilás', 'vinho', 'caramelo', 'grafite', 'nude', 'off', 'white', 'cobre', 'creme'
+})
+
+# Número com decimal opcional, como em "300ml", "1,5 L" ou "30x40cm"
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)?')
+
+# Número seguido de unidade separada por espaço ("300 ml" -> "300ml")
+UNIT_SPACING = re.compile(r'(\d)\s+(cm|mm|m|ml|l|g|kg|w|v|pol)(?!\w)')
+
+@dataclass
+class VariantCluster:
+    """Família de variantes: índices no lote original"""
+    representative: int
+    variants: List[int] = field(default_factory=list)
+
+def _tokens(value) -> List[str]:
+    return re.findall(r'\w+', canonical_value(value))
+
+def variant_signature(product: Product) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+    """Chave de bloco e conjunto de tokens usados na comparação
+    
+    Cor e tamanho ficam de fora: são justamente o que pode variar
+    dentro de uma família. Categorias, marca e material precisam ser
+    iguais (bloco); nome e descrição do fornecedor são comparados por
+    similaridade de conjuntos de tokens.
+    """
+    color_tokens = set(_tokens(product.cor))
+    name_tokens = [
+        token for token in _tokens(product.nome)
+        if token not in color_tokens and token not in COLOR_WORDS and not SIZE_PATTERN.match(token)
+    ]
+    
+    block = (
+        canonical_value(product.categoria1),
+        canonical_value(product.categoria2),
+        canonical_value(product.marca),
+        canonical_value(product.material),
+        ' '.join(name_tokens[:2])
+    )
+    tokens = frozenset(
+        [f"n:{token}" for token in name_tokens] +
+        [f"d:{token}" for token in _tokens(product.descricao_fornecedor)]
+    )
+    return block, tokens
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def cluster_variants(products: List[Product], threshold: float) -> List[VariantCluster]:
+    """Agrupa produtos quase idênticos; cada produto fica em exatamente uma família
+    
+    Dentro de cada bloco, um produto entra na primeira família cujo
+    representante tenha similaridade >= `threshold`; senão abre outra.
+    """
+    blocks: Dict[Tuple[str, ...], List[Tuple[VariantCluster, FrozenSet[str]]]] = {}
+    clusters: List[VariantCluster] = []
+    
+    for index, product in enumerate(products):
+        block, tokens = variant_signature(product)
+        candidates = blocks.setdefault(block, [])
+        
+        for cluster, representative_tokens in candidates:
+            if jaccard(tokens, representative_tokens) >= threshold:
+                cluster.variants.append(index)
+                break
+        else:
+            cluster = VariantCluster(representative=index)
+            candidates.append((cluster, tokens))
+            clusters.append(cluster)
+    
+    return clusters
+
+def _numbers(text: str) -> FrozenSet[float]:
+    """Valores numéricos do texto, com vírgula ou ponto decimal"""
+    return frozenset(float(number.replace(',', '.')) for number in NUMBER_PATTERN.findall(text))
+
+def _normalize_sizes(text: str) -> str:
+    """Forma canônica com número e unidade juntos"""
+    return UNIT_SPACING.sub(r'\1\2', canonical_value(text))
+
+def _replace_preserving_case(text: str, old: str, new: str) -> str:
+    """Substitui `old` por `new` (palavra inteira), mantendo maiúsculas do trecho"""
+    def replacement(match: re.Match) -> str:
+        found = match.group(0)
+        if found.isupper() and len(found) > 1:
+            return new.upper()
+        if found[:1].isupper():
+            return new[:1].upper() + new[1:]
+        return new.lower()
+    
+    return re.sub(rf'(?<!\w){re.escape(old)}(?!\w)', replacement, text, flags=re.IGNORECASE)
+
+def fill_slots(description: str, representative: Product, variant: Product) -> Optional[str]:
+    """Adapta a descrição do representante para uma variante
+    
+    Troca o nome completo e depois a cor. Retorna None se algum termo
+    exclusivo do representante (cor, tamanho) continuar no texto, em
+    qualquer grafia ("300ml", "300 ml", "300 mL"), ou se algum número
+    exclusivo dele aparecer: nesse caso a variante deve ser gerada
+    normalmente.
+    """
+    text = description
+    rep_name = (representative.nome or '').strip()
+    variant_name = (variant.nome or '').strip()
+    if rep_name and rep_name != variant_name:
+        text = _replace_preserving_case(text, rep_name, variant_name)
+    
+    rep_color = (representative.cor or '').strip()
+    variant_color = (variant.cor or '').strip()
+    if rep_color and variant_color and canonical_value(rep_color) != canonical_value(variant_color):
+        text = _replace_preserving_case(text, rep_color, variant_color)
+    
+    # Termos que só o representante tem não podem sobrar no texto
+    normalized = _normalize_sizes(text)
+    variant_terms = set(_tokens(variant.nome)) | set(_tokens(variant.cor))
+    leftovers = (set(_tokens(representative.nome)) | set(_tokens(representative.cor))) - variant_terms
+    for term in leftovers:
+        if re.search(rf'(?<!\w){re.escape(term)}(?!\w)', normalized):
+            return None
+    
+    # Números (medidas, capacidades) comparados pelo valor, com qualquer unidade ou grafia
+    rep_numbers = _numbers(canonical_value(representative.nome)) | _numbers(canonical_value(representative.cor))
+    variant_numbers = _numbers(canonical_value(variant.nome)) | _numbers(canonical_value(variant.cor))
+    if (rep_numbers - variant_numbers) & _numbers(normalized):
+        return None
+    
+    return text
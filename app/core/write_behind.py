@@ -0,0 +1,177 @@
+"""
+Gravação assíncrona (write-behind) das entradas do cache
+"""
+
+import atexit
+import signal
+import sys
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, List
+
+from .cache_backends import CacheBackend
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class WriteBehindFlusher:
+    """Acumula entradas alteradas e as grava em lote em uma thread própria
+    
+    `put` só registra a entrada na memória; a gravação acontece quando o
+    lote atinge `batch_size` ou a cada `interval` segundos, sempre fora
+    das threads de geração. Entradas repetidas da mesma chave ocupam uma
+    única posição no lote.
+    """
+    
+    def __init__(self, backend: CacheBackend, batch_size: int, interval: float):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.interval = interval
+        
+        self.flushes = 0
+        self.flushed_entries = 0
+        self.flush_errors = 0
+        
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # Serializa gravações da thread de fundo com flush() chamado por fora
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        
+        self._thread = threading.Thread(target=self._run, name="cache-flusher", daemon=True)
+        self._thread.start()
+    
+    def put(self, key: str, entry: Dict[str, Any]):
+        """Agenda a gravação da entrada"""
+        with self._lock:
+            if not self._stopped:
+                self._dirty[key] = entry
+                if len(self._dirty) >= self.batch_size:
+                    self._wake.set()
+                return
+        
+        # Depois do encerramento não há thread de fundo: gravar direto
+        self.backend.set(key, entry)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entrada ainda não gravada, se houver"""
+        return self._dirty.get(key)
+    
+    def discard(self, key: Optional[str] = None):
+        """Descarta uma entrada pendente (ou todas, sem `key`)"""
+        with self._lock:
+            if key is None:
+                self._dirty.clear()
+            else:
+                self._dirty.pop(key, None)
+    
+    def pending(self) -> int:
+        return len(self._dirty)
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            
+            if self._stopped:
+                return
+            
+            self.flush()
+    
+    def flush(self) -> int:
+        """Grava agora todas as entradas pendentes; retorna quantas"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._dirty = self._dirty, {}
+            
+            if not batch:
+                return 0
+            
+            start = time.time()
+            try:
+                self.backend.set_many(list(batch.items()))
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Erro ao gravar {len(batch)} entradas do cache: {e}")
+                
+                # Devolver ao lote, sem sobrescrever versões mais novas
+                with self._lock:
+                    for key, entry in batch.items():
+                        self._dirty.setdefault(key, entry)
+                return 0
+            
+            self.flushes += 1
+            self.flushed_entries += len(batch)
+            logger.debug(f"Cache gravado: {len(batch)} entradas em {time.time() - start:.3f}s")
+            return len(batch)
+    
+    def stop(self):
+        """Encerra a thread de fundo e grava o que estiver pendente"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+        
+        self._wake.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 5)
+        
+        # Novos put() já gravam direto; gravar o restante do lote
+        flushed = self.flush()
+        if flushed:
+            logger.info(f"Cache gravado no encerramento: {flushed} entradas")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'pending_writes': self.pending(),
+            'flushes': self.flushes,
+            'flushed_entries': self.flushed_entries,
+            'flush_errors': self.flush_errors
+        }
+
+_shutdown_callbacks: List[Callable[[], None]] = []
+_shutdown_lock = threading.Lock()
+_handlers_installed = False
+
+def _run_shutdown_callbacks():
+    with _shutdown_lock:
+        callbacks = list(_shutdown_callbacks)
+        _shutdown_callbacks.clear()
+    
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Erro ao encerrar cache: {e}")
+
+def _handle_sigterm(signum, frame):
+    # SystemExit executa os handlers do atexit, inclusive a gravação do cache
+    sys.exit(128 + signum)
+
+def register_shutdown(callback: Callable[[], None]):
+    """Executa `callback` no encerramento do processo (atexit e SIGTERM)"""
+    global _handlers_installed
+    
+    with _shutdown_lock:
+        _shutdown_callbacks.append(callback)
+        if _handlers_installed:
+            return
+        _handlers_installed = True
+    
+    atexit.register(_run_shutdown_callbacks)
+    
+    # SIGTERM (docker stop, kill) encerraria sem passar pelo atexit. Só é possível
+    # instalar o handler na thread principal e sem sobrescrever um já existente.
+    try:
+        if (threading.current_thread() is threading.main_thread() and
+                signal.getsignal(signal.SIGTERM) == signal.SIG_DFL):
+            signal.signal(signal.SIGTERM, _handle_sigterm)
+    except (ValueError, AttributeError):
+        pass
+
+def unregister_shutdown(callback: Callable[[], None]):
+    """Remove um callback registrado (ex.: cache já fechado)"""
+    with _shutdown_lock:
+        if callback in _shutdown_callbacks:
+            _shutdown_callbacks.remove(callback)
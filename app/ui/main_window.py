@@ -13,6 +13,7 @@ from ..core.generator import DescriptionGenerator
 from ..core.ai_client import AIClient
 from ..core.logger import get_logger
 from ..utils.file_handler import FileHandler
+from ..utils.cache_transfer import BUNDLE_SUFFIX, import_file, export_bundle
 
 logger = get_logger(__name__)
 
@@ -27,6 +28,9 @@ class MainWindow:
         try:
             self.generator = DescriptionGenerator()
             self.ai_client = AIClient()
+            
+            # Carregar modelos enquanto o usuário escolhe a planilha
+            self.generator.warm_up()
         except Exception as e:
             logger.error(f"Erro ao inicializar componentes: {e}")
             # Usar versões mock para desenvolvimento
@@ -141,6 +145,20 @@ class MainWindow:
             **self.styles.get_button_style('secondary')
         ).pack(side='left', padx=2)
         
+        tk.Button(
+            btn_frame,
+            text="📥 Importar Cache",
+            command=self._import_cache,
+            **self.styles.get_button_style('secondary')
+        ).pack(side='left', padx=2)
+        
+        tk.Button(
+            btn_frame,
+            text="📤 Exportar Cache",
+            command=self._export_cache,
+            **self.styles.get_button_style('secondary')
+        ).pack(side='left', padx=2)
+        
         # Info do arquivo
         self.file_info_label = tk.Label(
             file_frame,
@@ -171,6 +189,13 @@ class MainWindow:
             **self.styles.get_button_style('success')
         ).pack(side='left', padx=5)
         
+        tk.Button(
+            btn_main_frame,
+            text="⚡ Prévia",
+            command=self._start_stream_preview,
+            **self.styles.get_button_style('secondary')
+        ).pack(side='left', padx=5)
+        
         tk.Button(
             btn_main_frame,
             text="💾 Salvar Resultados",
@@ -283,6 +308,7 @@ class MainWindow:
         file_types = [
             ("Arquivos Excel", "*.xlsx *.xls"),
             ("Arquivos CSV", "*.csv"),
+            ("Arquivos Parquet", "*.parquet"),
             ("Todos os arquivos", "*.*")
         ]
         
@@ -356,10 +382,27 @@ class MainWindow:
             messagebox.showerror("Erro", "Gerador não disponível!")
             return
         
+        # Lote interrompido desta planilha: perguntar se deve continuar de onde parou
+        resume = True
+        try:
+            job = self.generator.job_status(self.df)
+        except Exception as e:
+            logger.error(f"Erro ao consultar trabalho anterior: {e}")
+            job = None
+        
+        if job and not job['finished'] and job['completed']:
+            resume = messagebox.askyesno(
+                "Retomar geração",
+                f"Esta planilha tem uma geração interrompida "
+                f"({job['completed']}/{job['total']} produtos concluídos).\n\n"
+                f"Deseja continuar de onde parou?\n"
+                f"(Não: recomeçar do início)"
+            )
+        
         # Executar em thread separada
-        threading.Thread(target=self._generate_descriptions, daemon=True).start()
+        threading.Thread(target=self._generate_descriptions, args=(resume,), daemon=True).start()
     
-    def _generate_descriptions(self):
+    def _generate_descriptions(self, resume: bool = True):
         """Gera descrições (executado em thread separada)"""
         try:
             self._update_status("Iniciando geração...")
@@ -376,7 +419,8 @@ class MainWindow:
             # Gerar descrições
             descriptions = self.generator.generate_from_dataframe(
                 self.df, 
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                resume=resume
             )
             
             # Adicionar coluna de descrições
@@ -398,18 +442,75 @@ class MainWindow:
             self._update_status(f"Erro: {e}")
             messagebox.showerror("Erro", f"Erro na geração:\n{e}")
     
+    def _start_stream_preview(self):
+        """Gera a descrição do primeiro produto exibindo o texto em tempo real"""
+        if self.df is None or len(self.df) == 0:
+            messagebox.showwarning("Aviso", "Carregue um arquivo primeiro!")
+            return
+        
+        if not self.generator:
+            messagebox.showerror("Erro", "Gerador não disponível!")
+            return
+        
+        threading.Thread(target=self._stream_preview, daemon=True).start()
+    
+    def _stream_preview(self):
+        """Executa a prévia em streaming (executado em thread separada)"""
+        try:
+            product = self.generator.product_from_row(self.df.iloc[0])
+            
+            def reset():
+                self.results_text.configure(state='normal')
+                self.results_text.delete('1.0', tk.END)
+                self.results_text.insert(tk.END, f"📦 {product.nome}\n")
+            
+            def append(token):
+                self.results_text.insert(tk.END, token)
+                self.results_text.see(tk.END)
+            
+            # Atualizações de widget sempre pela thread da interface
+            self.root.after(0, reset)
+            self._update_status(f"Gerando prévia: {product.nome}")
+            
+            result = self.generator.generate_single(
+                product,
+                on_token=lambda token: self.root.after(0, append, token)
+            )
+            
+            def finish():
+                self.results_text.insert(tk.END, "\n" + "-" * 80 + "\n")
+                self.results_text.configure(state='disabled')
+            
+            self.root.after(0, finish)
+            
+            if result.success and result.time_to_first_token is not None:
+                self._update_status(
+                    f"Prévia concluída: primeiro token em {result.time_to_first_token:.2f}s, "
+                    f"{result.tokens_per_second or 0:.1f} tokens/s"
+                )
+            elif result.success:
+                self._update_status("Prévia concluída (cache)")
+            else:
+                self._update_status(f"Erro na prévia: {result.error_message}")
+                
+        except Exception as e:
+            logger.error(f"Erro na prévia: {e}")
+            self._update_status(f"Erro: {e}")
+    
     def _display_results(self):
         """Exibe resultados na área de texto"""
         self.results_text.configure(state='normal')
         self.results_text.delete('1.0', tk.END)
         
-        for i, row in self.df.iterrows():
-            nome = row.get('Nome', '')
-            descricao = row.get('Descrição Comercial', '')
-            
-            self.results_text.insert(tk.END, f"📦 {nome}\n")
-            self.results_text.insert(tk.END, f"{descricao}\n")
-            self.results_text.insert(tk.END, "-" * 80 + "\n\n")
+        # Colunas lidas de uma vez e texto inserido numa única chamada (planilhas grandes)
+        empty = pd.Series('', index=self.df.index)
+        names = self.df.get('Nome', empty).tolist()
+        descriptions = self.df.get('Descrição Comercial', empty).tolist()
+        separator = "-" * 80
+        
+        self.results_text.insert(tk.END, ''.join(
+            f"📦 {nome}\n{descricao}\n{separator}\n\n" for nome, descricao in zip(names, descriptions)
+        ))
         
         self.results_text.configure(state='disabled')
     
@@ -435,6 +536,64 @@ class MainWindow:
             else:
                 messagebox.showerror("Erro", "Erro ao salvar arquivo")
     
+    def _import_cache(self):
+        """Importa planilhas finalizadas ou pacotes de cache"""
+        if not self.generator:
+            messagebox.showerror("Erro", "Gerador não disponível!")
+            return
+        
+        filenames = filedialog.askopenfilenames(
+            title="Importar para o cache",
+            filetypes=[
+                ("Planilhas e pacotes", f"*.xlsx *.xls *.csv *.parquet *{BUNDLE_SUFFIX}"),
+                ("Pacotes de cache", f"*{BUNDLE_SUFFIX}"),
+                ("Todos os arquivos", "*.*")
+            ]
+        )
+        
+        if filenames:
+            threading.Thread(target=self._run_cache_import, args=(filenames,), daemon=True).start()
+    
+    def _run_cache_import(self, filenames):
+        """Importa os arquivos para o cache (executado em thread separada)"""
+        imported = 0
+        errors = []
+        
+        for filename in filenames:
+            self._update_status(f"Importando para o cache: {Path(filename).name}")
+            try:
+                imported += import_file(self.generator, filename)['imported']
+            except Exception as e:
+                logger.error(f"Erro ao importar {filename}: {e}")
+                errors.append(f"{Path(filename).name}: {e}")
+        
+        self._update_status(f"Cache: {imported} entradas importadas, {self.generator.cache_manager.size()} no total")
+        if errors:
+            messagebox.showerror("Erro", "Erro ao importar:\n" + "\n".join(errors))
+        else:
+            messagebox.showinfo("Sucesso", f"{imported} descrições importadas para o cache")
+    
+    def _export_cache(self):
+        """Exporta o cache para um pacote"""
+        if not self.generator:
+            messagebox.showerror("Erro", "Gerador não disponível!")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            title="Exportar cache",
+            defaultextension=BUNDLE_SUFFIX,
+            filetypes=[("Pacotes de cache", f"*{BUNDLE_SUFFIX}")]
+        )
+        
+        if filename:
+            try:
+                count = export_bundle(self.generator.cache_manager, filename)
+                messagebox.showinfo("Sucesso", f"{count} entradas exportadas para:\n{filename}")
+                self._update_status(f"Cache exportado: {Path(filename).name}")
+            except Exception as e:
+                logger.error(f"Erro ao exportar cache: {e}")
+                messagebox.showerror("Erro", f"Erro ao exportar cache:\n{e}")
+    
     def _preview_results(self):
         """Abre janela de preview dos resultados"""
         if self.df is None:
@@ -0,0 +1,167 @@
+"""
+Importação e exportação do cache de descrições
+
+Duas origens alimentam o cache de uma instalação nova:
+
+- planilhas já finalizadas (Excel/CSV/Parquet com a coluna
+  "Descrição Comercial"), convertidas em entradas com a mesma chave
+  usada na geração;
+- pacotes de cache exportados por outra instalação (JSON Lines
+  compactado com gzip), mesclados mantendo a entrada mais recente.
+"""
+
+import os
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, Union, BinaryIO, Optional
+import pandas as pd
+
+from .file_handler import FileHandler
+from ..core.batch import ProductBatch
+from ..core.logger import get_logger
+
+logger = get_logger(__name__)
+
+DESCRIPTION_COLUMN = 'Descrição Comercial'
+
+BUNDLE_FORMAT = 'ia-cadastro-cache'
+BUNDLE_VERSION = 1
+BUNDLE_SUFFIX = '.cache.gz'
+
+# Entradas por transação ao importar pacotes
+IMPORT_BATCH_SIZE = 5000
+
+def is_bundle(filename: Union[str, Path]) -> bool:
+    """Pacotes de cache são arquivos .gz; o resto é tratado como planilha"""
+    return str(filename).lower().endswith('.gz')
+
+def import_dataframe(generator,
+                     df: pd.DataFrame,
+                     description_column: str = DESCRIPTION_COLUMN,
+                     model_used: Optional[str] = None,
+                     keep_existing: bool = True) -> Dict[str, Any]:
+    """Importa as descrições de uma planilha finalizada para o cache
+    
+    Linhas sem descrição ou com erro ("ERRO: ...") são ignoradas. As
+    chaves usam o modelo e os prompts atuais do gerador.
+    """
+    if description_column not in df.columns:
+        raise ValueError(f"Coluna '{description_column}' não encontrada na planilha")
+    
+    # Mesma limpeza aplicada antes da geração, para as chaves coincidirem
+    df = FileHandler.clean_data(df)
+    
+    # Texto aparado só no filtro: o cache guarda a célula como foi gerada (com o " - " inicial)
+    descriptions = df[description_column].fillna('').astype(str)
+    stripped = descriptions.str.strip()
+    valid = (stripped.str.len() > 0) & ~stripped.str.startswith('ERRO')
+    
+    products = list(ProductBatch.from_dataframe(df[valid]))
+    imported = generator.warm_cache(products, descriptions[valid].tolist(), model_used, keep_existing)
+    
+    logger.info(f"Planilha importada para o cache: {imported} de {len(df)} linhas")
+    
+    return {
+        'rows': len(df),
+        'valid': len(products),
+        'skipped': len(df) - len(products),
+        'imported': imported
+    }
+
+def import_spreadsheet(generator, file_path: Union[str, Path], **kwargs) -> Dict[str, Any]:
+    """Lê uma planilha (Excel/CSV/Parquet) e importa suas descrições"""
+    df = FileHandler.read_file(str(file_path))
+    if df is None:
+        raise ValueError(f"Não foi possível ler a planilha: {file_path}")
+    
+    return import_dataframe(generator, df, **kwargs)
+
+def export_bundle(cache_manager, target: Union[str, Path, BinaryIO]) -> int:
+    """Exporta as entradas válidas do cache para um pacote; retorna quantas
+    
+    Com um caminho, o pacote é escrito em arquivo temporário e renomeado
+    ao final, para nunca deixar um pacote incompleto no destino.
+    """
+    if isinstance(target, (str, Path)):
+        path = Path(target)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        
+        try:
+            with open(temp_path, 'wb') as f:
+                count = export_bundle(cache_manager, f)
+            os.replace(temp_path, path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        
+        logger.info(f"Pacote de cache exportado: {path} ({count} entradas)")
+        return count
+    
+    count = 0
+    with gzip.open(target, 'wt', encoding='utf-8') as f:
+        header = {'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION, 'created_at': time.time()}
+        f.write(json.dumps(header) + '\n')
+        
+        for key, entry in cache_manager.iter_entries():
+            f.write(json.dumps({
+                'k': key,
+                'd': entry['description'],
+                't': entry['timestamp'],
+                'e': entry['expires_at'],
+                'g': entry.get('generation_time'),
+                'm': entry.get('model_used')
+            }, ensure_ascii=False) + '\n')
+            count += 1
+    
+    return count
+
+def import_bundle(cache_manager,
+                  source: Union[str, Path, BinaryIO],
+                  keep_existing: bool = False) -> Dict[str, Any]:
+    """Mescla um pacote de cache; por padrão vence a entrada mais recente"""
+    entries = 0
+    imported = 0
+    batch = []
+    
+    with gzip.open(source, 'rt', encoding='utf-8') as f:
+        try:
+            header = json.loads(f.readline() or '{}')
+        except (OSError, ValueError):
+            header = {}  # Não é gzip/JSON
+        
+        if not isinstance(header, dict) or header.get('format') != BUNDLE_FORMAT:
+            raise ValueError("Arquivo não é um pacote de cache válido")
+        if header.get('version', 0) > BUNDLE_VERSION:
+            raise ValueError(f"Versão de pacote não suportada: {header.get('version')}")
+        
+        for line in f:
+            if not line.strip():
+                continue
+            
+            item = json.loads(line)
+            batch.append((item['k'], {
+                'description': item['d'],
+                'timestamp': item['t'],
+                'expires_at': item['e'],
+                'generation_time': item.get('g'),
+                'model_used': item.get('m')
+            }))
+            entries += 1
+            
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                imported += cache_manager.merge_entries(batch, keep_existing=keep_existing)
+                batch = []
+    
+    imported += cache_manager.merge_entries(batch, keep_existing=keep_existing)
+    logger.info(f"Pacote de cache importado: {imported} de {entries} entradas")
+    
+    return {'entries': entries, 'imported': imported, 'skipped': entries - imported}
+
+def import_file(generator, file_path: Union[str, Path], **kwargs) -> Dict[str, Any]:
+    """Importa um pacote de cache ou uma planilha, conforme a extensão"""
+    if is_bundle(file_path):
+        return import_bundle(generator.cache_manager, file_path, **kwargs)
+    return import_spreadsheet(generator, file_path, **kwargs)
@@ -2,6 +2,8 @@
 Manipulador de arquivos (Excel, CSV, etc.)
 """
 
+import importlib.util
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Any, Optional
@@ -10,10 +12,20 @@ from ..core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Texto em buffers Arrow contíguos: menos memória e operações vetorizadas em C++
+TEXT_DTYPE = None
+if importlib.util.find_spec("pyarrow") is not None:
+    try:
+        TEXT_DTYPE = pd.StringDtype("pyarrow")
+    except ImportError:
+        # Versão do pyarrow antiga demais para o pandas instalado
+        pass
+
 class FileHandler:
     """Manipulador de arquivos de dados"""
     
-    SUPPORTED_EXTENSIONS = ['.xlsx', '.xls', '.csv']
+    SUPPORTED_EXTENSIONS = ['.xlsx', '.xls', '.csv', '.parquet']
+    TEXT_COLUMNS = ['Nome', 'Material', 'Cor', 'Descrição Fornecedor', 'Categoria 1', 'Categoria 2', 'Marca']
     
     @staticmethod
     def read_file(file_path: str) -> Optional[pd.DataFrame]:
@@ -30,6 +42,8 @@ class FileHandler:
             # Ler arquivo baseado na extensão
             if path.suffix.lower() == '.csv':
                 df = pd.read_csv(file_path, encoding='utf-8')
+            elif path.suffix.lower() == '.parquet':
+                df = pd.read_parquet(file_path)  # Requer pyarrow
             else:  # Excel
                 df = pd.read_excel(file_path)
             
@@ -52,6 +66,8 @@ class FileHandler:
             # Salvar baseado na extensão
             if path.suffix.lower() == '.csv':
                 df.to_csv(file_path, index=False, encoding='utf-8')
+            elif path.suffix.lower() == '.parquet':
+                df.to_parquet(file_path, index=False)
             else:  # Excel
                 df.to_excel(file_path, index=False)
             
@@ -114,29 +130,78 @@ class FileHandler:
             logger.error(f"Erro ao gerar amostra: {e}")
             return {}
     
+    @staticmethod
+    def clean_text(series: pd.Series) -> pd.Series:
+        """Texto sem espaços nas pontas e vazio no lugar de nulos
+        
+        Com pyarrow instalado, a coluna vira `string[pyarrow]` e a limpeza
+        roda nos kernels do Arrow. Sem ele, só os valores distintos são
+        limpos (colunas de catálogo se repetem muito) e depois replicados
+        para as linhas, em vez de um `strip` por célula.
+        """
+        if TEXT_DTYPE is not None:
+            return series.astype(TEXT_DTYPE).str.strip().fillna('')
+        
+        missing = series.isna().to_numpy()
+        codes, uniques = pd.factorize(series.astype(str))
+        cleaned = np.array([value.strip() for value in uniques.tolist()] + [''], dtype=object)
+        codes[missing | (codes < 0)] = len(cleaned) - 1
+        return pd.Series(cleaned.take(codes), index=series.index)
+    
+    @staticmethod
+    def clean_number(series: pd.Series) -> pd.Series:
+        """`pd.to_numeric(errors='coerce')` aplicado só aos valores distintos"""
+        if pd.api.types.is_numeric_dtype(series):
+            return pd.to_numeric(series, errors='coerce')
+        
+        codes, uniques = pd.factorize(series)
+        numbers = pd.to_numeric(pd.Series(uniques.tolist(), dtype=object), errors='coerce').to_numpy()
+        if (codes < 0).any():
+            numbers = np.append(numbers.astype(float), np.nan)
+            codes[codes < 0] = len(numbers) - 1
+        return pd.Series(numbers.take(codes), index=series.index)
+    
     @staticmethod
     def clean_data(df: pd.DataFrame) -> pd.DataFrame:
-        """Limpa e padroniza dados"""
+        """Limpa e padroniza dados
+        
+        O DataFrame original não é modificado. As linhas mantidas são
+        escolhidas primeiro; depois cada coluna é filtrada e limpa uma
+        única vez, sem cópias intermediárias do DataFrame inteiro.
+        """
         try:
-            # Fazer cópia para não modificar original
-            cleaned_df = df.copy()
-            
-            # Remover linhas completamente vazias
-            cleaned_df = cleaned_df.dropna(how='all')
-            
-            # Preencher valores NaN com string vazia para colunas de texto
-            text_columns = ['Nome', 'Material', 'Cor', 'Descrição Fornecedor', 'Categoria 1', 'Categoria 2', 'Marca']
-            for col in text_columns:
-                if col in cleaned_df.columns:
-                    cleaned_df[col] = cleaned_df[col].fillna('').astype(str).str.strip()
-            
-            # Limpar coluna de preço se existir
-            if 'Preço' in cleaned_df.columns:
-                cleaned_df['Preço'] = pd.to_numeric(cleaned_df['Preço'], errors='coerce')
-            
-            # Remover linhas sem nome (obrigatório)
-            if 'Nome' in cleaned_df.columns:
-                cleaned_df = cleaned_df[cleaned_df['Nome'].str.len() > 0]
+            # Remover linhas completamente vazias e, se houver a coluna, sem nome (obrigatório)
+            keep = df.notna().any(axis=1).to_numpy()
+            names = None
+            if 'Nome' in df.columns:
+                names = FileHandler.clean_text(df['Nome'])
+                keep = keep & (names != '').to_numpy(dtype=bool)
+            
+            rows = None if keep.all() else np.flatnonzero(keep)
+            index = df.index if rows is None else df.index.take(rows)
+            
+            columns = {}
+            for position, col in enumerate(df.columns):
+                column = names if col == 'Nome' else df.iloc[:, position]
+                if rows is not None:
+                    # Filtra só os valores; todas as colunas compartilham o mesmo índice
+                    column = pd.Series(column.array.take(rows), index=index, copy=False)
+                elif col not in FileHandler.TEXT_COLUMNS:
+                    # Sem filtro, a coluna ainda seria a mesma do original (texto já sai novo da limpeza)
+                    column = column.copy()
+                
+                # Colunas de texto: nulos viram string vazia
+                if col in FileHandler.TEXT_COLUMNS and col != 'Nome':
+                    column = FileHandler.clean_text(column)
+                # Limpar coluna de preço se existir
+                elif col == 'Preço':
+                    column = FileHandler.clean_number(column)
+                
+                columns[position] = column
+            
+            # Posições como chaves: preserva colunas com nome repetido
+            cleaned_df = pd.DataFrame(columns, copy=False)
+            cleaned_df.columns = df.columns
             
             logger.info(f"Dados limpos: {len(df)} -> {len(cleaned_df)} linhas")
             return cleaned_df
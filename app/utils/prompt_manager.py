@@ -2,9 +2,12 @@
 Gerenciador de prompts personalizados
 """
 
+import re
 import json
+import string
+import hashlib
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 from ..core.models import Product
 from ..core.logger import get_logger
@@ -65,16 +68,7 @@ class PromptManager:
         """Formata o prompt com os dados do produto"""
         try:
             # Preparar dados do produto
-            product_data = {
-                'nome': product.nome or '',
-                'material': product.material or '',
-                'cor': product.cor or '',
-                'descricao_fornecedor': product.descricao_fornecedor or '',
-                'categoria1': product.categoria1 or '',
-                'categoria2': product.categoria2 or '',
-                'marca': product.marca or '',
-                'preco': f"R$ {product.preco:.2f}" if product.preco else ''
-            }
+            product_data = self._product_data(product)
             
             # Formatar template
             formatted_prompt = self.template.format(**product_data)
@@ -86,6 +80,140 @@ class PromptManager:
             # Fallback para prompt simples
             return f"Crie uma descrição comercial para o produto: {product.nome}"
     
+    def _product_data(self, product: Product) -> Dict[str, str]:
+        """Valores do produto para preencher o template"""
+        return {
+            'nome': product.nome or '',
+            'material': product.material or '',
+            'cor': product.cor or '',
+            'descricao_fornecedor': product.descricao_fornecedor or '',
+            'categoria1': product.categoria1 or '',
+            'categoria2': product.categoria2 or '',
+            'marca': product.marca or '',
+            'preco': f"R$ {product.preco:.2f}" if product.preco else ''
+        }
+    
+    def template_fields(self) -> List[str]:
+        """Variáveis do produto usadas pelo template atual"""
+        return sorted({field for _, field, _, _ in string.Formatter().parse(self.template) if field})
+    
+    def template_hash(self) -> str:
+        """Identifica a versão dos prompts (template + system) em uso"""
+        data = f"{self.template}\0{self.system_prompt}"
+        return hashlib.md5(data.encode('utf-8')).hexdigest()[:12]
+    
+    def split_template(self) -> Tuple[str, str]:
+        """Separa o template em instruções fixas e bloco por produto
+        
+        Linhas que contêm variáveis ({nome}, {cor}...) formam o bloco do
+        produto; as demais são instruções comuns a todos os produtos.
+        """
+        instructions = []
+        product_lines = []
+        
+        for line in self.template.splitlines():
+            has_field = any(field for _, field, _, _ in string.Formatter().parse(line))
+            if has_field:
+                product_lines.append(line)
+            elif line.strip():
+                instructions.append(line)
+        
+        return '\n'.join(instructions), '\n'.join(product_lines)
+    
+    def system_prefix(self) -> str:
+        """Prefixo fixo (system prompt + instruções do template)
+        
+        Enviado no campo `system` do Ollama: como é idêntico em todas as
+        chamadas, o servidor reaproveita os tokens já avaliados e só
+        processa a parte do prompt específica de cada produto.
+        """
+        instructions, _ = self.split_template()
+        return '\n\n'.join(part for part in (self.system_prompt, instructions) if part)
+    
+    def format_prompt_parts(self, product: Product) -> Tuple[str, str]:
+        """Retorna (system, prompt) com as instruções separadas dos dados do produto"""
+        _, product_block = self.split_template()
+        
+        # Template sem variáveis: não há o que separar
+        if not product_block:
+            return self.system_prompt, self.format_prompt(product)
+        
+        try:
+            return self.system_prefix(), product_block.format(**self._product_data(product))
+        except Exception as e:
+            logger.error(f"Erro ao formatar prompt: {e}")
+            return self.system_prompt, self.format_prompt(product)
+    
+    def format_packed_prompt(self, products: List[Product]) -> str:
+        """Monta um único prompt com vários produtos numerados
+        
+        As instruções do template vão no `system_prefix`; o prompt traz
+        apenas os produtos e pede um objeto JSON {"1": "...", "2": "..."}
+        indexado pela numeração.
+        """
+        _, product_block = self.split_template()
+        product_block = product_block or "Nome: {nome}"
+        
+        items = []
+        for index, product in enumerate(products, start=1):
+            try:
+                rendered = product_block.format(**self._product_data(product))
+            except Exception as e:
+                logger.error(f"Erro ao formatar produto no prompt agrupado: {e}")
+                rendered = f"Nome: {product.nome}"
+            items.append(f"[{index}]\n{rendered}")
+        
+        example = ', '.join(f'"{i}": "descrição do item {i}"' for i in range(1, min(len(products), 2) + 1))
+        
+        return (
+            f"Escreva uma descrição independente para cada um dos {len(products)} itens abaixo.\n"
+            f"Responda somente com um objeto JSON no formato {{{example}}}, "
+            f"usando como chave o número de cada item.\n\n"
+            + '\n\n'.join(items)
+        )
+    
+    def parse_packed_response(self, response: str, count: int) -> Dict[int, str]:
+        """Extrai as descrições de uma resposta JSON agrupada
+        
+        Retorna apenas os itens válidos (índice de 1 a `count` com texto
+        não vazio); os demais devem ser gerados individualmente.
+        """
+        data = None
+        try:
+            data = json.loads(response)
+        except (json.JSONDecodeError, TypeError):
+            # Tentar o primeiro objeto JSON dentro do texto
+            match = re.search(r'\{.*\}', response or '', re.DOTALL)
+            if match:
+                try:
+                    data = json.loads(match.group(0))
+                except json.JSONDecodeError:
+                    data = None
+        
+        # Aceitar também {"itens": [...]} ou uma lista direta
+        if isinstance(data, dict) and len(data) == 1:
+            only_value = next(iter(data.values()))
+            if isinstance(only_value, list):
+                data = only_value
+        if isinstance(data, list):
+            data = {str(i): value for i, value in enumerate(data, start=1)}
+        
+        if not isinstance(data, dict):
+            logger.warning("Resposta agrupada não contém JSON válido")
+            return {}
+        
+        parsed = {}
+        for key, value in data.items():
+            match = re.search(r'\d+', str(key))
+            if not match or not isinstance(value, str) or not value.strip():
+                continue
+            
+            index = int(match.group(0))
+            if 1 <= index <= count:
+                parsed[index] = value.strip()
+        
+        return parsed
+    
     def process_response_for_excel(self, response: str) -> str:
         """Processa resposta para formato Excel com quebras de linha"""
         try:
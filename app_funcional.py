@@ -368,13 +368,15 @@ class GeradorDescricoesApp:
         """Exibe resultados"""
         self.results_text.delete('1.0', tk.END)
         
-        for i, row in self.df.iterrows():
-            nome = row.get('Nome', '')
-            descricao = row.get('Descrição Comercial', '')
-            
-            self.results_text.insert(tk.END, f"📦 {nome}\n")
-            self.results_text.insert(tk.END, f"{descricao}\n")
-            self.results_text.insert(tk.END, "-" * 80 + "\n\n")
+        # Colunas lidas de uma vez e texto inserido numa única chamada (planilhas grandes)
+        empty = pd.Series('', index=self.df.index)
+        names = self.df.get('Nome', empty).tolist()
+        descriptions = self.df.get('Descrição Comercial', empty).tolist()
+        separator = "-" * 80
+        
+        self.results_text.insert(tk.END, ''.join(
+            f"📦 {nome}\n{descricao}\n{separator}\n\n" for nome, descricao in zip(names, descriptions)
+        ))
     
     def save_results(self):
         """Salva resultados"""
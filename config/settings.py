@@ -18,10 +18,33 @@ for directory in [DATA_DIR, LOGS_DIR, CACHE_DIR, ASSETS_DIR]:
     directory.mkdir(exist_ok=True)
 
 # Configurações do Ollama
+# OLLAMA_URLS aceita vários servidores separados por vírgula
+OLLAMA_URLS = [
+    url.strip()
+    for url in os.getenv("OLLAMA_URLS", os.getenv("OLLAMA_URL", "http://localhost:11434")).split(",")
+    if url.strip()
+]
+
 OLLAMA_CONFIG = {
-    "base_url": os.getenv("OLLAMA_URL", "http://localhost:11434"),
+    "base_url": OLLAMA_URLS[0],
+    "base_urls": OLLAMA_URLS,
+    "health_interval": float(os.getenv("OLLAMA_HEALTH_INTERVAL", "30")),
     "timeout": int(os.getenv("OLLAMA_TIMEOUT", "60")),
-    "default_model": os.getenv("DEFAULT_MODEL", "gemma2:2b")
+    "default_model": os.getenv("DEFAULT_MODEL", "gemma2:2b"),
+    # Tempo que o Ollama mantém o modelo carregado após cada chamada
+    "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+    # Modelos pré-carregados na inicialização (separados por vírgula)
+    "warmup_models": [
+        model.strip()
+        for model in os.getenv("WARMUP_MODELS", os.getenv("DEFAULT_MODEL", "gemma2:2b")).split(",")
+        if model.strip()
+    ],
+    # Carga acima deste tempo (s) conta como partida a frio
+    "cold_start_threshold": float(os.getenv("COLD_START_THRESHOLD", "0.5")),
+    # Limites por servidor
+    "pool_size": int(os.getenv("OLLAMA_POOL_SIZE", "20")),
+    "max_concurrency": int(os.getenv("OLLAMA_MAX_CONCURRENCY", "8")),
+    "keepalive_timeout": float(os.getenv("OLLAMA_KEEPALIVE_TIMEOUT", "30"))
 }
 
 # Modelos disponíveis
@@ -32,7 +55,8 @@ AVAILABLE_MODELS = {
         "speed": "Média",
         "quality": "Boa",
         "description": "Modelo equilibrado, recomendado para uso geral",
-        "recommended": True
+        "recommended": True,
+        "tier": 1  # Ordem no modo cascata: menor = mais rápido
     },
     "phi3:mini": {
         "name": "Phi3 Mini", 
@@ -40,7 +64,8 @@ AVAILABLE_MODELS = {
         "speed": "Lenta",
         "quality": "Excelente",
         "description": "Alta qualidade, melhor para textos complexos",
-        "recommended": False
+        "recommended": False,
+        "tier": 2
     },
     "tinyllama": {
         "name": "TinyLlama",
@@ -48,7 +73,8 @@ AVAILABLE_MODELS = {
         "speed": "Rápida",
         "quality": "Básica",
         "description": "Muito rápido, qualidade básica",
-        "recommended": False
+        "recommended": False,
+        "tier": 0
     }
 }
 
@@ -56,8 +82,30 @@ AVAILABLE_MODELS = {
 GENERATION_CONFIG = {
     "temperature": float(os.getenv("TEMPERATURE", "0.7")),
     "max_tokens": int(os.getenv("MAX_TOKENS", "500")),
-    "max_workers": int(os.getenv("MAX_WORKERS", "2")),
+    "max_workers": int(os.getenv("MAX_WORKERS", "2")),  # Por servidor Ollama
     "use_cache": os.getenv("USE_CACHE", "true").lower() == "true",
+    "adaptive_concurrency": os.getenv("ADAPTIVE_CONCURRENCY", "false").lower() == "true",
+    "pack_size": int(os.getenv("PACK_SIZE", "1")),  # Produtos por chamada ao modelo
+    # Cascata: modelo mais rápido primeiro, mais forte só quando a verificação falha
+    "cascade": os.getenv("CASCADE", "false").lower() == "true",
+    "cascade_models": [m.strip() for m in os.getenv("CASCADE_MODELS", "").split(",") if m.strip()],
+    "quality_min_chars": int(os.getenv("QUALITY_MIN_CHARS", "120")),
+    "quality_max_chars": int(os.getenv("QUALITY_MAX_CHARS", "2000")),
+    "quality_max_repetition": float(os.getenv("QUALITY_MAX_REPETITION", "0.3")),
+    # num_predict por produto; max_tokens continua como teto
+    "adaptive_tokens": os.getenv("ADAPTIVE_TOKENS", "true").lower() == "true",
+    "budget_base_tokens": int(os.getenv("BUDGET_BASE_TOKENS", "200")),
+    "budget_min_tokens": int(os.getenv("BUDGET_MIN_TOKENS", "64")),
+    "budget_min_samples": int(os.getenv("BUDGET_MIN_SAMPLES", "20")),
+    "budget_percentile": float(os.getenv("BUDGET_PERCENTILE", "0.95")),
+    "budget_margin": float(os.getenv("BUDGET_MARGIN", "1.2")),
+    "budget_history_size": int(os.getenv("BUDGET_HISTORY_SIZE", "500")),
+    # Encerram a geração no início de comentários extras (a descrição pode ter vários parágrafos)
+    "stop_sequences": [s.replace("\\n", "\n") for s in
+                       os.getenv("STOP_SEQUENCES", "\\n#,\\n**,Nota:,Observação:").split(",") if s],
+    # Variantes (cor, tamanho) do mesmo produto: uma geração por família
+    "variant_clustering": os.getenv("VARIANT_CLUSTERING", "false").lower() == "true",
+    "variant_threshold": float(os.getenv("VARIANT_THRESHOLD", "0.8")),  # Similaridade mínima (Jaccard)
     "cache_ttl": int(os.getenv("CACHE_TTL", "86400"))  # 24 horas
 }
 
@@ -103,10 +151,44 @@ DEFAULT_SYSTEM_PROMPT = "Você é um especialista em descrições comerciais par
 
 # Configurações de performance
 PERFORMANCE_CONFIG = {
-    "batch_size": int(os.getenv("BATCH_SIZE", "10")),
+    # Produtos lidos por vez na geração em lote (consulta ao cache e agrupamento de variantes)
+    "batch_size": int(os.getenv("BATCH_SIZE", "100")),
     "retry_attempts": int(os.getenv("RETRY_ATTEMPTS", "3")),
     "retry_delay": float(os.getenv("RETRY_DELAY", "1.0")),
-    "memory_limit": os.getenv("MEMORY_LIMIT", "2GB")
+    "retry_max_delay": float(os.getenv("RETRY_MAX_DELAY", "30.0")),
+    "breaker_failure_threshold": int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+    "breaker_reset_timeout": float(os.getenv("BREAKER_RESET_TIMEOUT", "30.0")),
+    "memory_limit": os.getenv("MEMORY_LIMIT", "2GB"),
+    # Controle adaptativo de concorrência (AIMD), limites por servidor
+    "adaptive_min_workers": int(os.getenv("ADAPTIVE_MIN_WORKERS", "1")),
+    "adaptive_max_workers": int(os.getenv("ADAPTIVE_MAX_WORKERS", "8")),
+    "latency_tolerance": float(os.getenv("LATENCY_TOLERANCE", "2.0"))
+}
+
+# Configurações do cache de descrições
+CACHE_CONFIG = {
+    "backend": os.getenv("CACHE_BACKEND", "sqlite"),  # sqlite ou pickle
+    "db_file": os.getenv("CACHE_DB_FILE", "descriptions_cache.db"),
+    "busy_timeout": float(os.getenv("CACHE_BUSY_TIMEOUT", "10.0")),
+    # Camada em memória: fração de PERFORMANCE_CONFIG["memory_limit"], ou limite explícito
+    "memory_fraction": float(os.getenv("CACHE_MEMORY_FRACTION", "0.1")),
+    "memory_limit": os.getenv("CACHE_MEMORY_LIMIT", ""),
+    "shards": int(os.getenv("CACHE_SHARDS", "16")),  # Fatias com lock próprio na memória
+    # Gravação em segundo plano: a cada N entradas novas ou a cada intervalo (s)
+    "flush_batch_size": int(os.getenv("CACHE_FLUSH_BATCH_SIZE", "200")),
+    "flush_interval": float(os.getenv("CACHE_FLUSH_INTERVAL", "2.0")),
+    "ttl": GENERATION_CONFIG["cache_ttl"],
+    # Descrições aceitas com problemas de qualidade expiram antes
+    "low_quality_ttl": int(os.getenv("CACHE_LOW_QUALITY_TTL", "3600")),
+    # Remoção de expiradas em segundo plano: intervalo (s) e entradas por lote
+    "sweep_interval": float(os.getenv("CACHE_SWEEP_INTERVAL", "300")),
+    "sweep_batch_size": int(os.getenv("CACHE_SWEEP_BATCH_SIZE", "1000"))
+}
+
+# Trabalhos em lote retomáveis (diário em data/jobs)
+JOBS_CONFIG = {
+    "fsync_every": int(os.getenv("JOBS_FSYNC_EVERY", "50")),  # Linhas entre gravações forçadas no disco
+    "retention_days": float(os.getenv("JOBS_RETENTION_DAYS", "7"))
 }
 
 def get_config() -> Dict[str, Any]:
@@ -119,6 +201,8 @@ def get_config() -> Dict[str, Any]:
         "api": API_CONFIG,
         "logging": LOGGING_CONFIG,
         "performance": PERFORMANCE_CONFIG,
+        "cache": CACHE_CONFIG,
+        "jobs": JOBS_CONFIG,
         "prompts": {
             "template": DEFAULT_PROMPT_TEMPLATE,
             "system": DEFAULT_SYSTEM_PROMPT
@@ -6,9 +6,14 @@ echo "🚀 Iniciando Gerador de Descrições Pro..."
 echo "📡 Iniciando Ollama..."
 ollama serve &
 
-# Aguardar Ollama inicializar
+# Aguardar Ollama inicializar (até 60s)
 echo "⏳ Aguardando Ollama inicializar..."
-sleep 15
+for i in $(seq 1 60); do
+    if curl -sf http://localhost:11434/api/tags > /dev/null 2>&1; then
+        break
+    fi
+    sleep 1
+done
 
 # Verificar se Ollama está rodando
 if curl -f http://localhost:11434/api/tags > /dev/null 2>&1; then
@@ -28,6 +33,8 @@ else
     echo "✅ Modelo já disponível"
 fi
 
+# A API pré-carrega os modelos de WARMUP_MODELS ao iniciar
+
 # Iniciar API Flask
 echo "🌐 Iniciando API Flask..."
 cd /app
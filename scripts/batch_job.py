@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Processamento de planilhas em lote, com retomada após interrupções
+
+Uso:
+    python scripts/batch_job.py run planilha.xlsx [-o saida.xlsx] [--restart]
+    python scripts/batch_job.py resume JOB_ID [-o saida.xlsx]
+    python scripts/batch_job.py list
+
+Cada produto concluído é registrado no diário do trabalho (data/jobs).
+Interrompido (Ctrl+C, queda, desligamento), o mesmo comando `run` ou
+`resume` continua de onde parou, sem gerar de novo o que já estava pronto.
+"""
+
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core import DescriptionGenerator
+from app.core.jobs import list_jobs
+from app.utils.file_handler import FileHandler
+
+def _progress(current: int, total: int):
+    print(f"\r   {current}/{total} ({int(current / total * 100) if total else 100}%)", end='', flush=True)
+
+def _save(df, descriptions, output: str) -> bool:
+    df['Descrição Comercial'] = descriptions
+    successful = sum(1 for desc in descriptions if not desc.startswith('ERRO'))
+    print(f"\n✅ {successful}/{len(descriptions)} sucessos")
+    
+    if not FileHandler().save_file(df, output):
+        print(f"❌ Erro ao salvar {output}")
+        return False
+    
+    print(f"💾 Resultado salvo em {output}")
+    return True
+
+def _default_output(name: str) -> str:
+    return f"{name}_descricoes.xlsx"
+
+def cmd_run(generator: DescriptionGenerator, args) -> bool:
+    file_handler = FileHandler()
+    df = file_handler.read_file(args.file)
+    if df is None:
+        print(f"❌ Não foi possível ler {args.file}")
+        return False
+    
+    df = file_handler.clean_data(df)
+    validation = file_handler.validate_columns(df)
+    if not validation['valid']:
+        print(f"❌ Colunas obrigatórias faltando: {', '.join(validation['missing_required'])}")
+        return False
+    
+    descriptions = generator.generate_from_dataframe(df, _progress, resume=not args.restart)
+    job = generator.last_job
+    if job['resumed']:
+        print(f"\n🔁 Trabalho {job['job_id']}: {job['resumed']} linhas retomadas do diário")
+    
+    return _save(df, descriptions, args.output or _default_output(Path(args.file).stem))
+
+def cmd_resume(generator: DescriptionGenerator, args) -> bool:
+    df, descriptions = generator.resume_job(args.job_id, _progress)
+    print(f"\n🔁 {generator.last_job['resumed']} linhas retomadas do diário")
+    return _save(df, descriptions, args.output or _default_output(args.job_id))
+
+def cmd_list(generator: DescriptionGenerator, args) -> bool:
+    jobs = list_jobs()
+    if not jobs:
+        print("Nenhum trabalho registrado")
+    
+    for job in jobs:
+        status = "concluído" if job['finished'] else "interrompido"
+        updated = datetime.fromtimestamp(job['updated_at']).strftime('%d/%m/%Y %H:%M') if job['updated_at'] else '-'
+        print(f"{job['job_id']}  {job['completed']:>6}/{job['total']:<6} "
+              f"falhas: {job['failed']:<4} {status:<12} {updated}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera descrições de planilhas com retomada de trabalhos interrompidos")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = subparsers.add_parser('run', help="Processa uma planilha (retoma se já iniciada)")
+    run_parser.add_argument('file')
+    run_parser.add_argument('-o', '--output', help="Planilha de saída (padrão: <nome>_descricoes.xlsx)")
+    run_parser.add_argument('--restart', action='store_true', help="Descarta o progresso anterior")
+    
+    resume_parser = subparsers.add_parser('resume', help="Retoma um trabalho pelo identificador")
+    resume_parser.add_argument('job_id')
+    resume_parser.add_argument('-o', '--output', help="Planilha de saída (padrão: <job_id>_descricoes.xlsx)")
+    
+    subparsers.add_parser('list', help="Lista os trabalhos registrados")
+    
+    args = parser.parse_args()
+    
+    generator = DescriptionGenerator()
+    commands = {'run': cmd_run, 'resume': cmd_resume, 'list': cmd_list}
+    
+    try:
+        success = commands[args.command](generator, args)
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrompido; o progresso foi salvo. Para continuar, repita o comando.")
+        success = False
+    except ValueError as e:
+        print(f"❌ {e}")
+        success = False
+    finally:
+        generator.cache_manager.close()
+    
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: produtos da planilha via iterrows vs. lote colunar (ProductBatch)
+
+Uso:
+    python scripts/benchmark_dataframe_products.py [linhas] [repetições]
+
+Exemplo:
+    python scripts/benchmark_dataframe_products.py 100000 3
+
+Mede só a preparação antes da primeira chamada ao modelo: montar os
+produtos e o texto exibido na interface. Não precisa do Ollama.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core import DescriptionGenerator
+from app.core.batch import ProductBatch
+
+def build_frame(rows: int) -> pd.DataFrame:
+    """Planilha de exemplo com células vazias espalhadas"""
+    rng = np.random.default_rng(42)
+    materiais = np.array(["Cerâmica", "Madeira", "Vidro", "Metal", "Algodão", None], dtype=object)
+    cores = np.array(["Branco", "Preto", "Azul", "Verde", "Natural", None], dtype=object)
+
+    precos = rng.uniform(10, 500, rows).round(2)
+    precos[rng.random(rows) < 0.1] = np.nan
+
+    return pd.DataFrame({
+        'Nome': [f"Produto {i}" for i in range(rows)],
+        'Material': materiais[rng.integers(0, len(materiais), rows)],
+        'Cor': cores[rng.integers(0, len(cores), rows)],
+        'Descrição Fornecedor': "Peça decorativa para ambientes internos",
+        'Categoria 1': "Decoração",
+        'Categoria 2': None,
+        'Preço': precos,
+        'Marca': "Marca Teste",
+        'Descrição Comercial': [f"Descrição do produto {i}" for i in range(rows)]
+    })
+
+def products_iterrows(df: pd.DataFrame):
+    return [DescriptionGenerator.product_from_row(row) for _, row in df.iterrows()]
+
+def products_columnar(df: pd.DataFrame):
+    return list(ProductBatch.from_dataframe(df))
+
+def display_iterrows(df: pd.DataFrame) -> str:
+    parts = []
+    for _, row in df.iterrows():
+        parts.append(f"📦 {row.get('Nome', '')}\n")
+        parts.append(f"{row.get('Descrição Comercial', '')}\n")
+        parts.append("-" * 80 + "\n\n")
+    return ''.join(parts)
+
+def display_columnar(df: pd.DataFrame) -> str:
+    separator = "-" * 80
+    return ''.join(
+        f"📦 {nome}\n{descricao}\n{separator}\n\n"
+        for nome, descricao in zip(df['Nome'].tolist(), df['Descrição Comercial'].tolist())
+    )
+
+def best_time(function, df: pd.DataFrame, repeats: int):
+    """Menor tempo entre as repetições e o último resultado"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    df = build_frame(rows)
+    print(f"📊 Preparação do lote: {rows} linhas, melhor de {repeats}")
+    print(f"{'etapa':<10} {'iterrows (s)':>13} {'colunar (s)':>12} {'ganho':>7}")
+
+    checks = []
+    for name, baseline, columnar in (
+        ('produtos', products_iterrows, products_columnar),
+        ('exibição', display_iterrows, display_columnar)
+    ):
+        baseline_time, expected = best_time(baseline, df, repeats)
+        columnar_time, result = best_time(columnar, df, repeats)
+        checks.append(result == expected)
+
+        print(f"{name:<10} {baseline_time:>13.3f} {columnar_time:>12.3f} "
+              f"{baseline_time / columnar_time if columnar_time else 0.0:>6.1f}x")
+
+    if not all(checks):
+        print("❌ Resultados diferentes entre os dois caminhos")
+        sys.exit(1)
+    print("✅ Resultados idênticos")
+
+if __name__ == "__main__":
+    main()
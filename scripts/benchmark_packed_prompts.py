@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: um produto por chamada vs. vários produtos por prompt
+
+Uso:
+    python scripts/benchmark_packed_prompts.py [quantidade] [tamanhos...]
+
+Exemplo:
+    python scripts/benchmark_packed_prompts.py 40 1 4 8
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core import DescriptionGenerator
+from app.core.models import Product
+
+def build_products(count: int, run_id: str):
+    """Cria produtos de exemplo com nomes únicos para não acertar o cache"""
+    materiais = ["Cerâmica", "Madeira", "Vidro", "Metal", "Algodão"]
+    cores = ["Branco", "Preto", "Azul", "Verde", "Natural"]
+
+    return [
+        Product(
+            nome=f"Produto Teste {run_id}-{i}",
+            material=materiais[i % len(materiais)],
+            cor=cores[i % len(cores)],
+            descricao_fornecedor="Peça decorativa para ambientes internos",
+            categoria1="Decoração",
+            categoria2="Casa"
+        )
+        for i in range(count)
+    ]
+
+def run(generator: DescriptionGenerator, count: int, pack_size: int) -> dict:
+    """Executa um lote com o tamanho de grupo informado"""
+    generator.update_config(pack_size=pack_size)
+    calls_before = generator.packed_calls
+    fallbacks_before = generator.packed_fallbacks
+
+    products = build_products(count, f"{pack_size}-{int(time.time())}")
+
+    start = time.time()
+    results = generator.generate_batch(products)
+    elapsed = time.time() - start
+
+    successful = sum(1 for r in results if r.success)
+    return {
+        'pack_size': pack_size,
+        'elapsed': elapsed,
+        'throughput': successful / elapsed if elapsed else 0.0,
+        'successful': successful,
+        'packed_calls': generator.packed_calls - calls_before,
+        'fallbacks': generator.packed_fallbacks - fallbacks_before
+    }
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    pack_sizes = [int(arg) for arg in sys.argv[2:]] or [1, 4, 8]
+
+    generator = DescriptionGenerator()
+    if not generator.ai_client.is_available():
+        print("❌ Ollama não está disponível")
+        sys.exit(1)
+
+    print(f"📊 Benchmark de prompts agrupados: {count} produtos, modelo {generator.config.model_id}")
+    print(f"{'grupo':>6} {'tempo (s)':>10} {'prod/s':>8} {'sucessos':>9} {'chamadas':>9} {'fallbacks':>10}")
+
+    baseline = None
+    for pack_size in pack_sizes:
+        stats = run(generator, count, pack_size)
+        baseline = baseline or stats['throughput']
+        speedup = stats['throughput'] / baseline if baseline else 0.0
+
+        print(f"{stats['pack_size']:>6} {stats['elapsed']:>10.2f} {stats['throughput']:>8.2f} "
+              f"{stats['successful']:>9} {stats['packed_calls']:>9} {stats['fallbacks']:>10}"
+              f"   ({speedup:.2f}x)")
+
+if __name__ == "__main__":
+    main()
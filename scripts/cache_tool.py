@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Ferramenta de linha de comando do cache de descrições
+
+Uso:
+    python scripts/cache_tool.py import planilha.xlsx [outras...] [--column COLUNA] [--model MODELO]
+    python scripts/cache_tool.py import pacote.cache.gz [--keep-existing]
+    python scripts/cache_tool.py export pacote.cache.gz
+    python scripts/cache_tool.py stats
+
+Planilhas finalizadas (Excel/CSV/Parquet) entram com a chave do modelo e
+dos prompts atuais; pacotes (.gz) são mesclados mantendo a entrada mais
+recente.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core import DescriptionGenerator
+from app.utils.cache_transfer import (
+    DESCRIPTION_COLUMN, is_bundle, import_bundle, import_spreadsheet, export_bundle
+)
+
+def cmd_import(generator: DescriptionGenerator, args) -> bool:
+    if args.model:
+        generator.update_config(model_id=args.model)
+    
+    success = True
+    for file_path in args.files:
+        try:
+            if is_bundle(file_path):
+                stats = import_bundle(generator.cache_manager, file_path, keep_existing=args.keep_existing)
+                print(f"✅ {file_path}: {stats['imported']} de {stats['entries']} entradas importadas")
+            else:
+                stats = import_spreadsheet(
+                    generator, file_path,
+                    description_column=args.column,
+                    keep_existing=not args.replace
+                )
+                print(f"✅ {file_path}: {stats['imported']} de {stats['rows']} linhas importadas "
+                      f"({stats['skipped']} sem descrição)")
+        except Exception as e:
+            print(f"❌ {file_path}: {e}")
+            success = False
+    
+    return success
+
+def cmd_export(generator: DescriptionGenerator, args) -> bool:
+    count = export_bundle(generator.cache_manager, args.file)
+    print(f"✅ {count} entradas exportadas para {args.file}")
+    return True
+
+def cmd_stats(generator: DescriptionGenerator, args) -> bool:
+    stats = generator.cache_manager.get_stats()
+    print(f"📊 Cache ({stats['backend']}): {stats['size']} entradas, {stats['file_size_mb']:.2f} MB")
+    print(f"   TTL: {stats['ttl_hours']:.1f} h | namespace atual: {generator.config.model_id}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa e exporta o cache de descrições")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    import_parser = subparsers.add_parser('import', help="Importa planilhas finalizadas ou pacotes de cache")
+    import_parser.add_argument('files', nargs='+')
+    import_parser.add_argument('--column', default=DESCRIPTION_COLUMN, help="Coluna com as descrições")
+    import_parser.add_argument('--model', help="Modelo cujas chaves recebem as descrições (padrão: atual)")
+    import_parser.add_argument('--replace', action='store_true',
+                               help="Planilhas substituem entradas existentes")
+    import_parser.add_argument('--keep-existing', action='store_true',
+                               help="Pacotes não substituem entradas válidas existentes")
+    
+    export_parser = subparsers.add_parser('export', help="Exporta o cache para um pacote")
+    export_parser.add_argument('file')
+    
+    subparsers.add_parser('stats', help="Mostra estatísticas do cache")
+    
+    args = parser.parse_args()
+    
+    generator = DescriptionGenerator()
+    commands = {'import': cmd_import, 'export': cmd_export, 'stats': cmd_stats}
+    
+    try:
+        success = commands[args.command](generator, args)
+    finally:
+        generator.cache_manager.close()
+    
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()
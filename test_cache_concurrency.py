@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Teste de estresse do cache com muitas threads simultâneas
+"""
+
+import sys
+import time
+import random
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Adicionar o diretório raiz ao path
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR))
+
+WORKERS = 32
+OPERATIONS = 2000
+
+def test_memory_cache_stress():
+    """Estressa a camada em memória com leituras, escritas e remoções"""
+    print("🧪 Estressando cache em memória...")
+    
+    from app.core.memory_cache import MemoryLRUCache, entry_size
+    
+    cache = MemoryLRUCache(max_bytes=256 * 1024, shards=16)
+    gets = [0] * WORKERS
+    
+    def worker(worker_id: int):
+        rng = random.Random(worker_id)
+        for _ in range(OPERATIONS):
+            key = f"chave-{rng.randrange(5000)}"
+            operation = rng.random()
+            
+            if operation < 0.6:
+                entry = cache.get(key, time.time())
+                gets[worker_id] += 1
+                # Entradas nunca devem aparecer misturadas entre chaves
+                assert entry is None or entry['description'] == f"descrição de {key}"
+            elif operation < 0.95:
+                cache.set(key, {'description': f"descrição de {key}", 'expires_at': time.time() + 60})
+            else:
+                cache.delete(key)
+    
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        list(executor.map(worker, range(WORKERS)))
+    elapsed = time.time() - start
+    
+    stats = cache.get_stats()
+    
+    # Contabilidade de bytes consistente com o conteúdo real
+    real_bytes = sum(size for shard in cache._shards for _, size in shard._entries.values())
+    assert stats['memory_bytes'] == real_bytes, (stats['memory_bytes'], real_bytes)
+    assert stats['memory_bytes'] <= stats['memory_limit_bytes']
+    for shard in cache._shards:
+        for key, (entry, size) in shard._entries.items():
+            assert size == entry_size(key, entry)
+    
+    # Nenhum incremento perdido
+    assert stats['memory_hits'] + stats['memory_misses'] == sum(gets)
+    
+    print(f"✅ {WORKERS * OPERATIONS} operações em {elapsed:.2f}s "
+          f"({stats['memory_entries']} entradas, {stats['memory_evictions']} descartes)")
+    return True
+
+def test_cache_manager_stress():
+    """Estressa o CacheManager completo (memória + SQLite)"""
+    print("🧪 Estressando CacheManager com SQLite...")
+    
+    from app.core.cache import CacheManager
+    from app.core.cache_backends import SQLiteCacheBackend
+    from app.core.models import Product, GenerationResult
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = CacheManager(backend=SQLiteCacheBackend(Path(tmp_dir) / "stress.db"))
+        products_per_worker = 100
+        errors = []
+        lock = threading.Lock()
+        
+        def worker(worker_id: int):
+            try:
+                for i in range(products_per_worker):
+                    # Metade das chaves é compartilhada entre as threads
+                    name = f"Compartilhado {i}" if i % 2 else f"Produto {worker_id}-{i}"
+                    product = Product(nome=name, cor="Azul")
+                    
+                    cache.set(product, GenerationResult(product=product, description=f"Texto {name}", success=True))
+                    result = cache.get(product)
+                    
+                    assert result is not None, f"Entrada perdida: {name}"
+                    assert result.description == f"Texto {name}", f"Entrada corrompida: {name}"
+                    assert result.product is product
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+        
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            list(executor.map(worker, range(WORKERS)))
+        elapsed = time.time() - start
+        
+        assert not errors, errors[:3]
+        
+        cache.flush()
+        expected_size = WORKERS * products_per_worker // 2 + products_per_worker // 2
+        assert cache.size() == expected_size, (cache.size(), expected_size)
+        assert cache.hits == WORKERS * products_per_worker
+        assert cache.misses == 0
+        
+        cache.close()
+    
+    print(f"✅ {WORKERS} threads, {WORKERS * products_per_worker} escritas/leituras em {elapsed:.2f}s")
+    return True
+
+def main():
+    """Função principal de teste"""
+    print("🚀 TESTE DE CONCORRÊNCIA - Cache")
+    print("=" * 50)
+    
+    tests = [
+        ("Cache em memória", test_memory_cache_stress),
+        ("CacheManager", test_cache_manager_stress)
+    ]
+    
+    passed = 0
+    total = len(tests)
+    
+    for test_name, test_func in tests:
+        try:
+            if test_func():
+                passed += 1
+                print(f"✅ {test_name}: PASSOU")
+            else:
+                print(f"❌ {test_name}: FALHOU")
+        except Exception as e:
+            print(f"❌ {test_name}: ERRO - {e!r}")
+    
+    print("\n" + "=" * 50)
+    print(f"📊 Resultado: {passed}/{total} testes passaram")
+    
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
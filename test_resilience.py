@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Teste das retentativas do cliente Ollama (sem servidor real)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+# Adicionar o diretório raiz ao path
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR))
+
+class FakeResponse:
+    """Resposta mínima do Ollama para /api/generate"""
+    
+    status_code = 200
+    
+    def json(self):
+        return {'response': 'Descrição gerada', 'done': True, 'eval_count': 3}
+
+def test_connection_error_is_retried():
+    """Conexão recusada na primeira tentativa: a segunda chega ao mesmo servidor"""
+    print("🧪 Testando retentativa após conexão recusada...")
+    
+    from app.core.ai_client import AIClient
+    from app.core.models import GenerationConfig
+    from app.core.resilience import RetryPolicy
+    
+    client = AIClient(base_url="http://127.0.0.1:9")
+    client.retry_policy = RetryPolicy(attempts=3, base_delay=0.01, max_delay=0.01)
+    # Sem health check de verdade: o único servidor começa saudável
+    client.pool._last_refresh = time.time()
+    
+    calls = []
+    
+    def post(url, **kwargs):
+        calls.append(url)
+        if len(calls) == 1:
+            raise requests.exceptions.ConnectionError("Conexão recusada")
+        return FakeResponse()
+    
+    client.session.post = post
+    
+    result = client.generate("Produto", GenerationConfig(model_id="gemma2:2b"))
+    
+    assert result == 'Descrição gerada', result
+    assert len(calls) == 2, calls
+    assert client.get_stats()['retries'] == 1
+    assert client.get_stats()['fast_failures'] == 0
+    assert client.pool.healthy_count() == 1
+    
+    print("✅ Requisição repetida e concluída na segunda tentativa")
+    return True
+
+def main():
+    """Função principal de teste"""
+    print("🚀 TESTE DE RESILIÊNCIA - Cliente Ollama")
+    print("=" * 50)
+    
+    tests = [
+        ("Retentativa após conexão recusada", test_connection_error_is_retried)
+    ]
+    
+    passed = 0
+    total = len(tests)
+    
+    for test_name, test_func in tests:
+        try:
+            if test_func():
+                passed += 1
+                print(f"✅ {test_name}: PASSOU")
+            else:
+                print(f"❌ {test_name}: FALHOU")
+        except Exception as e:
+            print(f"❌ {test_name}: ERRO - {e!r}")
+    
+    print("\n" + "=" * 50)
+    print(f"📊 Resultado: {passed}/{total} testes passaram")
+    
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)